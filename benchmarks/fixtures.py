@@ -0,0 +1,254 @@
+"""Synthetic pages of any size, built from the markup of the fixtures in `tests/test_parser.py`.
+
+Every generated row is unique, so the extracted data can be compared row by row.
+"""
+
+from datetime import date, timedelta
+
+LAYOUT = """<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml"><head>
+<meta http-equiv="Content-Type" content="text/html; charset=UTF-8" />
+<title>Obligacje Skarbowe</title>
+{head}
+</head><body>
+<div id="container" class="container">
+<div id="header" class="span-24 last"><ul class="menu">{menu}</ul></div>
+<form id="userInfoForm" name="userInfoForm" method="post" action="/daneRachunku.html?execution=e39s1" enctype="application/x-www-form-urlencoded">
+<input type="hidden" name="userInfoForm" value="userInfoForm">
+<img src="/images/lock-closed.png" style="float:none; vertical-align: text-bottom;" title="Użytkownik zalogowany">
+					Zalogowany użytkownik:&nbsp;
+					JAN&nbsp;KOWALSKI
+						<br>Ostatnie udane logowanie:&nbsp;2025-04-24 13:29:48
+						<br>Ostatnie nieudane logowanie:&nbsp;2025-04-23 18:44:29<input type="hidden" name="javax.faces.ViewState" id="javax.faces.ViewState" value="e1s1">
+</form>
+<div id="content" class="span-18 last">
+<h3>{title}</h3>
+<span id="spanContent"><form id="{form}" name="{form}" method="post" action="/{page}?execution=e1s1" enctype="application/x-www-form-urlencoded">
+<input type="hidden" name="{form}" value="{form}" />
+{body}
+<input type="hidden" name="javax.faces.ViewState" id="j_id1:javax.faces.ViewState:0" value="e1s1" autocomplete="off" />
+</form></span>
+</div>
+<div id="footer" class="span-24 last">{footer}</div>
+</div>
+</body></html>"""
+
+HEAD = "".join(
+    f'<script type="text/javascript" src="/javax.faces.resource/script{i}.js.html?ln=primefaces&amp;v=6.2"></script>'
+    f'<link type="text/css" rel="stylesheet" href="/javax.faces.resource/style{i}.css.html?ln=primefaces&amp;v=6.2" />'
+    for i in range(20)
+)
+MENU = "".join(
+    f'<li class="menu-item"><a href="/strona{i}.html" title="Pozycja menu {i}"><span class="ui-menuitem-text">Pozycja menu {i}</span></a></li>'
+    for i in range(40)
+)
+FOOTER = "".join(
+    f'<p class="footer-note">Informacja prawna numer {i}. Obligacje skarbowe oferowane są przez Skarb Państwa.</p>'
+    for i in range(20)
+)
+
+
+def layout(page, form, title, body):
+    return LAYOUT.format(
+        head=HEAD,
+        menu=MENU,
+        footer=FOOTER,
+        page=page,
+        form=form,
+        title=title,
+        body=body,
+    )
+
+
+PORTFOLIO_ROW = """<tr data-ri="{i}" class="ui-widget-content ui-datatable-even"><td role="gridcell"><span id="stanRachunku:j_idt171:{i}:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: left; width: 100%; display: inline-block; white-space: nowrap;">{emisja}</span><script id="stanRachunku:j_idt171:{i}:j_idt185_s" type="text/javascript">$(function(){{PrimeFaces.cw("ExtTooltip","widget_stanRachunku_j_idt171_{i}_j_idt185",{{id:"stanRachunku:j_idt171:{i}:j_idt185",global:false,shared:false,autoShow:false,forTarget:"stanRachunku:j_idt171:{i}:nazwaSkrocona",content: {{text: "{tooltip}"}},style: {{widget:true}},show:{{event:'mouseenter',delay:0,effect:function(){{$(this).fadeIn(500);}}}},hide:{{event:'mouseleave',delay:0,fixed:false,effect:function(){{$(this).fadeOut(500);}}}},position: {{at:'bottom right',my:'top left',adjust:{{x:0,y:0}},viewport:$(window)}}}});}});</script></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">{dostepnych}</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">0</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">{nominalna} PLN</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">{aktualna} PLN</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">{data_wykupu}</span></td></tr>"""
+
+OFFERS_ROW = """<tr data-ri="{i}" class="ui-widget-content ui-datatable-even"><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:{i}:nazwaEmitenta" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">Skarb Państwa</span></td><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:{i}:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">{rodzaj}: {emisja}</span><script id="dostepneEmisje:j_idt190:{i}:j_idt193_s" type="text/javascript">$(function(){{PrimeFaces.cw("ExtTooltip","widget_dostepneEmisje_j_idt190_{i}_j_idt193",{{id:"dostepneEmisje:j_idt190:{i}:j_idt193",global:false,shared:false,autoShow:false,forTarget:"dostepneEmisje:j_idt190:{i}:nazwaSkrocona",content: {{text: "DZIESIĘCIOLETNICH OSZCZĘDNOŚCIOWYCH OBLIGACJI SKARBOWYCH"}},style: {{widget:true}},show:{{event:'mouseenter',delay:0,effect:function(){{$(this).fadeIn(500);}}}},hide:{{event:'mouseleave',delay:0,fixed:false,effect:function(){{$(this).fadeOut(500);}}}},position: {{at:'bottom right',my:'top left',adjust:{{x:0,y:0}},viewport:$(window)}}}});}});</script></td><td role="gridcell" style="white-space: normal; text-align: center;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">od 2025-04-01 <br/> do 2025-04-30</span></td><td role="gridcell" style="white-space: normal;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">{oprocentowanie}%</span></td><td role="gridcell" style="white-space: normal; text-align: center;"><a href="http://www.obligacjeskarbowe.pl/listy-emisyjne/?id={emisja}" style="font-size: 0.875em; " target="_blank">pokaż</a></td><td role="gridcell" style="text-align: center; font-size: 0.875em; "><a id="dostepneEmisje:j_idt190:{i}:wybierz" href="#" class="ui-commandlink ui-widget" onclick="PrimeFaces.ab({{s:&quot;dostepneEmisje:j_idt190:{i}:wybierz&quot;,f:&quot;dostepneEmisje&quot;,u:&quot;dostepneEmisje&quot;}});return false;">wybierz</a><script id="dostepneEmisje:j_idt190:{i}:wybierz_s" type="text/javascript">$(function(){{PrimeFaces.cw("CommandLink","widget_dostepneEmisje_j_idt190_{i}_wybierz",{{id:"dostepneEmisje:j_idt190:{i}:wybierz"}});}});</script></td></tr>"""
+
+HISTORY_ROW = """
+										<tr class="ui-widget-content ui-datatable-even" data-ri="{i}" role="row">
+											<td role="gridcell">{data}</td>
+											<td role="gridcell">dyspozycja zakupu</td>
+											<td role="gridcell">{kod}</td>
+											<td role="gridcell">{nr_zapisu}</td>
+											<td role="gridcell">{seria}</td>
+											<td role="gridcell">10</td>
+											<td role="gridcell">1000</td>
+											<td role="gridcell">zrealizowana</td>
+											<td role="gridcell"></td>
+										</tr>"""
+
+BOND_TYPES = ("OTS", "ROR", "DOR", "TOS", "COI", "EDO", "ROS", "ROD")
+
+
+def emisja(i):
+    """Unique series code, i.e. EDO0135."""
+    return f"{BOND_TYPES[i % len(BOND_TYPES)]}{i // len(BOND_TYPES) % 10000:04d}"
+
+
+def polish_amount(grosze):
+    """Formats an amount the way the site does, i.e. 1 234,56."""
+    zlote, grosze = divmod(grosze, 100)
+    return f"{zlote:,}".replace(",", " ") + f",{grosze:02d}"
+
+
+def tooltip(i):
+    periods = i % 12 + 1
+    return "".join(
+        f"okres {okres} oprocentowanie {5 + (i + okres) % 300 / 100:.2f}%<\\/br>"
+        for okres in range(1, periods + 1)
+    )
+
+
+def portfolio_rows(rows, start=0):
+    """Rows of the portfolio table, as sent back by a partial response."""
+    return "".join(
+        PORTFOLIO_ROW.format(
+            i=i,
+            emisja=emisja(i),
+            tooltip=tooltip(i),
+            dostepnych=i % 100 + 1,
+            nominalna=polish_amount((i % 100 + 1) * 10000),
+            aktualna=polish_amount((i % 100 + 1) * 10000 + i),
+            data_wykupu=date(2030, 1, 1) + timedelta(days=i),
+        )
+        for i in range(start, start + rows)
+    )
+
+
+def portfolio_page(rows):
+    """stanRachunku.html"""
+    body = (
+        '<select id="stanRachunku:j_idt171:j_id5" name="stanRachunku:j_idt171:j_id5" class="ui-paginator-rpp-options">'
+        '<option value="20" selected="selected">20</option></select>'
+        '<table role="grid"><tbody id="stanRachunku:j_idt171_data" class="ui-datatable-data ui-widget-content">'
+        f"{portfolio_rows(rows)}</tbody></table>"
+    )
+    return layout("stanRachunku.html", "stanRachunku", "Stan rachunku", body)
+
+
+def offers_page(rows):
+    """zakupObligacji.html"""
+    table = "".join(
+        OFFERS_ROW.format(
+            i=i,
+            rodzaj="10-letnie",
+            emisja=emisja(i),
+            oprocentowanie=f"{5 + i % 300 / 100:.2f}".replace(".", ","),
+        )
+        for i in range(rows)
+    )
+    body = (
+        '<span class="formlabel-230 formlabel-base">Saldo środków pieniężnych</span><span class="formfield-base" style="font-weight: bold;">1 000 000,00 PLN</span>'
+        '<span class="formfield-base">Wartość nominalna dotychczas zakupionych obligacji za środki przyznane w ramach programów wsparcia rodziny wynosi: 69420.99</span>'
+        '<table role="grid"><tbody id="dostepneEmisje:j_idt190_data" class="ui-datatable-data ui-widget-content">'
+        f"{table}</tbody></table>"
+    )
+    return layout("zakupObligacji.html", "dostepneEmisje", "Zakup obligacji", body)
+
+
+def history_page(rows):
+    """historiaDyspozycji.html after submitting the dates"""
+    table = "".join(
+        HISTORY_ROW.format(
+            i=i,
+            data=date(2010, 1, 1) + timedelta(days=i),
+            kod=f"{emisja(i)}/{i}",
+            nr_zapisu=i,
+            seria=i % 100,
+        )
+        for i in range(rows)
+    )
+    body = (
+        '<table role="grid"><tbody class="ui-datatable-data ui-widget-content" id="historia:tbl_data">'
+        f"{table}</tbody></table>"
+    )
+    return layout("historiaDyspozycji.html", "historia", "Historia dyspozycji", body)
+
+
+def archive_page(rows):
+    """https://www.obligacjeskarbowe.pl/archiwum-listow-emisyjnych/"""
+    types = "".join(
+        f'<option value="{bond_type.lower()}">Obligacje {bond_type}</option>'
+        for bond_type in BOND_TYPES
+    )
+    issues = "".join(
+        f'<option data-id="{emisja(i)[:3].lower()}" value="/listy-emisyjne/?id={emisja(i).lower()}">{emisja(i)}</option>'
+        for i in range(rows)
+    )
+    body = (
+        f'<select id="id_type_bonds" name="type_bonds">{types}</select>'
+        f'<select id="id_issue_bonds" name="issue_bonds"><option value="">Wybierz emisję</option>{issues}</select>'
+    )
+    return layout(
+        "archiwum-listow-emisyjnych/", "archiwum", "Archiwum listów emisyjnych", body
+    )
+
+
+def portfolio_partial_response(rows, start=0, view_state=2):
+    """Partial response to the pagination of the portfolio table."""
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?>\n"
+        '<partial-response id="j_id1"><changes>'
+        f'<update id="stanRachunku:j_idt171"><![CDATA[{portfolio_rows(rows, start) or " "}]]></update>'
+        f'<update id="j_id1:javax.faces.ViewState:0"><![CDATA[e1s{view_state}]]></update>'
+        "</changes></partial-response>"
+    )
+
+
+PURCHASE_FIELDS = """<h4><strong>Obligacje</strong></h4>
+<span class="formlabel-230 formlabel-base">Kod emisji</span><span class="formfield-base" style="font-weight: bold;">EDO0535</span>
+<br />
+<span class="formlabel-230 formlabel-base">Pełna nazwa emisji</span><span class="formfield-base" style="font-weight: bold;">EMERYTALNYCH DZIESIĘCIOLETNICH OSZCZĘDNOŚCIOWYCH </span>
+<br />
+<span class="formlabel-230 formlabel-base"> </span><span class="formfield-base" style="font-weight: bold;">OBLIGACJI SKARBOWYCH</span>
+<br />
+<span class="formlabel-230 formlabel-base">Oprocentowanie</span><span class="formfield-base" style="font-weight: bold;">6,80%</span>
+<br />
+<span class="formlabel-230 formlabel-base">Wartość nominalna jednej obligacji</span><span id="daneDyspozycji:testWartosc" class="formfield-base" style="font-weight: bold;">100,00 PLN</span>
+<br />
+<hr class="append-bottom prepend-top" />
+<h4><strong>Uzupełnij informacje</strong></h4>
+<label id="daneDyspozycji:uxCenaSprzedazy" class="ui-outputlabel ui-widget ui-helper-hidden">100</label><label id="daneDyspozycji:j_idt140" class="ui-outputlabel ui-widget formlabelXXL text" for="daneDyspozycji:liczbaZamiawianychObligacji">Liczba zamawianych obligacji<span class="ui-outputlabel-rfi">*</span></label><input id="daneDyspozycji:liczbaZamiawianychObligacji" name="daneDyspozycji:liczbaZamiawianychObligacji" type="text" autocomplete="off" maxlength="7" style="float: none" aria-required="true" class="ui-inputfield ui-inputtext ui-widget ui-state-default ui-corner-all span-6" /> szt.
+<br />
+<span class="formlabel-230 formlabel-base">Wartość zamawianych obligacji PLN</span><span id="daneDyspozycji:uxWartoscZamawianychObligacji" class="formfield-base" style="font-weight: bold;">0,00 PLN</span>
+<hr class="append-bottom prepend-top" />
+<h4><strong>Gotówka</strong></h4>
+<span class="formlabel-230 formlabel-base">Saldo środków pieniężnych</span><span class="formfield-base" style="font-weight: bold;">1 000 000,00 PLN</span>
+<hr class="space" />
+<span class="formlabel-230 formlabel-base">Dyspozycja jest składana na instrument finansowy dla którego Klient znajduje się w grupie docelowej</span>
+<span class="formfield-base" style="font-weight: bold; width: 330px; vertical-align: top;">Na podstawie danych z wypełnionej ankiety PKO BP BM informuje, że zlecenie jest składane na instrument, dla którego klient znajduje się w grupie docelowej.</span>
+<br />
+<span class="formlabel-230 formlabel-base" style="vertical-align: top;">Koszt transakcji:</span><span class="formfield-base" style="font-weight: bold; width: 330px;">Klient nie ponosi opłat przy zakupie obligacji.<br/>
+    Wysokość opłaty za przedterminowy wykup obligacji
+    określa List emisyjny danej emisji obligacji.</span>
+<br />"""
+
+
+def purchase_page():
+    """daneDyspozycji.html, the first step of a purchase"""
+    return layout(
+        "daneDyspozycji.html", "daneDyspozycji", "Dane dyspozycji", PURCHASE_FIELDS
+    )
+
+
+def confirmation_page():
+    """zatwierdzenie1.html, the last step of a purchase"""
+    body = (
+        '<span class="formlabel-230 formlabel-base">Data i czas przyjęcia zlecenia: </span>'
+        '<span class="formfield-base" style="font-weight: bold;">2025-04-24 13:29:48</span><br />'
+    )
+    return layout(
+        "zatwierdzenie1.html",
+        "zatwierdzenie1",
+        "Dyspozycja zakupu przyjęta do realizacji",
+        body,
+    )
+
+
+def balance_page():
+    """Cash balance, as shown on the purchase pages."""
+    body = (
+        '<h4><strong>Gotówka</strong></h4><span class="formlabel-230 formlabel-base">Saldo środków pieniężnych</span>'
+        '<span class="formfield-base" style="font-weight: bold;">1 000 000,00 PLN</span>'
+    )
+    return layout("zakupObligacji.html", "gotowka", "Gotówka", body)
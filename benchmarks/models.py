@@ -0,0 +1,70 @@
+"""Memory per row of the parsed models against the columnar tables::
+
+python -m benchmarks.models --rows 5000 --accounts 4
+"""
+
+import pickle
+import tracemalloc
+
+import click
+from tabulate import tabulate
+
+from benchmarks import fixtures
+from obligacjeskarbowe.columnar import HistoryTable, PortfolioTable
+from obligacjeskarbowe.parser import extract_bonds, parse_history, parse_html
+
+
+def allocated(func):
+    """Memory still held by whatever `func` returns."""
+    tracemalloc.start()
+    result = func()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (result, current)
+
+
+@click.command()
+@click.option("--rows", type=int, default=5000, help="Rows of every account.")
+@click.option(
+    "--accounts", type=int, default=4, help="Accounts holding the same series."
+)
+def main(rows, accounts):
+    content = fixtures.portfolio_page(rows).encode()
+    bonds = extract_bonds(parse_html(content, profile="portfolio"), content)
+    history = parse_history(parse_html(fixtures.history_page(rows)))
+
+    results = []
+    for name, items, table_type in (
+        ("Bond", bonds, PortfolioTable),
+        ("History", history, HistoryTable),
+    ):
+        # Every account gets its own copy of the objects, just like after parsing.
+        objects, objects_size = allocated(
+            lambda: [pickle.loads(pickle.dumps(items)) for _ in range(accounts)]
+        )
+        table, table_size = allocated(
+            lambda: table_type.from_rows(row for copy in objects for row in copy)
+        )
+        count = rows * accounts
+        assert list(table) == [row for copy in objects for row in copy]
+        results.append(
+            [
+                name,
+                count,
+                f"{objects_size / count:.0f}",
+                f"{table_size / count:.0f}",
+                f"{objects_size / table_size:.1f}x",
+            ]
+        )
+
+    click.echo(
+        tabulate(
+            results,
+            ["Model", "Rows", "Objects (B/row)", "Table (B/row)", "Ratio"],
+            tablefmt="fancy_grid",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Allocation of large budgets between many offers::
+
+python -m benchmarks.optimize --offers 8 --offers 1000 --budget 10000 --budget 100000000
+"""
+
+import time
+from datetime import date
+from decimal import Decimal
+
+import click
+from tabulate import tabulate
+
+from benchmarks import fixtures
+from obligacjeskarbowe.money import Money
+from obligacjeskarbowe.optimize import optimize
+from obligacjeskarbowe.parser import extract_available_bonds, parse_html
+
+ON = date(2025, 4, 10)
+
+
+@click.command()
+@click.option(
+    "--offers",
+    "sizes",
+    type=int,
+    multiple=True,
+    default=[8, 100, 1000],
+    help="Number of candidate offers, can be given many times.",
+)
+@click.option(
+    "--budget",
+    "budgets",
+    type=int,
+    multiple=True,
+    default=[10_000, 1_000_000, 100_000_000],
+    help="Budget in PLN, can be given many times.",
+)
+@click.option(
+    "--horizon", type=int, default=36, help="Months until the money is needed back."
+)
+def main(sizes, budgets, horizon):
+    rows = []
+    for size in sizes:
+        offers = extract_available_bonds(
+            parse_html(fixtures.offers_page(size)), path="/zakupObligacji.html"
+        )
+        for budget in budgets:
+            bonds = budget // 100
+            started = time.perf_counter()
+            plan = optimize(
+                offers,
+                Money(Decimal(budget)),
+                horizon,
+                cpi=Decimal("3.5"),
+                # Limits that bind, so the plan is spread over many offers
+                family_limit=bonds // 10,
+                liquid_amount=Money(Decimal(budget // 5)),
+                max_per_offer=max(1, 4 * bonds // size),
+                on=ON,
+            )
+            elapsed = time.perf_counter() - started
+            rows.append(
+                [
+                    size,
+                    budget,
+                    len(plan.allocations),
+                    f"{plan.gain.amount}",
+                    f"{elapsed * 1000:.1f}",
+                ]
+            )
+    click.echo(
+        tabulate(
+            rows,
+            ["Offers", "Budget (PLN)", "Offers bought", "Gain (PLN)", "Time (ms)"],
+            tablefmt="fancy_grid",
+            disable_numparse=True,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Round-trips and latency of the portfolio pagination for various page sizes.
+
+The server is simulated, every request sleeps for a fixed latency plus a small transfer time per row::
+
+    python -m benchmarks.pagination --rows 250 --latency 80
+"""
+
+import contextlib
+import io
+import time
+
+import click
+import requests
+from tabulate import tabulate
+
+from obligacjeskarbowe.client import ObligacjeSkarbowe
+
+ROW = (
+    '<tr data-ri="{i}" class="ui-widget-content ui-datatable-even">'
+    '<td role="gridcell"><span id="stanRachunku:j_idt171:{i}:nazwaSkrocona">EDO{i:04d}</span>'
+    '<script id="stanRachunku:j_idt171:{i}:j_idt185_s" type="text/javascript">'
+    '$(function(){{PrimeFaces.cw("ExtTooltip","widget_stanRachunku_j_idt171_{i}_j_idt185",'
+    '{{id:"stanRachunku:j_idt171:{i}:j_idt185",global:false,shared:false,autoShow:false,'
+    'forTarget:"stanRachunku:j_idt171:{i}:nazwaSkrocona",'
+    'content: {{text: "okres 1 oprocentowanie 6.8%<\\/br>okres 2 oprocentowanie 5.55%<\\/br>"}},'
+    "style: {{widget:true}}}});}});</script></td>"
+    '<td role="gridcell"><span>10</span></td>'
+    '<td role="gridcell"><span>0</span></td>'
+    '<td role="gridcell"><span>1 000,00 PLN</span></td>'
+    '<td role="gridcell"><span>1 068,00 PLN</span></td>'
+    '<td role="gridcell"><span>2035-08-01</span></td></tr>'
+)
+
+
+class Response:
+    def __init__(self, url, content, status_code=200):
+        self.url = url
+        self.content = content.encode()
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Server Error", response=self
+            )
+
+
+class StanRachunkuServer:
+    """Pretends to be a `requests.Session` logged into stanRachunku.html."""
+
+    def __init__(self, rows, latency, per_row, cap=None, reject_above=None):
+        self.rows = rows
+        self.latency = latency
+        self.per_row = per_row
+        self.cap = cap
+        self.reject_above = reject_above
+        self.round_trips = 0
+        self.view_state = 1
+
+    def render_rows(self, first, count):
+        return "".join(
+            ROW.format(i=i) for i in range(first, min(first + count, self.rows))
+        )
+
+    def wait(self, rows):
+        self.round_trips += 1
+        time.sleep(self.latency + self.per_row * rows)
+
+    def get(self, url, **kwargs):
+        rows = self.render_rows(0, 20)
+        self.wait(20)
+        return Response(
+            url,
+            '<html><body><form id="stanRachunku">'
+            '<select id="stanRachunku:j_idt171:j_id5"></select>'
+            f'<table><tbody id="stanRachunku:j_idt171_data">{rows}</tbody></table>'
+            f'<input type="hidden" name="javax.faces.ViewState" value="e1s{self.view_state}" />'
+            "</form></body></html>",
+        )
+
+    def post(self, url, data, **kwargs):
+        assert data["javax.faces.ViewState"] == f"e1s{self.view_state}"
+        first = int(data["stanRachunku:j_idt171_first"])
+        per_page = int(data["stanRachunku:j_idt171_rows"])
+        if self.reject_above is not None and per_page > self.reject_above:
+            self.wait(0)
+            return Response(url, "", status_code=500)
+        if self.cap is not None:
+            per_page = min(per_page, self.cap)
+
+        self.view_state += 1
+        rows = self.render_rows(first, per_page) or " "
+        self.wait(min(per_page, max(self.rows - first, 0)))
+        return Response(
+            url,
+            "<?xml version='1.0' encoding='UTF-8'?>\n"
+            '<partial-response id="j_id1"><changes>'
+            f'<update id="stanRachunku:j_idt171"><![CDATA[{rows}]]></update>'
+            f'<update id="j_id1:javax.faces.ViewState:0"><![CDATA[e1s{self.view_state}]]></update>'
+            "</changes></partial-response>",
+        )
+
+
+def measure(server, **kwargs):
+    client = ObligacjeSkarbowe()
+    client.session = server
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        bonds = list(client.iter_portfolio(**kwargs))
+    elapsed = time.perf_counter() - started
+    assert len(bonds) == server.rows, f"Expected {server.rows} but got {len(bonds)}"
+    return (server.round_trips, elapsed)
+
+
+@click.command()
+@click.option("--rows", type=int, default=250, help="Series in the portfolio.")
+@click.option("--latency", type=float, default=80, help="Round-trip time in ms.")
+@click.option("--per-row", type=float, default=0.2, help="Transfer time per row in ms.")
+@click.option("--cap", type=int, default=None, help="Largest page the server returns.")
+@click.option(
+    "--reject-above", type=int, default=None, help="Server fails larger pages."
+)
+def main(rows, latency, per_row, cap, reject_above):
+    def server():
+        return StanRachunkuServer(
+            rows, latency / 1000, per_row / 1000, cap=cap, reject_above=reject_above
+        )
+
+    results = []
+    for per_page in (20, 50, 100, 200, 500):
+        for pipelined in (False, True):
+            try:
+                round_trips, elapsed = measure(
+                    server(), per_page=per_page, pipelined=pipelined
+                )
+            except requests.exceptions.HTTPError as e:
+                results.append([per_page, pipelined, "-", f"{e}"])
+                continue
+            results.append([per_page, pipelined, round_trips, f"{elapsed:.3f}"])
+    for pipelined in (False, True):
+        round_trips, elapsed = measure(server(), adaptive=True, pipelined=pipelined)
+        results.append(["adaptive", pipelined, round_trips, f"{elapsed:.3f}"])
+
+    click.echo(
+        tabulate(
+            results,
+            ["Page size", "Pipelined", "Round-trips", "Total (s)"],
+            tablefmt="fancy_grid",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
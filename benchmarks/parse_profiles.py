@@ -0,0 +1,111 @@
+"""Parse time and peak memory of a full parse against the page-specific parse profiles::
+
+python -m benchmarks.parse_profiles --rows 1000
+"""
+
+import time
+import tracemalloc
+
+import click
+from tabulate import tabulate
+
+from benchmarks import fixtures
+from obligacjeskarbowe.parser import (
+    DEFAULT_HTML_PARSER,
+    HTML_PARSERS,
+    emisje_parse_saldo_srodkow_pienieznych,
+    extract_available_bonds,
+    extract_bonds,
+    extract_form_action_by_id,
+    extract_javax_view_state,
+    parse_html,
+)
+
+
+def extract_offers(bs, content):
+    return (
+        extract_available_bonds(bs, "/zakupObligacji.html"),
+        emisje_parse_saldo_srodkow_pienieznych(bs),
+        extract_form_action_by_id(bs),
+        extract_javax_view_state(bs),
+    )
+
+
+def extract_navigation(bs, content):
+    return (extract_form_action_by_id(bs), extract_javax_view_state(bs))
+
+
+def extract_archive(bs, content):
+    return [
+        (option.get("value"), option.get_text(strip=True))
+        for select_id in ("id_type_bonds", "id_issue_bonds")
+        for option in bs.find("select", id=select_id).find_all("option")
+    ]
+
+
+PAGES = [
+    ("stanRachunku", fixtures.portfolio_page, "portfolio", extract_bonds),
+    ("zakupObligacji", fixtures.offers_page, "offers", extract_offers),
+    ("historiaDyspozycji", fixtures.history_page, "navigation", extract_navigation),
+    ("archiwum", fixtures.archive_page, "archive", extract_archive),
+]
+
+
+def measure(content, parser, profile, repeat):
+    """Returns the best parse time, and the peak memory of a single parse."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse_html(content, parser, profile=profile)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    bs = parse_html(content, parser, profile=profile)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (bs, min(timings), peak)
+
+
+@click.command()
+@click.option("--rows", type=int, default=1000, help="Rows of every table.")
+@click.option("--repeat", type=int, default=3, help="Best of N parses is reported.")
+@click.option("--parser", type=click.Choice(HTML_PARSERS), default=DEFAULT_HTML_PARSER)
+def main(rows, repeat, parser):
+    results = []
+    for page, generate, profile, extract in PAGES:
+        content = generate(rows).encode()
+        full, full_time, full_peak = measure(content, parser, None, repeat)
+        partial, partial_time, partial_peak = measure(content, parser, profile, repeat)
+        assert extract(full, content) == extract(
+            partial, content
+        ), f"Profile {profile!r} changes the result of {page}"
+        results.append(
+            [
+                page,
+                profile,
+                f"{full_time * 1000:.1f}",
+                f"{partial_time * 1000:.1f}",
+                f"{full_peak / 1024:.0f}",
+                f"{partial_peak / 1024:.0f}",
+            ]
+        )
+
+    click.echo(f"{rows} rows, {parser}")
+    click.echo(
+        tabulate(
+            results,
+            [
+                "Page",
+                "Profile",
+                "Full (ms)",
+                "Profile (ms)",
+                "Full peak (KiB)",
+                "Profile peak (KiB)",
+            ],
+            tablefmt="fancy_grid",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
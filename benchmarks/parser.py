@@ -0,0 +1,389 @@
+"""Timings of every public extractor of `obligacjeskarbowe.parser` on synthetic pages of growing size::
+
+    python -m benchmarks.parser --output parser.json
+    python -m benchmarks.parser --size 10 --size 100 --compare parser.json
+
+Results are saved as JSON, so two runs (i.e. two versions of the parser) can be compared case by case.
+"""
+
+import json
+import platform
+import sys
+import timeit
+import tomllib
+from datetime import datetime, timezone
+from importlib.metadata import version
+from pathlib import Path
+
+import click
+from tabulate import tabulate
+
+from benchmarks import fixtures
+from obligacjeskarbowe.parser import (
+    DEFAULT_HTML_PARSER,
+    HTML_PARSERS,
+    count_table_rows,
+    emisje_parse_saldo_srodkow_pienieznych,
+    emisje_parse_wartosc_nominalna_800plus,
+    extract_available_bonds,
+    extract_balance,
+    extract_bonds,
+    extract_bonds_fragment,
+    extract_dane_dyspozycji,
+    extract_data_przyjecia_zlecenia,
+    extract_form_action_by_id,
+    extract_javax_view_state,
+    extract_purchase_step_title,
+    extract_tooltips,
+    find_main_form,
+    html_to_string,
+    index_form_fields,
+    parse_balance,
+    parse_history,
+    parse_html,
+    parse_interest_periods,
+    parse_login_info,
+    parse_tooltip,
+    parse_xml_response,
+    scan_partial_update,
+)
+
+SIZES = (10, 100, 1000, 10000)
+
+
+def cold(func):
+    """Runs `func` with an empty tooltip cache, as on the first page parsed.
+
+    The same tooltips are parsed on every loop, so without clearing the cache only the first loop would parse them.
+    """
+
+    def call():
+        parse_interest_periods.cache_clear()
+        return func()
+
+    return call
+
+
+def scaled_cases(rows, parser):
+    """Cases whose cost grows with the number of table rows on the page.
+
+    Pages are generated and parsed up front, so only the extractor itself is timed.
+    """
+    portfolio = fixtures.portfolio_page(rows).encode()
+    portfolio_bs = parse_html(portfolio, parser)
+    partial_response = fixtures.portfolio_partial_response(rows).encode()
+    fragment = fixtures.portfolio_rows(rows)
+    offers = fixtures.offers_page(rows).encode()
+    offers_bs = parse_html(offers, parser)
+    history = fixtures.history_page(rows).encode()
+    history_bs = parse_html(history, parser)
+    archive = fixtures.archive_page(rows).encode()
+    tooltips = list(extract_tooltips(portfolio).values())
+    balances = [fixtures.polish_amount(i) + " PLN" for i in range(rows)]
+
+    return [
+        ("stanRachunku", "parse_html", lambda: parse_html(portfolio, parser)),
+        (
+            "stanRachunku",
+            "parse_html[portfolio]",
+            lambda: parse_html(portfolio, parser, profile="portfolio"),
+        ),
+        (
+            "stanRachunku",
+            "extract_bonds",
+            cold(lambda: extract_bonds(portfolio_bs, portfolio)),
+        ),
+        (
+            "stanRachunku",
+            "extract_bonds[cached]",
+            lambda: extract_bonds(portfolio_bs, portfolio),
+        ),
+        ("stanRachunku", "extract_tooltips", lambda: extract_tooltips(portfolio)),
+        (
+            "stanRachunku",
+            "parse_tooltip",
+            cold(lambda: [parse_tooltip(t) for t in tooltips]),
+        ),
+        (
+            "stanRachunku",
+            "parse_tooltip[cached]",
+            lambda: [parse_tooltip(t) for t in tooltips],
+        ),
+        (
+            "stanRachunku",
+            "html_to_string",
+            lambda: [html_to_string(fragment) for _ in range(10)],
+        ),
+        (
+            "partial-response",
+            "parse_xml_response",
+            lambda: list(parse_xml_response(partial_response)),
+        ),
+        (
+            "partial-response",
+            "scan_partial_update",
+            lambda: scan_partial_update(partial_response, "stanRachunku:j_idt171"),
+        ),
+        (
+            "partial-response",
+            "extract_bonds_fragment",
+            lambda: extract_bonds_fragment(fragment, parser),
+        ),
+        ("partial-response", "count_table_rows", lambda: count_table_rows(fragment)),
+        ("zakupObligacji", "parse_html", lambda: parse_html(offers, parser)),
+        (
+            "zakupObligacji",
+            "parse_html[offers]",
+            lambda: parse_html(offers, parser, profile="offers"),
+        ),
+        (
+            "zakupObligacji",
+            "extract_available_bonds",
+            lambda: extract_available_bonds(offers_bs, "/zakupObligacji.html"),
+        ),
+        (
+            "zakupObligacji",
+            "emisje_parse_saldo_srodkow_pienieznych",
+            lambda: emisje_parse_saldo_srodkow_pienieznych(offers_bs),
+        ),
+        (
+            "zakupObligacji",
+            "emisje_parse_wartosc_nominalna_800plus",
+            lambda: emisje_parse_wartosc_nominalna_800plus(offers_bs),
+        ),
+        (
+            "zakupObligacji",
+            "parse_balance",
+            lambda: [parse_balance(b) for b in balances],
+        ),
+        ("historiaDyspozycji", "parse_html", lambda: parse_html(history, parser)),
+        (
+            "historiaDyspozycji",
+            "parse_html[navigation]",
+            lambda: parse_html(history, parser, profile="navigation"),
+        ),
+        ("historiaDyspozycji", "parse_history", lambda: parse_history(history_bs)),
+        ("historiaDyspozycji", "find_main_form", lambda: find_main_form(history_bs)),
+        (
+            "historiaDyspozycji",
+            "extract_form_action_by_id",
+            lambda: extract_form_action_by_id(history_bs),
+        ),
+        (
+            "historiaDyspozycji",
+            "extract_javax_view_state",
+            lambda: extract_javax_view_state(history_bs),
+        ),
+        (
+            "historiaDyspozycji",
+            "parse_login_info",
+            lambda: parse_login_info(history_bs),
+        ),
+        ("archiwum", "parse_html", lambda: parse_html(archive, parser)),
+        (
+            "archiwum",
+            "parse_html[archive]",
+            lambda: parse_html(archive, parser, profile="archive"),
+        ),
+    ]
+
+
+def fixed_cases(parser):
+    """Cases on the purchase pages, which look the same regardless of the size of the account."""
+    purchase = fixtures.purchase_page().encode()
+    purchase_bs = parse_html(purchase, parser)
+    fields = index_form_fields(purchase_bs)
+    confirmation_bs = parse_html(fixtures.confirmation_page(), parser)
+    balance_bs = parse_html(fixtures.balance_page(), parser)
+
+    return [
+        ("daneDyspozycji", "parse_html", lambda: parse_html(purchase, parser)),
+        ("daneDyspozycji", "index_form_fields", lambda: index_form_fields(purchase_bs)),
+        (
+            "daneDyspozycji",
+            "extract_dane_dyspozycji",
+            lambda: extract_dane_dyspozycji(purchase_bs),
+        ),
+        (
+            "daneDyspozycji",
+            "extract_dane_dyspozycji[fields]",
+            lambda: extract_dane_dyspozycji(purchase_bs, fields),
+        ),
+        (
+            "daneDyspozycji",
+            "extract_purchase_step_title",
+            lambda: extract_purchase_step_title(purchase_bs),
+        ),
+        (
+            "zatwierdzenie1",
+            "extract_data_przyjecia_zlecenia",
+            lambda: extract_data_przyjecia_zlecenia(confirmation_bs),
+        ),
+        ("gotowka", "extract_balance", lambda: extract_balance(balance_bs)),
+    ]
+
+
+def measure(func, repeat):
+    """Runs `func` in batches of at least 0.2s and returns the best and the mean time of a single call.
+
+    The batch used to find the number of loops counts as the first of `repeat` batches.
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    timings = [elapsed / number]
+    timings += [elapsed / number for elapsed in timer.repeat(repeat - 1, number)]
+    return {
+        "best": min(timings),
+        "mean": sum(timings) / len(timings),
+        "loops": number,
+        "repeat": repeat,
+    }
+
+
+def project_version():
+    try:
+        return version("obligacjeskarbowe")
+    except Exception:
+        pyproject = Path(__file__).parent.parent / "pyproject.toml"
+        with pyproject.open("rb") as f:
+            return tomllib.load(f)["project"]["version"]
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e3), ("µs", 1e6)):
+        if seconds * scale >= 1:
+            return f"{seconds * scale:.2f} {unit}"
+    return f"{seconds * 1e9:.0f} ns"
+
+
+def run(sizes, parser, repeat):
+    results = []
+    for rows in sizes:
+        for page, case, func in scaled_cases(rows, parser):
+            click.echo(f"{page} {case} ({rows} rows)...", err=True)
+            results.append(
+                {"page": page, "case": case, "rows": rows, **measure(func, repeat)}
+            )
+    for page, case, func in fixed_cases(parser):
+        click.echo(f"{page} {case}...", err=True)
+        results.append(
+            {"page": page, "case": case, "rows": None, **measure(func, repeat)}
+        )
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Pairs every result with the baseline result of the same case.
+
+    :returns: Table rows, and the number of cases slower than `threshold` times the baseline
+    """
+    previous = {
+        (r["page"], r["case"], r["rows"]): r["best"] for r in baseline["results"]
+    }
+    table = []
+    regressions = 0
+    for result in results:
+        before = previous.get((result["page"], result["case"], result["rows"]))
+        if before is None:
+            ratio = None
+        else:
+            ratio = result["best"] / before
+            regressions += ratio > threshold
+        table.append(
+            [
+                result["page"],
+                result["case"],
+                result["rows"] or "",
+                format_time(before) if before is not None else "",
+                format_time(result["best"]),
+                f"{ratio:.2f}x" if ratio is not None else "",
+                "slower" if ratio is not None and ratio > threshold else "",
+            ]
+        )
+    return (table, regressions)
+
+
+@click.command()
+@click.option(
+    "--size",
+    "sizes",
+    type=int,
+    multiple=True,
+    default=SIZES,
+    show_default=True,
+    help="Rows of every table, can be repeated.",
+)
+@click.option("--repeat", type=int, default=3, help="Best of N batches is reported.")
+@click.option("--parser", type=click.Choice(HTML_PARSERS), default=DEFAULT_HTML_PARSER)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Save the results as JSON.",
+)
+@click.option(
+    "--compare",
+    "baseline",
+    type=click.File("r"),
+    default=None,
+    help="JSON results of a previous run to compare against.",
+)
+@click.option(
+    "--threshold",
+    type=float,
+    default=1.25,
+    show_default=True,
+    help="Ratio to the baseline above which a case is a regression.",
+)
+def main(sizes, repeat, parser, output, baseline, threshold):
+    results = run(sizes, parser, repeat)
+
+    if output is not None:
+        report = {
+            "benchmark": "parser",
+            "version": project_version(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parser": parser,
+            "beautifulsoup4": version("beautifulsoup4"),
+            "results": results,
+        }
+        output.write_text(json.dumps(report, indent=2))
+
+    if baseline is None:
+        click.echo(
+            tabulate(
+                [
+                    [
+                        r["page"],
+                        r["case"],
+                        r["rows"] or "",
+                        format_time(r["best"]),
+                        format_time(r["mean"]),
+                    ]
+                    for r in results
+                ],
+                ["Page", "Case", "Rows", "Best", "Mean"],
+                tablefmt="fancy_grid",
+            )
+        )
+        return
+
+    table, regressions = compare(results, json.load(baseline), threshold)
+    click.echo(
+        tabulate(
+            table,
+            ["Page", "Case", "Rows", "Baseline", "Best", "Ratio", ""],
+            tablefmt="fancy_grid",
+        )
+    )
+    if regressions:
+        click.echo(
+            f"{regressions} case(s) slower than {threshold}x the baseline", err=True
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Valuation of a portfolio on many dates: a per-bond Python loop against the array engine::
+
+python -m benchmarks.valuation --rows 1000 --days 30
+"""
+
+import time
+from datetime import date, timedelta
+from fractions import Fraction
+from math import floor
+
+import click
+from tabulate import tabulate
+
+from benchmarks import fixtures
+from obligacjeskarbowe.parser import extract_bonds, parse_html
+from obligacjeskarbowe.series import series_of
+from obligacjeskarbowe.valuation import Valuation
+
+
+def value_on(bond, day):
+    """Value of a single bond in grosze, one period at a time with exact fractions."""
+    series = series_of(bond.emisja)
+    boundaries = series.period_boundaries(bond.data_wykupu)
+    day = min(day, boundaries[-1])
+    rates = [Fraction(okres.oprocentowanie) / 100 for okres in bond.okresy][
+        : series.periods
+    ]
+    rates += rates[-1:] * (series.periods - len(rates))
+    years = Fraction(series.period_months, 12)
+    value = series.nominal_grosze
+    for period, rate in enumerate(rates):
+        begins, ends = boundaries[period], boundaries[period + 1]
+        if day < ends or period == series.periods - 1:
+            elapsed = Fraction(max((day - begins).days, 0), (ends - begins).days)
+            interest = value * rate * years * elapsed
+            return value + floor(interest + Fraction(1, 2))
+        if series.capitalized:
+            value += floor(value * rate * years + Fraction(1, 2))
+
+
+@click.command()
+@click.option("--rows", type=int, default=1000, help="Lots in the portfolio.")
+@click.option("--days", type=int, default=30, help="Consecutive valuation dates.")
+def main(rows, days):
+    content = fixtures.portfolio_page(rows).encode()
+    bonds = extract_bonds(parse_html(content, profile="portfolio"), content)
+    dates = [date(2035, 1, 1) + timedelta(days=day) for day in range(days)]
+
+    started = time.perf_counter()
+    expected = [[value_on(bond, day) for bond in bonds] for day in dates]
+    loop = time.perf_counter() - started
+
+    started = time.perf_counter()
+    valuation = Valuation(bonds)
+    setup = time.perf_counter() - started
+
+    started = time.perf_counter()
+    computed = valuation.unit_values(dates)
+    batched = time.perf_counter() - started
+
+    mismatches = sum(
+        a != b
+        for row, other in zip(expected, computed.tolist())
+        for a, b in zip(row, other)
+    )
+    click.echo(
+        tabulate(
+            [
+                ["Per-bond loop", f"{loop * 1000:.1f}"],
+                ["Valuation() arrays", f"{setup * 1000:.1f}"],
+                ["Valuation.unit_values()", f"{batched * 1000:.1f}"],
+            ],
+            ["", "Time (ms)"],
+            tablefmt="fancy_grid",
+        )
+    )
+    click.echo(f"{rows} lots x {days} dates, {mismatches} values differ")
+
+
+if __name__ == "__main__":
+    main()
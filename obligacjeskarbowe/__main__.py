@@ -1,18 +1,35 @@
-import shutil
 import os
 import tomllib
 from collections import OrderedDict
 import dataclasses
+import itertools
 from datetime import datetime
 import logging
+from decimal import Decimal, InvalidOperation
 import sys
 import click
 from tablib import Dataset
 
 from tabulate import tabulate
-from obligacjeskarbowe.client import ObligacjeSkarbowe
+from obligacjeskarbowe.cashflow import CashFlowCalendar
+from obligacjeskarbowe.client import PORTFOLIO_PAGE_SIZE, ObligacjeSkarbowe
+from obligacjeskarbowe.downloader import (
+    DEFAULT_PER_HOST,
+    DEFAULT_WORKERS,
+    download_all,
+)
+from obligacjeskarbowe.ladder import LadderPlanner
+from obligacjeskarbowe.money import Money, parse_polish_amount, sum_money
+from obligacjeskarbowe.optimize import optimize as optimize_allocation
 from obligacjeskarbowe.parser import DEFAULT_CURRENCY
+from obligacjeskarbowe.redemption import redemption_costs
+from obligacjeskarbowe.rollup import DIMENSIONS, Rollup, parse_condition
+from obligacjeskarbowe.series import known_series
+from obligacjeskarbowe.simulation import CpiModel, simulate
 from dateutil.relativedelta import relativedelta
+from obligacjeskarbowe.httpcache import CACHE_DIRECTORY, HttpCache
+from obligacjeskarbowe.manifest import CHANGED, Manifest
+from obligacjeskarbowe.transfer import Transfer, discard_part
 from obligacjeskarbowe.family800plus import (
     calculate_total_compensation,
     calculate_available_bonds,
@@ -23,6 +40,59 @@ def display_money(money):
     return f"{money.amount} {money.currency}"
 
 
+class AmountType(click.ParamType):
+    """Positive amount of money, i.e. `1000`, `1 000,50` or `1000.50 PLN`."""
+
+    name = "amount"
+
+    def __init__(self, currency=DEFAULT_CURRENCY):
+        self.currency = currency
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, Money):
+            return value
+        text = value.strip()
+        if not text.endswith(self.currency):
+            text += self.currency
+        try:
+            money = parse_polish_amount(text, self.currency)
+        except RuntimeError:
+            self.fail(f"{value!r} is not an amount in {self.currency}", param, ctx)
+        if money.grosze <= 0:
+            self.fail(f"{value!r} is not a positive amount", param, ctx)
+        return money
+
+
+class DecimalType(click.ParamType):
+    """Finite decimal number, i.e. `3.5`, `3,5` or `-0.5`."""
+
+    name = "decimal"
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, Decimal):
+            number = value
+        else:
+            try:
+                number = Decimal(value.strip().replace(",", "."))
+            except InvalidOperation:
+                self.fail(f"{value!r} is not a number", param, ctx)
+        if not number.is_finite():
+            self.fail(f"{value!r} is not a finite number", param, ctx)
+        return number
+
+
+def warn_skipped(bonds):
+    """Warns about the bonds (or offers) left out, their terms aren't known yet."""
+    for bond in bonds:
+        click.echo(f"Skipped {bond.emisja}: unknown bond type", err=True)
+
+
+def known_offers(offers):
+    """Offers of a known bond type, warning about the others."""
+    warn_skipped(offer for offer in offers if not known_series(offer.emisja))
+    return [offer for offer in offers if known_series(offer.emisja)]
+
+
 def tabulate_bonds(bonds, expand):
     rows = []
     for bond in bonds:
@@ -43,8 +113,8 @@ def tabulate_bonds(bonds, expand):
 
     razem = sum([bond.dostepnych for bond in bonds])
     zablokowanych = sum([bond.zablokowanych for bond in bonds])
-    nominalna = sum([bond.nominalna.amount for bond in bonds])
-    aktualna = sum([bond.aktualna.amount for bond in bonds])
+    nominalna = sum_money(bond.nominalna for bond in bonds)
+    aktualna = sum_money(bond.aktualna for bond in bonds)
 
     rows.append(
         OrderedDict(
@@ -52,8 +122,8 @@ def tabulate_bonds(bonds, expand):
                 ("emisja", "Razem"),
                 ("dostepnych", razem),
                 ("zablokowanych", zablokowanych),
-                ("nominalna", f"{nominalna} {DEFAULT_CURRENCY}"),
-                ("aktualna", f"{aktualna} {DEFAULT_CURRENCY}"),
+                ("nominalna", display_money(nominalna)),
+                ("aktualna", display_money(aktualna)),
                 ("okres", ""),
                 ("oprocentowanie", ""),
                 ("data_wykupu", ""),
@@ -77,6 +147,38 @@ def tabulate_bonds(bonds, expand):
     return tabulate(rows, headers, tablefmt="fancy_grid")
 
 
+def tabulate_rollup(rollup, group_by, where):
+    rows = []
+    groups = list(rollup.query(group_by, **where).items())
+    if group_by:
+        groups.append((("Razem",) + ("",) * (len(group_by) - 1), rollup.total(**where)))
+    for key, aggregate in groups:
+        rows.append(
+            ["-" if value is None else value for value in key]
+            + [
+                aggregate.lots,
+                aggregate.dostepnych,
+                aggregate.zablokowanych,
+                display_money(rollup.money(aggregate.nominalna)),
+                display_money(rollup.money(aggregate.aktualna)),
+                display_money(rollup.money(aggregate.odsetki)),
+            ]
+        )
+    return tabulate(
+        rows,
+        [
+            *group_by,
+            "Pozycji",
+            "Dostępnych",
+            "Zablokowanych",
+            "Wartość",
+            "Aktualna",
+            "Odsetki",
+        ],
+        tablefmt="fancy_grid",
+    )
+
+
 def tabulate_available_bonds(available_bonds):
     available_bonds = [
         [
@@ -108,6 +210,77 @@ HISTORY_COLUMNS = (
 )
 
 
+def tabulate_outcomes(outcomes):
+    rows = []
+    for outcome in outcomes:
+        low, median, high = outcome.percentiles() / 100
+        rows.append(
+            [
+                outcome.emisja,
+                outcome.series.months,
+                f"{low:.02f}",
+                f"{median:.02f}",
+                f"{high:.02f}",
+                f"{outcome.annualized().mean() * 100:.02f}%",
+            ]
+        )
+    return tabulate(
+        rows,
+        ["Emisja", "Długość (mc)", "P5", "P50", "P95", "Średnio rocznie"],
+        tablefmt="fancy_grid",
+    )
+
+
+def tabulate_cash_flows(flows):
+    rows = [
+        [
+            flow.day,
+            flow.emisja,
+            flow.kind,
+            display_money(flow.amount) + (" *" if flow.estimated else ""),
+        ]
+        for flow in flows
+    ]
+    return tabulate(rows, ["Data", "Emisja", "Rodzaj", "Kwota"], tablefmt="fancy_grid")
+
+
+def tabulate_redemption_costs(costs):
+    rows = []
+    cumulative = 0
+    for lot in costs.order():
+        bond = costs.bonds[lot]
+        cumulative += int(costs.net[0, lot])
+        amounts = [
+            costs.value[0, lot],
+            costs.fee[0, lot],
+            costs.tax[0, lot],
+            costs.net[0, lot],
+            cumulative,
+            costs.forgone[0, lot],
+        ]
+        rows.append(
+            [bond.emisja, bond.dostepnych + bond.zablokowanych]
+            + [
+                display_money(Money.from_grosze(int(grosze), bond.nominalna.currency))
+                for grosze in amounts
+            ]
+        )
+    return tabulate(
+        rows,
+        [
+            "Emisja",
+            "Liczba",
+            "Wartość",
+            "Opłata",
+            "Podatek",
+            "Netto",
+            "Narastająco",
+            "Utracone odsetki",
+        ],
+        tablefmt="fancy_grid",
+    )
+
+
 def tabulate_history(history):
     rows = []
     for item in history:
@@ -174,18 +347,130 @@ def logout():
 
 @cli.command()
 @click.option("--expand", is_flag=True, default=True)
-def portfolio(expand):
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    default=None,
+    help="List only the first N bonds, remaining pages are not fetched.",
+)
+@click.option(
+    "--pipelined",
+    is_flag=True,
+    default=False,
+    help="Request the next page while the current one is being parsed.",
+)
+@click.option(
+    "--per-page",
+    type=click.IntRange(min=1),
+    default=PORTFOLIO_PAGE_SIZE,
+    help="Number of bonds requested with each page.",
+)
+@click.option(
+    "--adaptive",
+    is_flag=True,
+    default=False,
+    help="Request large pages first, fall back to smaller ones if the server rejects them.",
+)
+@click.option(
+    "--group-by",
+    type=click.Choice(DIMENSIONS),
+    multiple=True,
+    help="Show totals by these dimensions instead of every bond.",
+)
+@click.option(
+    "--filter",
+    "conditions",
+    multiple=True,
+    help="Totals of matching bonds only, i.e. --filter typ=EDO --filter wykup=2030.",
+)
+def portfolio(expand, limit, pipelined, per_page, adaptive, group_by, conditions):
     """List all bonds in your portfolio."""
     client = ObligacjeSkarbowe()
     client.restore_session()
     try:
-        bonds = client.list_portfolio()
+        bonds = client.iter_portfolio(
+            pipelined=pipelined, per_page=per_page, adaptive=adaptive
+        )
+        bonds = list(itertools.islice(bonds, limit))
+        if group_by or conditions:
+            try:
+                where = dict(parse_condition(condition) for condition in conditions)
+            except ValueError as error:
+                raise click.BadParameter(str(error), param_hint="--filter")
+            rollup = Rollup.from_bonds(bonds)
+            warn_skipped(rollup.skipped)
+            click.echo("Obligacje:")
+            click.echo(tabulate_rollup(rollup, group_by, where))
+            return
         click.echo("Obligacje:")
         click.echo(tabulate_bonds(bonds, expand))
     finally:
         client.persist_session()
 
 
+@cli.command(name="calendar")
+@click.option("--from-date", type=click.DateTime(["%Y-%m-%d"]), default=datetime.now())
+@click.option(
+    "--to-date",
+    type=click.DateTime(["%Y-%m-%d"]),
+    default=datetime.now() + relativedelta(years=1),
+)
+@click.option(
+    "--next",
+    "limit",
+    type=int,
+    default=None,
+    help="Show the next N cash flows after --from-date instead.",
+)
+@click.option(
+    "--monthly", is_flag=True, default=False, help="Sum the cash flows of every month."
+)
+def cash_flow_calendar(from_date, to_date, limit, monthly):
+    """Interest payments and maturities of the bonds in your portfolio."""
+    client = ObligacjeSkarbowe()
+    client.restore_session()
+    try:
+        calendar = CashFlowCalendar.from_portfolios({None: client.list_portfolio()})
+    finally:
+        client.persist_session()
+    warn_skipped(calendar.skipped)
+    from_date, to_date = from_date.date(), to_date.date()
+    if monthly:
+        click.echo(
+            tabulate(
+                [
+                    [month.strftime("%Y-%m"), display_money(total)]
+                    for month, total in calendar.monthly(from_date, to_date)
+                ],
+                ["Miesiąc", "Kwota"],
+                tablefmt="fancy_grid",
+            )
+        )
+        return
+    if limit is not None:
+        flows = calendar.upcoming(from_date, limit)
+    else:
+        flows = calendar.between(from_date, to_date)
+    click.echo(tabulate_cash_flows(flows))
+    if any(flow.estimated for flow in flows):
+        click.echo("* Szacunkowo, przy założeniu ostatniego znanego oprocentowania")
+
+
+@cli.command()
+@click.option("--on", type=click.DateTime(["%Y-%m-%d"]), default=datetime.now())
+def redemption(on):
+    """Costs of redeeming your bonds early, cheapest lots first."""
+    client = ObligacjeSkarbowe()
+    client.restore_session()
+    try:
+        costs = redemption_costs(client.list_portfolio(), on.date())
+    finally:
+        client.persist_session()
+    warn_skipped(costs.skipped)
+    click.echo(f"Przedterminowy wykup na dzień {on.date()}:")
+    click.echo(tabulate_redemption_costs(costs))
+
+
 @cli.command()
 def bonds():
     """List all currently available bonds."""
@@ -205,6 +490,175 @@ def bonds():
         client.persist_session()
 
 
+@cli.command(name="simulate")
+@click.option(
+    "--cpi", required=True, type=float, help="Last published annual CPI, in percent."
+)
+@click.option("--cpi-mean", type=float, default=2.5, show_default=True)
+@click.option("--persistence", type=float, default=0.97, show_default=True)
+@click.option("--volatility", type=float, default=0.35, show_default=True)
+@click.option("--paths", type=int, default=100_000, show_default=True)
+@click.option("--seed", type=int, default=None)
+@click.option("--workers", type=int, default=None, help="Size of the process pool.")
+def simulate_bonds(cpi, cpi_mean, persistence, volatility, paths, seed, workers):
+    """Simulates the value at maturity of 100 PLN in every currently available bond."""
+    client = ObligacjeSkarbowe()
+    client.restore_session()
+    try:
+        available_bonds = client.list_bonds()
+    finally:
+        client.persist_session()
+    model = CpiModel(
+        current=cpi, mean=cpi_mean, persistence=persistence, volatility=volatility
+    )
+    outcomes = simulate(
+        known_offers(available_bonds.emisje),
+        model,
+        paths=paths,
+        seed=seed,
+        workers=workers,
+    )
+    click.echo(f"Wartość na koniec okresu, przed podatkiem ({paths} scenariuszy):")
+    click.echo(tabulate_outcomes(outcomes))
+
+
+@cli.command()
+@click.option(
+    "--budget", required=True, type=AmountType(), help="Amount to invest, in PLN."
+)
+@click.option(
+    "--horizon", required=True, type=int, help="Months until the money is needed back."
+)
+@click.option(
+    "--cpi",
+    type=DecimalType(),
+    default=None,
+    help="Expected annual CPI, in percent, negative for deflation.",
+)
+@click.option(
+    "--liquid",
+    type=AmountType(),
+    default=None,
+    help="Minimum amount in bonds maturing within --liquid-months.",
+)
+@click.option("--liquid-months", type=int, default=12, show_default=True)
+@click.option(
+    "--max-per-offer",
+    type=int,
+    default=None,
+    help="Maximum number of bonds of a single offer.",
+)
+@click.option(
+    "--config",
+    type=click.Path(exists=True),
+    default=None,
+    help="800+ configuration, allows buying ROS/ROD up to the limit, see verify-800plus.",
+)
+def optimize(budget, horizon, cpi, liquid, liquid_months, max_per_offer, config):
+    """Splits a budget between the currently available bonds."""
+    client = ObligacjeSkarbowe()
+    client.restore_session()
+    try:
+        available_bonds = client.list_bonds()
+    finally:
+        client.persist_session()
+
+    family_limit = 0
+    if config is not None:
+        with open(config, "rb") as f:
+            total_compensation = calculate_total_compensation(tomllib.load(f))
+        family_limit = max(
+            0,
+            int(
+                calculate_available_bonds(
+                    total_compensation,
+                    available_bonds.wartosc_nominalna_800plus.amount,
+                )
+            ),
+        )
+
+    plan = optimize_allocation(
+        known_offers(available_bonds.emisje),
+        budget,
+        horizon,
+        cpi=cpi,
+        family_limit=family_limit,
+        liquid_amount=liquid,
+        liquid_months=liquid_months,
+        max_per_offer=max_per_offer,
+    )
+    click.echo(
+        tabulate(
+            [
+                [allocation.emisja, allocation.count, display_money(allocation.gain)]
+                for allocation in plan.allocations
+            ],
+            ["Emisja", "Liczba", f"Zysk netto po {horizon} mc"],
+            tablefmt="fancy_grid",
+        )
+    )
+    click.echo(f"Zainwestowane: {display_money(plan.invested)}")
+    click.echo(f"Pozostaje: {display_money(plan.cash)}")
+    click.echo(f"Zysk netto: {display_money(plan.gain)}")
+
+
+@cli.command()
+@click.option("--monthly", required=True, type=int, help="Bonds bought every month.")
+@click.option(
+    "--months",
+    type=int,
+    default=18 * 12,
+    show_default=True,
+    help="Months of purchases to plan.",
+)
+@click.option(
+    "--symbol",
+    "symbols",
+    multiple=True,
+    help="Bond types to buy i.e. --symbol ROS --symbol ROD, all available ones by default.",
+)
+@click.option(
+    "--show",
+    type=int,
+    default=12,
+    show_default=True,
+    help="Months of the plan to show.",
+)
+def ladder(monthly, months, symbols, show):
+    """Plans monthly purchases so your bonds mature evenly, month after month."""
+    client = ObligacjeSkarbowe()
+    client.restore_session()
+    try:
+        portfolio = client.list_portfolio()
+        offers = [
+            offer
+            for offer in client.list_bonds().emisje
+            if not symbols or offer.emisja.startswith(symbols)
+        ]
+    finally:
+        client.persist_session()
+
+    start = datetime.now().date().replace(day=1)
+    planner = LadderPlanner(portfolio, offers, start, months, monthly)
+    shown = start + relativedelta(months=show)
+    click.echo(
+        tabulate(
+            [
+                [
+                    purchase.month.strftime("%Y-%m"),
+                    purchase.symbol,
+                    purchase.count,
+                    purchase.maturity.strftime("%Y-%m"),
+                ]
+                for purchase in planner.purchases()
+                if purchase.month < shown
+            ],
+            ["Miesiąc", "Symbol", "Liczba", "Wykup"],
+            tablefmt="fancy_grid",
+        )
+    )
+
+
 @cli.command()
 @click.option("--symbol", required=True)
 @click.option("--amount", required=True, type=int)
@@ -327,47 +781,110 @@ def verify_800plus(dry_run, config):
 @cli.command()
 @click.argument("name")
 @click.option("--path", type=click.Path(exists=True), default=".")
-def download_pdf(name, path):
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    show_default=True,
+    help=f"Revalidate the pages of obligacjeskarbowe.pl cached in {CACHE_DIRECTORY}",
+)
+def download_pdf(name, path, cache):
     """Download a PDF file for a given bond name."""
-    client = ObligacjeSkarbowe()
+    client = ObligacjeSkarbowe(cache=HttpCache() if cache else None)
     filename = f"{path}/{name.upper()}.pdf"
     if os.path.exists(filename):
         click.echo(f"File {filename} already exists, skipping...")
     else:
         click.echo(f"Downloading {name} to {filename}")
         name_tokens = name.split()
-        output = client.download_pdf(name_tokens[0])
-        with open(filename, "wb") as out:
-            shutil.copyfileobj(output, out)
+        client.save_pdf(name_tokens[0], filename)
 
 
 @cli.command()
 @click.option("--path", type=click.Path(exists=True), default=".")
-def download_archive(path):
-    """Download all available PDFs from the bonds archive."""
-    client = ObligacjeSkarbowe()
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_WORKERS,
+    show_default=True,
+    help="Letters downloaded at the same time",
+)
+@click.option(
+    "--per-host",
+    type=click.IntRange(min=1),
+    default=DEFAULT_PER_HOST,
+    show_default=True,
+    help="Connections allowed in use to a single host",
+)
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    show_default=True,
+    help=f"Revalidate the pages of obligacjeskarbowe.pl cached in {CACHE_DIRECTORY}",
+)
+@click.option(
+    "--verify",
+    is_flag=True,
+    help="Compare the hash of every PDF with the manifest, not only its size",
+)
+def download_archive(path, workers, per_host, cache, verify):
+    """Download new or changed PDFs from the bonds archive, see `Manifest`."""
+    cache = HttpCache() if cache else None
+    client = ObligacjeSkarbowe(cache=cache, per_host=per_host)
 
-    queue = []
+    listing = []
 
     for bond_type, data in client.archive().items():
 
         click.echo(f"{bond_type}: {data["name"]}")
         for bond in data["bonds"]:
             click.echo(f"  {bond['name']}: {bond['url']}")
-            queue.append((bond["name"], bond["url"]))
-
-    with click.progressbar(queue, label="Downloading PDFs") as bar:
-        for name, url in bar:
-            filename = f"{path}/{name.upper()}.pdf"
-            if os.path.exists(filename):
-                click.echo(f"File {filename} already exists, skipping...")
-            else:
-                click.echo(f"Downloading {name} to {filename}")
-                bar.label = f"Downloading {name}"
-                name_tokens = name.split()
-                output = client.download_pdf(name_tokens[0])
-                with open(filename, "wb") as out:
-                    shutil.copyfileobj(output, out)
+            listing.append((bond["name"], bond["url"]))
+
+    with Manifest(path) as manifest:
+        changes = manifest.diff(listing, verify=verify)
+        click.echo(
+            f"{len(changes.current)} PDFs up to date ({len(changes.adopted)} found without a manifest entry), "
+            f"{len(changes.downloads)} to download"
+        )
+        queue = []
+        for reason, download in changes.downloads:
+            click.echo(f"Downloading {download.name} to {download.filename} ({reason})")
+            if reason == CHANGED:
+                # Bytes of an interrupted download of the previous letter
+                discard_part(download.filename)
+            queue.append(download)
+
+        with click.progressbar(length=len(queue), label="Downloading PDFs") as bar:
+
+            def progress(download, result):
+                bar.label = f"Downloaded {download.name}"
+                bar.update(1)
+                if isinstance(result, Transfer):
+                    manifest.record(download, result)
+
+            report = download_all(
+                client,
+                queue,
+                workers=workers,
+                progress=progress,
+            )
+
+    stats = report.stats
+    click.echo(
+        f"{stats.requests} requests over {stats.connections} connections ({stats.reused} reused)"
+    )
+    if cache is not None:
+        click.echo(f"{cache.revalidated} pages unchanged since cached")
+    failures = report.failures
+    for failure in failures:
+        click.echo(
+            f"Failed to download {failure.download.name}: {failure.error}", err=True
+        )
+    if failures:
+        click.echo(
+            f"Downloaded {len(queue) - len(failures)} of {len(queue)} PDFs", err=True
+        )
+        sys.exit(1)
 
 
 if __name__ == "__main__":
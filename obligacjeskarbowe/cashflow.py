@@ -0,0 +1,158 @@
+"""Calendar of the money coming back from a portfolio: interest paid out and bonds reaching maturity.
+
+Cash flows of any number of accounts are kept sorted by date, next to a running total of their amounts. Finding the
+cash flows between two dates, the next few of them, or the total of a month is then a binary search (`bisect`)
+instead of a scan of every bond.
+"""
+
+import itertools
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from obligacjeskarbowe.money import DEFAULT_CURRENCY, Money
+from obligacjeskarbowe.valuation import Valuation
+
+# Interest paid out at the end of a period (COI yearly, ROR and DOR monthly, OTS at maturity)
+INTEREST = "odsetki"
+# Value of the bonds paid back at maturity, including the capitalized interest of TOS, EDO, ROS and ROD
+REDEMPTION = "wykup"
+
+
+@dataclass(frozen=True, slots=True)
+class CashFlow:
+    day: date
+    emisja: str
+    # INTEREST or REDEMPTION
+    kind: str
+    amount: Money
+    account: str | None = None
+    # Depends on periods without a published rate yet, which are assumed to keep the last published rate
+    estimated: bool = False
+
+
+def cash_flows(bonds, account=None):
+    """Yields the cash flows of every lot of a portfolio, past ones included, in no particular order.
+
+    Lots of an unknown bond type are left out, see `Valuation.skipped`.
+
+    :param bonds: Iterable of `Bond` i.e. from `ObligacjeSkarbowe.list_portfolio`, or their `Valuation`
+    :param str account: Label of the account the bonds are held on
+    """
+    valuation = bonds if isinstance(bonds, Valuation) else Valuation(bonds)
+    for lot, bond in enumerate(valuation.bonds):
+        count = int(valuation.count[lot])
+        if not count:
+            continue
+        periods = int(valuation.periods[lot])
+        known = len(bond.okresy)
+        currency = bond.nominalna.currency
+        if valuation.capitalized[lot]:
+            redemption = valuation.start_values[lot, periods]
+        else:
+            redemption = valuation.start_values[lot, 0]
+            for period in range(periods):
+                yield CashFlow(
+                    day=date.fromordinal(int(valuation.boundaries[lot, period + 1])),
+                    emisja=bond.emisja,
+                    kind=INTEREST,
+                    amount=Money.from_grosze(
+                        int(valuation.interest[lot, period]) * count, currency
+                    ),
+                    account=account,
+                    estimated=period >= known,
+                )
+        yield CashFlow(
+            day=bond.data_wykupu,
+            emisja=bond.emisja,
+            kind=REDEMPTION,
+            amount=Money.from_grosze(int(redemption) * count, currency),
+            account=account,
+            estimated=bool(valuation.capitalized[lot]) and periods > known,
+        )
+
+
+class CashFlowCalendar:
+    """Cash flows sorted by date, see the module docstring.
+
+    :param flows: Iterable of `CashFlow`
+    :param str currency: Currency of all the amounts
+    :param skipped: Lots of an unknown bond type, without cash flows
+    """
+
+    def __init__(self, flows, currency=DEFAULT_CURRENCY, skipped=()):
+        self.currency = currency
+        self.skipped = list(skipped)
+        self.flows = sorted(
+            flows, key=lambda flow: (flow.day, flow.account or "", flow.emisja)
+        )
+        for flow in self.flows:
+            if flow.amount.currency != currency:
+                raise ValueError(
+                    f"Expected {currency} but {flow.emisja} is in {flow.amount.currency}"
+                )
+        self.days = [flow.day for flow in self.flows]
+        # totals[i] is the sum of the first i cash flows, in grosze
+        self.totals = list(
+            itertools.accumulate((flow.amount.grosze for flow in self.flows), initial=0)
+        )
+
+    @classmethod
+    def from_portfolios(cls, portfolios, currency=DEFAULT_CURRENCY):
+        """Builds a calendar of many accounts.
+
+        :param portfolios: Dict of account label -> iterable of `Bond`
+        """
+        valuations = {
+            account: Valuation(bonds) for account, bonds in portfolios.items()
+        }
+        return cls(
+            itertools.chain.from_iterable(
+                cash_flows(valuation, account)
+                for account, valuation in valuations.items()
+            ),
+            currency,
+            skipped=[
+                bond for valuation in valuations.values() for bond in valuation.skipped
+            ],
+        )
+
+    def __len__(self):
+        return len(self.flows)
+
+    def __iter__(self):
+        return iter(self.flows)
+
+    def __span(self, start, end):
+        return bisect_left(self.days, start), bisect_right(self.days, end)
+
+    def between(self, start, end):
+        """Cash flows from start to end, both days included."""
+        lo, hi = self.__span(start, end)
+        return self.flows[lo:hi]
+
+    def upcoming(self, after, limit):
+        """First `limit` cash flows on or after a day."""
+        lo = bisect_left(self.days, after)
+        return self.flows[lo : lo + limit]
+
+    def total(self, start, end):
+        """Sum of the cash flows from start to end, both days included."""
+        lo, hi = self.__span(start, end)
+        return Money.from_grosze(self.totals[hi] - self.totals[lo], self.currency)
+
+    def monthly(self, start, end):
+        """Sums of the cash flows of every calendar month from the month of start to the month of end.
+
+        :returns: List of (first day of the month, `Money`)
+        """
+        month = start.replace(day=1)
+        buckets = []
+        while month <= end:
+            following = month + relativedelta(months=1)
+            last = min(following - timedelta(days=1), end)
+            buckets.append((month, self.total(max(month, start), last)))
+            month = following
+        return buckets
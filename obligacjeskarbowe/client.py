@@ -1,6 +1,8 @@
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 import io
+import itertools
 import logging
 import operator
 import os
@@ -9,28 +11,36 @@ import re
 import tempfile
 import time
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
 import requests
 from obligacjeskarbowe import two_factor
 
 from obligacjeskarbowe.parser import (
     Bonds,
     PartialResponse,
+    PartialResponseError,
     Redirect,
+    count_table_rows,
     extract_available_bonds,
     extract_bonds,
+    extract_bonds_fragment,
     extract_dane_dyspozycji,
     extract_data_przyjecia_zlecenia,
     extract_form_action_by_id,
     extract_javax_view_state,
     extract_purchase_step_title,
+    index_form_fields,
     emisje_parse_wartosc_nominalna_800plus,
     emisje_parse_saldo_srodkow_pienieznych,
     find_main_form,
+    JAVAX_VIEW_STATE_ID,
     parse_history,
+    parse_html,
     parse_login_info,
     parse_xml_response,
+    scan_partial_update,
 )
+from obligacjeskarbowe.pool import DEFAULT_POOL_MAXSIZE, pooled_session
+from obligacjeskarbowe.transfer import stream_to_file
 
 
 log = logging.getLogger()
@@ -41,6 +51,11 @@ SESSION_FILE = "obligacjeskarbowe.pickle"
 BASE_URL = "https://www.zakup.obligacjeskarbowe.pl"
 STAN_RACHUNKU_REGEX = re.compile(r"^stanRachunku:j_idt(\d+):j_id\d+$")
 
+# Number of rows the portfolio table is rendered with.
+PORTFOLIO_PAGE_SIZE = 20
+# Page sizes requested by the adaptive pagination, largest first.
+ADAPTIVE_PAGE_SIZES = (500, 200, 100, 50)
+
 
 def preconfigured_session():
     session = requests.Session()
@@ -62,8 +77,24 @@ def preconfigured_session():
 
 
 class ObligacjeSkarbowe:
-    def __init__(self):
+    def __init__(self, cache=None, per_host=None):
+        """
+        :param HttpCache cache: Cache of the public pages of obligacjeskarbowe.pl (archive, letters of issue)
+        :param int per_host: Connections allowed in use to a single public site, i.e. by the workers of
+            `download_all`, more requests wait for one of them. Not capped by default.
+        """
+        if per_host is not None and per_host < 1:
+            raise ValueError(
+                f"Expected at least one connection per host, got {per_host}"
+            )
         self.session = preconfigured_session()
+        # Keep-alive connections to the public sites (archive, letters of issue), shared by every download
+        self.public_session = pooled_session(
+            preconfigured_session(),
+            pool_maxsize=per_host or DEFAULT_POOL_MAXSIZE,
+            pool_block=per_host is not None,
+            cache=cache,
+        )
         self.available_bonds = []
         # A lookup table from readable bond name into the internal identifier.
         self.available_bonds_lookup = OrderedDict()
@@ -119,7 +150,7 @@ class ObligacjeSkarbowe:
         o = urlparse(r.url)
         if o.path == "/daneRachunku.html":
             print("Already logged in, skipping login")
-            bs = BeautifulSoup(r.content, features="html.parser")
+            bs = parse_html(r.content, profile="login_info")
             login_info = parse_login_info(bs)
             return login_info
 
@@ -133,7 +164,7 @@ class ObligacjeSkarbowe:
         r = self.session.post(BASE_URL + "/login", data=form)
         r.raise_for_status()
 
-        bs = BeautifulSoup(r.content, features="html.parser")
+        bs = parse_html(r.content, profile="navigation")
         prompt = bs.select('span[id="spanContent"]')[0].text.strip()
 
         print(f"Login prompt: {prompt!r}")
@@ -199,7 +230,7 @@ class ObligacjeSkarbowe:
                 data=data,
             )
             r.raise_for_status()
-            bs = BeautifulSoup(r.content, features="html.parser")
+            bs = parse_html(r.content)
 
         elif "Nie rozpoznaliśmy Twojego urządzenia." in prompt:
             token_stream = two_factor.wait_for_token(topic)
@@ -268,7 +299,7 @@ class ObligacjeSkarbowe:
         r = self.session.get(f"{BASE_URL}{path}")
         r.raise_for_status()
         self.ensure_session_exists(r)
-        bs = BeautifulSoup(r.content, features="html.parser")
+        bs = parse_html(r.content, profile="offers")
 
         available_bonds = extract_available_bonds(bs, path)
         self.next_url = extract_form_action_by_id(bs)
@@ -342,12 +373,28 @@ class ObligacjeSkarbowe:
             raise RuntimeError("Session expired, please login again")
 
     def list_portfolio(self):
-        all_portfolio = []
+        """Lists all bonds in the portfolio."""
+        return list(self.iter_portfolio())
+
+    def iter_portfolio(
+        self, pipelined=False, per_page=PORTFOLIO_PAGE_SIZE, adaptive=False
+    ):
+        """Iterates over bonds in the portfolio, fetching the pages as they're consumed.
+
+        Only the current page is held in memory, so the caller can start processing right away or stop early
+        without requesting the remaining pages.
+
+        :param bool pipelined: Request the next page while the current one is still being parsed on a worker
+            thread. Requests are still sent one at a time, each with the view state returned by the previous one.
+        :param int per_page: Number of rows requested with each page
+        :param bool adaptive: Start with larger pages (see `ADAPTIVE_PAGE_SIZES`), and fall back to the smaller
+            ones if the server rejects them. If the server caps the page size, the capped size is used from there on.
+        """
         r = self.session.get(f"{BASE_URL}/stanRachunku.html")
         r.raise_for_status()
         self.ensure_session_exists(r)
 
-        bs = BeautifulSoup(r.content, features="html.parser")
+        bs = parse_html(r.content, profile="portfolio")
 
         # Figure out "idt" number based on the <select> element of the form we're interested in to submit.
         # This seems to change from time to time, so we need to extract it dynamically.
@@ -362,14 +409,26 @@ class ObligacjeSkarbowe:
 
         self.view_state = extract_javax_view_state(bs)
 
-        first = 20
-        per_page = 20
+        if adaptive:
+            page_sizes = [size for size in ADAPTIVE_PAGE_SIZES if size > per_page]
+        else:
+            page_sizes = []
+        page_sizes.append(per_page)
 
         # Serves as a set of already known bonds to ensure there are no errors while peforming requests.
         bonds_already_known = set()
 
-        while True:
-            portfolio = extract_bonds(bs)
+        portfolio = extract_bonds(bs, r.content)
+        del bs
+
+        # Rows already displayed on the page we've just loaded.
+        first = len(portfolio)
+
+        pages = itertools.chain(
+            [portfolio],
+            self.__portfolio_pages(idt_number, first, page_sizes, pipelined),
+        )
+        for portfolio in pages:
             if not portfolio:
                 break
 
@@ -377,54 +436,132 @@ class ObligacjeSkarbowe:
             for bond in portfolio:
                 if bond.emisja in bonds_already_known:
                     raise RuntimeError(
-                        f"Duplicate bond found in portfolio: {bond.emisja!r} at {first} {per_page}"
+                        f"Duplicate bond found in portfolio: {bond.emisja!r} at {len(bonds_already_known)} {per_page}"
                     )
                 bonds_already_known.add(bond.emisja)
 
-            all_portfolio += portfolio
-            r = self.session.post(
-                f"{BASE_URL}/stanRachunku.html?execution={self.view_state}",
-                data={
-                    "javax.faces.partial.ajax": "true",
-                    "javax.faces.source": f"stanRachunku:j_idt{idt_number}",
-                    "javax.faces.partial.execute": f"stanRachunku:j_idt{idt_number}",
-                    "javax.faces.partial.render": f"stanRachunku:j_idt{idt_number}",
-                    f"stanRachunku:j_idt{idt_number}": f"stanRachunku:j_idt{idt_number}",
-                    f"stanRachunku:j_idt{idt_number}_pagination": "true",
-                    f"stanRachunku:j_idt{idt_number}_first": f"{first}",
-                    f"stanRachunku:j_idt{idt_number}_rows": f"{per_page}",
-                    f"stanRachunku:j_idt{idt_number}_skipChildren": "true",
-                    f"stanRachunku:j_idt{idt_number}_encodeFeature": "true",
-                    "stanRachunku": "stanRachunku",
-                    # "stanRachunku:j_idt171_rppDD": [
-                    #    "20",
-                    #    "20"
-                    # ] wtf?
-                    "javax.faces.ViewState": self.view_state,
-                },
-            )
-            r.raise_for_status()
-            self.ensure_session_exists(r)
+            yield from portfolio
+
+    def __portfolio_pages(self, idt_number, first, page_sizes, pipelined):
+        """Yields consecutive pages of the portfolio table starting at `first`.
+
+        :param list page_sizes: Page sizes to try, largest first
+        """
+        # Rows of the previous page, a short one is only a cap of the server if more rows follow
+        received = None
+        if not pipelined:
+            while (
+                rows := self.__next_portfolio_page(
+                    idt_number, first, page_sizes, previous=received
+                )
+            ) is not None:
+                yield extract_bonds_fragment(rows)
+                received = count_table_rows(rows)
+                first += received
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="portfolio"
+        ) as executor:
+            pending = None
+            while True:
+                # The next page is already requested while the worker parses the previous one.
+                rows = self.__next_portfolio_page(
+                    idt_number, first, page_sizes, scan=True, previous=received
+                )
+                if pending is not None:
+                    yield pending.result()
+                if rows is None:
+                    return
+                pending = executor.submit(extract_bonds_fragment, rows)
+                received = count_table_rows(rows)
+                first += received
+
+    def __next_portfolio_page(
+        self, idt_number, first, page_sizes, scan=False, previous=None
+    ):
+        """Requests a page of the portfolio table with the largest page size the server accepts.
+
+        Rejected sizes are removed from `page_sizes`. When the previous page was short and this one still has rows,
+        the server caps the page size, and the capped size replaces the larger ones.
+
+        :param int previous: Rows of the previous page, None for the first one
+        """
+        while True:
+            per_page = page_sizes[0]
+            try:
+                rows = self.__portfolio_page(idt_number, first, per_page, scan=scan)
+            except (requests.exceptions.HTTPError, PartialResponseError) as e:
+                if len(page_sizes) == 1:
+                    raise
+                log.warning(f"Page size {per_page} rejected ({e}), trying smaller one")
+                del page_sizes[0]
+                continue
+
+            # The last page is short because the table ends there, not because of a cap
+            if (
+                rows is not None
+                and previous is not None
+                and previous < per_page
+                and len(page_sizes) > 1
+            ):
+                log.info(f"Page size {per_page} capped to {previous}")
+                page_sizes[:] = [previous] + [
+                    size for size in page_sizes if size < previous
+                ]
+            return rows
+
+    def __portfolio_page(self, idt_number, first, per_page, scan=False):
+        """Requests a single page of the portfolio table.
+
+        Updates the view state, so the next page can be requested right after this returns.
+
+        :param bool scan: Look up the updates with a cheap scan of the response instead of parsing it
+        :return: Rows of the requested page, or None if there are no more pages
+        """
+        table_id = f"stanRachunku:j_idt{idt_number}"
+        r = self.session.post(
+            f"{BASE_URL}/stanRachunku.html?execution={self.view_state}",
+            data={
+                "javax.faces.partial.ajax": "true",
+                "javax.faces.source": table_id,
+                "javax.faces.partial.execute": table_id,
+                "javax.faces.partial.render": table_id,
+                table_id: table_id,
+                f"{table_id}_pagination": "true",
+                f"{table_id}_first": f"{first}",
+                f"{table_id}_rows": f"{per_page}",
+                f"{table_id}_skipChildren": "true",
+                f"{table_id}_encodeFeature": "true",
+                "stanRachunku": "stanRachunku",
+                # "stanRachunku:j_idt171_rppDD": [
+                #    "20",
+                #    "20"
+                # ] wtf?
+                "javax.faces.ViewState": self.view_state,
+            },
+        )
+        r.raise_for_status()
+        self.ensure_session_exists(r)
+
+        rows = None
+        if scan:
+            rows = scan_partial_update(r.content, table_id)
+            view_state = scan_partial_update(r.content, JAVAX_VIEW_STATE_ID)
+            if rows is not None and view_state is not None:
+                self.view_state = view_state
+            else:
+                # Anything unusual (i.e. redirect) is handled below.
+                rows = None
 
+        if rows is None:
             events = parse_xml_response(r.content)
             for event in events:
                 if isinstance(event, (PartialResponse,)):
                     for key, value in event.updates.items():
-                        if key == f"stanRachunku:j_idt{idt_number}":
-                            if value == " ":
-                                print(f"Done {first} {per_page}")
-                                return all_portfolio
-                            else:
-                                element = bs.find(
-                                    "tbody", id=f"stanRachunku:j_idt{idt_number}_data"
-                                )
-                                element.replace_with(
-                                    BeautifulSoup(
-                                        f'<tbody id="stanRachunku:j_idt{idt_number}_data">{value}</tbody>',
-                                        features="html.parser",
-                                    )
-                                )
-                        elif key == "j_id1:javax.faces.ViewState:0":
+                        if key == table_id:
+                            rows = value
+                        elif key == JAVAX_VIEW_STATE_ID:
                             self.view_state = value
                         else:
                             raise RuntimeError(
@@ -432,9 +569,11 @@ class ObligacjeSkarbowe:
                             )
                 else:
                     raise RuntimeError(f"Unexpected event {event!r} in portfolio list")
-            first += 20
 
-        return all_portfolio
+        if rows is None or rows == " ":
+            print(f"Done {first} {per_page}")
+            return None
+        return rows
 
     def purchase(self, emisja, amount, force):
         """Purchase a bond.
@@ -502,7 +641,8 @@ class ObligacjeSkarbowe:
 
         title = extract_purchase_step_title(bs)
         log.info(f"Krok 3: {title}...")
-        data_przyjecia = extract_data_przyjecia_zlecenia(bs)
+        fields = index_form_fields(bs)
+        data_przyjecia = extract_data_przyjecia_zlecenia(bs, fields)
         log.info(f"Data i czas przyjęcia zlecenia: {data_przyjecia}")
 
     def purchase_step_2(self, amount):
@@ -518,6 +658,10 @@ class ObligacjeSkarbowe:
         self.next_url = extract_form_action_by_id(bs)
         title = extract_purchase_step_title(bs)
         log.info(f"Krok 2: {title}...")
+        # Indexing the fields walks the whole page, only worth it when the fields are logged
+        if log.isEnabledFor(logging.DEBUG):
+            for label, value in index_form_fields(bs).items():
+                log.debug(f"{label} {value}")
 
     def purchase_step_1(self, emisja):
         available_bond = self.available_bonds_lookup[emisja]
@@ -529,18 +673,18 @@ class ObligacjeSkarbowe:
         wybierz = available_bond.wybierz
         bs = self.__javax_post(s=wybierz["s"], u=wybierz["u"])
 
-        title = extract_purchase_step_title(bs)
         self.next_url = extract_form_action_by_id(bs)
         title = extract_purchase_step_title(bs)
         print(f"Krok 1: {title}...")
-        return extract_dane_dyspozycji(bs)
+        fields = index_form_fields(bs)
+        return extract_dane_dyspozycji(bs, fields)
 
     def history(self, from_date, to_date):
         """Retrieves a history of dispositions on your account."""
         r = self.session.get(BASE_URL + "/historiaDyspozycji.html")
         r.raise_for_status()
         self.ensure_session_exists(r)
-        bs = BeautifulSoup(r.content, features="html.parser")
+        bs = parse_html(r.content, profile="navigation")
         self.next_url = extract_form_action_by_id(bs)
         self.view_state = extract_javax_view_state(bs)
 
@@ -565,8 +709,9 @@ class ObligacjeSkarbowe:
         r = self.session.get(BASE_URL + "/logout")
         r.raise_for_status()
 
-    def download_pdf_from_mf(self, bond_name):
-        r = self.session.get(
+    def __issue_letter_url_from_mf(self, bond_name, session):
+        """URL and query parameters of a letter of issue on finanse.mf.gov.pl."""
+        r = session.get(
             "https://www.finanse.mf.gov.pl/dlug-publiczny/bony-i-obligacje-hurtowe/wyszukiwarka-listow-emisyjnych"
         )
         r.raise_for_status()
@@ -589,10 +734,10 @@ class ObligacjeSkarbowe:
             raise ValueError(f"bond_name {bond_name!r} does not match expected format")
 
         data = f"GET_ISSUES\n{prefix}\n{prefix}{numeric_part:04d}\n\n"
-        print(
+        log.info(
             f"Getting PDF for obsolete bond {bond_name} from finanse.mf.gov.pl: {data!r}"
         )
-        r = self.session.post(
+        r = session.post(
             "https://www.finanse.mf.gov.pl/dlug-publiczny/bony-i-obligacje-hurtowe/wyszukiwarka-listow-emisyjnych",
             params=params,
             headers={
@@ -636,56 +781,102 @@ class ObligacjeSkarbowe:
             "fileName": url,  # the pdf file name is provided in the "url" variable
             "time": str(int(time.time() * 1000)),
         }
-        pdf_response = self.session.get(
+        log.info(f"Getting PDF for obsolete bond {bond_name} from finanse.mf.gov.pl")
+        return (
             "https://www.finanse.mf.gov.pl/dlug-publiczny/bony-i-obligacje-hurtowe/wyszukiwarka-listow-emisyjnych",
-            params=params,
+            params,
         )
-        pdf_response.raise_for_status()
-        print(f"Getting PDF for obsolete bond {bond_name} from finanse.mf.gov.pl")
-        return io.BytesIO(pdf_response.content)
-
-    def download_pdf(self, bond_name):
-        """Downloads a bond letter of issue by name.
 
-        :param str bond_name: Name of the bond
-        :param str path: Path to save the bond
-        """
-        session = preconfigured_session()
+    def __issue_letter_url(self, bond_name, session):
+        """URL of a letter of issue on obligacjeskarbowe.pl, None when it isn't listed there."""
         params = {"id": bond_name.lower()}
         r = session.get(
             "https://www.obligacjeskarbowe.pl/listy-emisyjne/", params=params
         )
-        try:
-            r.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                print(
-                    f"Bond letter of issuance for {bond_name} not found in obligacjeskarbowe.pl"
-                )
-                return self.download_pdf_from_mf(bond_name)
-            else:
-                raise
-        soup = BeautifulSoup(r.content, "html.parser")
+        if r.status_code == 404:
+            log.info(
+                f"Bond letter of issuance for {bond_name} not found in obligacjeskarbowe.pl"
+            )
+            return None
+        r.raise_for_status()
+        soup = parse_html(r.content, profile="issue_letter")
         a_tag = soup.find("a", class_="files__item issue-letter__file")
-        try:
-            if a_tag:
-                pdf_url = a_tag.get("href")
-                if not pdf_url.startswith("http"):
-                    pdf_url = "https://www.obligacjeskarbowe.pl" + pdf_url
-                pdf_response = session.get(pdf_url)
-                pdf_response.raise_for_status()
-                return io.BytesIO(pdf_response.content)
-            else:
-                raise RuntimeError(
-                    f"Bond letter of issuance for {bond_name} not found in obligacjeskarbowe.pl"
-                )
-        except (RuntimeError, requests.exceptions.HTTPError) as e:
-            print(f"Error downloading PDF for {bond_name}: {e}")
-            return self.download_pdf_from_mf(bond_name)
+        if not a_tag:
+            log.warning(
+                f"Bond letter of issuance for {bond_name} not found in obligacjeskarbowe.pl"
+            )
+            return None
+        pdf_url = a_tag.get("href")
+        if not pdf_url.startswith("http"):
+            pdf_url = "https://www.obligacjeskarbowe.pl" + pdf_url
+        return pdf_url
+
+    def __fetch_issue_letter(self, bond_name, session, fetch):
+        """Fetches a letter of issue from obligacjeskarbowe.pl, or from finanse.mf.gov.pl as a backup.
+
+        :param fetch: Called with the URL, its query parameters and whether an interrupted transfer of the same
+            file may be resumed
+        """
+        pdf_url = self.__issue_letter_url(bond_name, session)
+        if pdf_url is not None:
+            try:
+                return fetch(pdf_url, None, True)
+            except requests.exceptions.HTTPError as e:
+                log.warning(f"Error downloading PDF for {bond_name}: {e}")
+        url, params = self.__issue_letter_url_from_mf(bond_name, session)
+        # Bytes of an interrupted transfer might come from obligacjeskarbowe.pl
+        return fetch(url, params, False)
+
+    def download_pdf_from_mf(self, bond_name, session=None):
+        """Downloads a letter of issue of a bond no longer listed on obligacjeskarbowe.pl.
+
+        :param str bond_name: Name of the bond
+        :param session: Session to download with, `public_session` by default
+        :returns: `io.BytesIO` with the PDF
+        """
+        session = session or self.public_session
+        url, params = self.__issue_letter_url_from_mf(bond_name, session)
+        pdf_response = session.get(url, params=params)
+        pdf_response.raise_for_status()
+        return io.BytesIO(pdf_response.content)
+
+    def download_pdf(self, bond_name, session=None):
+        """Downloads a bond letter of issue by name into memory, see `save_pdf` to write it to a file.
+
+        :param str bond_name: Name of the bond
+        :param session: Session to download with, `public_session` by default
+        :returns: `io.BytesIO` with the PDF
+        """
+        session = session or self.public_session
+
+        def fetch(url, params, resume):
+            pdf_response = session.get(url, params=params)
+            pdf_response.raise_for_status()
+            return io.BytesIO(pdf_response.content)
+
+        return self.__fetch_issue_letter(bond_name, session, fetch)
+
+    def save_pdf(self, bond_name, filename, session=None):
+        """Downloads a bond letter of issue by name straight into a file, see `stream_to_file`.
+
+        An interrupted download leaves a `.part` file next to `filename`, the next call resumes it unless the letter
+        changed since.
+
+        :param str bond_name: Name of the bond
+        :param str filename: Path to save the bond
+        :param session: Session to download with, `public_session` by default
+        :returns: `Transfer` with the size and the SHA-256 of the file
+        """
+        session = session or self.public_session
+
+        def fetch(url, params, resume):
+            return stream_to_file(session, url, filename, params=params, resume=resume)
+
+        return self.__fetch_issue_letter(bond_name, session, fetch)
 
     def archive(self):
         """List of all bonds in the archive."""
-        response = self.session.get(
+        response = self.public_session.get(
             "https://www.obligacjeskarbowe.pl/archiwum-listow-emisyjnych/"
         )
         response.raise_for_status()
@@ -696,7 +887,7 @@ class ObligacjeSkarbowe:
             "sp": "Obligacje 5-letnie SP",
         }
 
-        bs = BeautifulSoup(response.content, features="html.parser")
+        bs = parse_html(response.content, profile="archive")
         select_element = bs.find("select", id="id_type_bonds")
         if not select_element:
             raise RuntimeError('Select element with id "id_type_bonds" not found.')
@@ -789,14 +980,14 @@ class ObligacjeSkarbowe:
                 r.raise_for_status()
                 self.ensure_session_exists(r)
 
-                bs = BeautifulSoup(r.content, features="html.parser")
+                bs = parse_html(r.content)
                 self.view_state = extract_javax_view_state(bs)
                 return bs
 
             elif isinstance(event, (PartialResponse,)):
                 new_view_state = None
                 for key, value in event.updates.items():
-                    if key == "j_id1:javax.faces.ViewState:0":
+                    if key == JAVAX_VIEW_STATE_ID:
                         new_view_state = value
                     elif key == "j_idt100":
                         continue
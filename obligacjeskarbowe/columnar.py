@@ -0,0 +1,237 @@
+"""Column oriented containers for large numbers of bonds and dispositions.
+
+A `Bond` with its `Money` and `InterestPeriod` objects costs around a kilobyte, most of it spent on object headers
+and `Decimal`s. The tables below keep every field in a typed `array` instead (amounts in grosze, dates as ordinals,
+rates in ten-thousandths of a percent) and build the objects back only when a row is accessed.
+"""
+
+from array import array
+from datetime import date
+from decimal import Decimal
+
+from obligacjeskarbowe.parser import (
+    DEFAULT_CURRENCY,
+    Bond,
+    History,
+    InterestPeriod,
+    Money,
+)
+
+# Amounts are stored in grosze.
+AMOUNT_PLACES = 2
+# Interest rates are stored in 1/10000 of a percent, i.e. 6.8% -> 68000.
+RATE_PLACES = 4
+
+
+def to_fixed(value, places):
+    """Converts a `Decimal` into an integer number of 10**-places units, without losing precision."""
+    scaled = value.scaleb(places)
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"{value} has more than {places} decimal places")
+    return int(scaled)
+
+
+def from_fixed(value, places):
+    return Decimal(value).scaleb(-places)
+
+
+def from_fixed_rate(value):
+    rate = from_fixed(value, RATE_PLACES)
+    # 6.8000 -> 6.8, but 10.0000 -> 10 and not 1E+1
+    return (
+        rate.quantize(Decimal(1))
+        if rate == rate.to_integral_value()
+        else rate.normalize()
+    )
+
+
+class Categories:
+    """Stores a column of repeated strings as 1-byte codes, widened once there are more than 256 distinct values."""
+
+    __slots__ = ("values", "codes", "index")
+
+    def __init__(self):
+        self.values = []
+        self.codes = array("B")
+        self.index = {}
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+            if code == 256:
+                self.codes = array("I", self.codes)
+        self.codes.append(code)
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+
+class Table:
+    """Common sequence protocol of the tables, subclasses implement `append` and `row`."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_rows(cls, rows):
+        table = cls()
+        table.extend(rows)
+        return table
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("table index out of range")
+        return self.row(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+
+class PortfolioTable(Table):
+    """Bonds of a portfolio, see `Bond`.
+
+    Interest periods of all the bonds are flattened into a single column, `okresy_offsets[i]` is where the periods
+    of the i-th bond start.
+
+    :param str currency: Currency of all the amounts
+    """
+
+    __slots__ = (
+        "currency",
+        "emisja",
+        "dostepnych",
+        "zablokowanych",
+        "nominalna",
+        "aktualna",
+        "data_wykupu",
+        "okresy_offsets",
+        "okresy_numer",
+        "okresy_oprocentowanie",
+    )
+
+    def __init__(self, currency=DEFAULT_CURRENCY):
+        self.currency = currency
+        self.emisja = Categories()
+        self.dostepnych = array("I")
+        self.zablokowanych = array("I")
+        self.nominalna = array("q")
+        self.aktualna = array("q")
+        self.data_wykupu = array("i")
+        self.okresy_offsets = array("I", [0])
+        self.okresy_numer = array("H")
+        self.okresy_oprocentowanie = array("i")
+
+    def __len__(self):
+        return len(self.data_wykupu)
+
+    def append(self, bond):
+        for money in (bond.nominalna, bond.aktualna):
+            if money.currency != self.currency:
+                raise ValueError(
+                    f"Expected {self.currency} but {bond.emisja} is in {money.currency}"
+                )
+        # Convert everything first, so a bad value doesn't leave a half appended row behind.
+        oprocentowanie = [
+            to_fixed(okres.oprocentowanie, RATE_PLACES) for okres in bond.okresy
+        ]
+
+        self.emisja.append(bond.emisja)
+        self.dostepnych.append(bond.dostepnych)
+        self.zablokowanych.append(bond.zablokowanych)
+        self.nominalna.append(bond.nominalna.grosze)
+        self.aktualna.append(bond.aktualna.grosze)
+        self.data_wykupu.append(bond.data_wykupu.toordinal())
+        self.okresy_numer.extend(okres.okres for okres in bond.okresy)
+        self.okresy_oprocentowanie.extend(oprocentowanie)
+        self.okresy_offsets.append(len(self.okresy_numer))
+
+    def row(self, i):
+        start, end = self.okresy_offsets[i], self.okresy_offsets[i + 1]
+        return Bond(
+            emisja=self.emisja[i],
+            dostepnych=self.dostepnych[i],
+            zablokowanych=self.zablokowanych[i],
+            nominalna=Money.from_grosze(self.nominalna[i], self.currency),
+            aktualna=Money.from_grosze(self.aktualna[i], self.currency),
+            okresy=tuple(
+                InterestPeriod(
+                    okres=okres, oprocentowanie=from_fixed_rate(oprocentowanie)
+                )
+                for okres, oprocentowanie in zip(
+                    self.okresy_numer[start:end], self.okresy_oprocentowanie[start:end]
+                )
+            ),
+            data_wykupu=date.fromordinal(self.data_wykupu[i]),
+        )
+
+    def total_nominalna(self):
+        return Money.from_grosze(sum(self.nominalna), self.currency)
+
+    def total_aktualna(self):
+        return Money.from_grosze(sum(self.aktualna), self.currency)
+
+
+class HistoryTable(Table):
+    """Dispositions of an account, see `History`."""
+
+    __slots__ = (
+        "data_dyspozycji",
+        "rodzaj_dyspozycji",
+        "kod_obligacji",
+        "nr_zapisu",
+        "seria",
+        "liczba_obligacji",
+        "kwota_operacji",
+        "status",
+        "uwagi",
+    )
+
+    def __init__(self):
+        self.data_dyspozycji = array("i")
+        self.rodzaj_dyspozycji = Categories()
+        self.kod_obligacji = []
+        self.nr_zapisu = array("q")
+        self.seria = array("I")
+        self.liczba_obligacji = array("I")
+        self.kwota_operacji = array("q")
+        self.status = Categories()
+        self.uwagi = Categories()
+
+    def __len__(self):
+        return len(self.kod_obligacji)
+
+    def append(self, item):
+        kwota_operacji = to_fixed(item.kwota_operacji, AMOUNT_PLACES)
+
+        self.data_dyspozycji.append(item.data_dyspozycji.toordinal())
+        self.rodzaj_dyspozycji.append(item.rodzaj_dyspozycji)
+        self.kod_obligacji.append(item.kod_obligacji)
+        self.nr_zapisu.append(item.nr_zapisu)
+        self.seria.append(item.seria)
+        self.liczba_obligacji.append(item.liczba_obligacji)
+        self.kwota_operacji.append(kwota_operacji)
+        self.status.append(item.status)
+        self.uwagi.append(item.uwagi)
+
+    def row(self, i):
+        return History(
+            data_dyspozycji=date.fromordinal(self.data_dyspozycji[i]),
+            rodzaj_dyspozycji=self.rodzaj_dyspozycji[i],
+            kod_obligacji=self.kod_obligacji[i],
+            nr_zapisu=self.nr_zapisu[i],
+            seria=self.seria[i],
+            liczba_obligacji=self.liczba_obligacji[i],
+            kwota_operacji=from_fixed(self.kwota_operacji[i], AMOUNT_PLACES),
+            status=self.status[i],
+            uwagi=self.uwagi[i],
+        )
@@ -0,0 +1,82 @@
+"""Downloading many letters of issuance at once, i.e. the whole archive.
+
+Every letter takes a few round trips (the page of the letter, the PDF, sometimes finanse.mf.gov.pl), so the time
+of a serial download is spent waiting for the servers. Letters are downloaded by a pool of worker threads sharing
+the pooled public session of the client (see `obligacjeskarbowe.pool`), the same one the archive is listed with,
+which caps the connections in use to a single host. A failed letter is recorded and the others carry on.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from obligacjeskarbowe.pool import PoolStats, session_stats
+
+DEFAULT_WORKERS = 8
+# Connections in use to a single host, across all the workers, see `ObligacjeSkarbowe`
+DEFAULT_PER_HOST = 4
+
+
+@dataclass(frozen=True, slots=True)
+class Download:
+    # Name of the bond, i.e. EDO0134
+    name: str
+    filename: str
+    # URL of the letter listed in the archive
+    url: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Failure:
+    download: Download
+    error: Exception
+
+
+@dataclass(frozen=True, slots=True)
+class Report:
+    # In the order of the downloads
+    failures: list
+    stats: PoolStats
+
+
+def download_all(client, downloads, workers=DEFAULT_WORKERS, progress=None):
+    """Downloads letters of issuance concurrently.
+
+    A file is only created once its letter has been downloaded in full, an interrupted letter is resumed by the next
+    call.
+
+    :param ObligacjeSkarbowe client: Client to download with, see `ObligacjeSkarbowe.save_pdf`. Its `per_host` caps
+        the connections in use to a single host, streamed PDFs included.
+    :param downloads: Iterable of `Download`
+    :param int workers: Letters downloaded at the same time
+    :param progress: Called with every finished `Download` and its `Transfer`, or its `Failure`, always from the
+        calling thread, so it can update a progress bar or record the letter
+    :returns: `Report` with the stats of every request of the public session, the ones sent before included
+    """
+    if workers < 1:
+        raise ValueError(f"Expected at least one worker, got {workers}")
+    downloads = list(downloads)
+    session = client.public_session
+
+    def download(item):
+        return client.save_pdf(item.name, item.filename, session=session)
+
+    failures = {}
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="download"
+    ) as executor:
+        futures = {
+            executor.submit(download, item): index
+            for index, item in enumerate(downloads)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            if (error := future.exception()) is not None:
+                result = failures[index] = Failure(downloads[index], error)
+            else:
+                result = future.result()
+            if progress is not None:
+                progress(downloads[index], result)
+    return Report(
+        failures=[failures[index] for index in sorted(failures)],
+        stats=session_stats(session),
+    )
@@ -0,0 +1,237 @@
+"""On-disk cache of the public pages of obligacjeskarbowe.pl, revalidated on every request.
+
+The archive page and the page of every letter of issue rarely change. A cached page is requested again with its
+validators (`If-None-Match`, `If-Modified-Since`), and the server answers `304 Not Modified` without a body when the
+page hasn't changed. Only pages of `CACHEABLE_HOSTS` are cached, never the responses of the account pages
+(zakup.obligacjeskarbowe.pl), and only the ones with a validator.
+
+Every page is kept in two files named after the hash of its URL: `.json` with the headers and `.body`. The least
+recently used pages are removed once the cache outgrows its size, the modification time of the `.json` file keeps the
+order between runs.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), "obligacjeskarbowe-cache")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+CACHEABLE_HOSTS = frozenset({"www.obligacjeskarbowe.pl", "obligacjeskarbowe.pl"})
+# Account pages, never cached whatever the hosts of a cache
+ACCOUNT_DOMAIN = "zakup.obligacjeskarbowe.pl"
+
+# Headers describing the body as sent, which is stored decoded
+DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+@dataclass(frozen=True, slots=True)
+class CachedPage:
+    url: str
+    headers: CaseInsensitiveDict
+    body: bytes
+
+    def validators(self):
+        """Headers of a conditional request for the page."""
+        headers = {}
+        if etag := self.headers.get("ETag"):
+            headers["If-None-Match"] = etag
+        if last_modified := self.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+
+def account_host(host):
+    return host == ACCOUNT_DOMAIN or host.endswith("." + ACCOUNT_DOMAIN)
+
+
+def storable(response):
+    headers = response.headers
+    cache_control = headers.get("Cache-Control", "").lower()
+    return (
+        response.status_code == 200
+        and ("ETag" in headers or "Last-Modified" in headers)
+        and "no-store" not in cache_control
+        and "*" not in headers.get("Vary", "")
+    )
+
+
+def cached_response(page, request, revalidation):
+    """A `requests.Response` of a cached page, for a request answered with `304 Not Modified`."""
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.headers = CaseInsensitiveDict(page.headers)
+    response._content = page.body
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    # Cookies set by the 304 are still picked up by the session
+    response.raw = revalidation.raw
+    response.connection = revalidation.connection
+    return response
+
+
+class HttpCache:
+    """Pages cached in a directory, see the module docstring.
+
+    Safe to share between threads.
+
+    :param str directory: Directory of the cache, created when missing
+    :param int max_bytes: Size of the cache, least recently used pages are removed beyond it
+    :param hosts: Hosts of the pages to cache
+    """
+
+    def __init__(
+        self,
+        directory=CACHE_DIRECTORY,
+        max_bytes=DEFAULT_MAX_BYTES,
+        hosts=CACHEABLE_HOSTS,
+    ):
+        hosts = frozenset(host.lower() for host in hosts)
+        for host in hosts:
+            if account_host(host):
+                raise ValueError(f"Pages of {host} must not be cached")
+        self.hosts = hosts
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # Pages answered with 304 Not Modified and pages stored
+        self.revalidated = 0
+        self.stored = 0
+
+        pages = []
+        for name in os.listdir(directory):
+            key, extension = os.path.splitext(name)
+            if extension != ".json":
+                continue
+            try:
+                meta = os.stat(self.path(key, ".json"))
+                body = os.stat(self.path(key, ".body"))
+            except FileNotFoundError:
+                continue
+            pages.append((meta.st_mtime_ns, key, meta.st_size + body.st_size))
+        # Key -> size on disk, least recently used first
+        self.entries = OrderedDict((key, size) for _, key, size in sorted(pages))
+        self.size = sum(self.entries.values())
+        with self.lock:
+            self.evict()
+
+    def cacheable(self, request):
+        """Whether a prepared request is for a public page that may be cached."""
+        host = urlparse(request.url).hostname or ""
+        return (
+            request.method == "GET"
+            and host in self.hosts
+            and not account_host(host)
+            and "Range" not in request.headers
+        )
+
+    def path(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def write(self, key, extension, data):
+        # Written aside and renamed, so a page is never read half written
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temporary, self.path(key, extension))
+
+    def get(self, url):
+        """Cached page of a URL, None when not cached."""
+        key = self.key(url)
+        with self.lock:
+            if key not in self.entries:
+                return None
+            try:
+                with open(self.path(key, ".json"), "rb") as f:
+                    meta = json.load(f)
+                with open(self.path(key, ".body"), "rb") as f:
+                    body = f.read()
+            except (FileNotFoundError, ValueError):
+                self.remove(key)
+                return None
+            if meta["url"] != url:
+                return None
+            self.touch(key)
+        return CachedPage(
+            url=url, headers=CaseInsensitiveDict(meta["headers"]), body=body
+        )
+
+    def put(self, url, headers, body):
+        """Caches a page, replacing the cached one."""
+        self.save(url, headers, body)
+        with self.lock:
+            self.stored += 1
+
+    def save(self, url, headers, body):
+        key = self.key(url)
+        headers = {
+            name: value
+            for name, value in headers.items()
+            if name.lower() not in DROPPED_HEADERS
+        }
+        meta = json.dumps({"url": url, "headers": headers}).encode()
+        with self.lock:
+            self.write(key, ".body", body)
+            self.write(key, ".json", meta)
+            self.size += len(meta) + len(body) - self.entries.pop(key, 0)
+            self.entries[key] = len(meta) + len(body)
+            self.evict()
+
+    def refresh(self, page, headers):
+        """Updates a page after `304 Not Modified`, the validators might have changed."""
+        with self.lock:
+            self.revalidated += 1
+        updated = {
+            name: headers[name]
+            for name in ("ETag", "Last-Modified")
+            if name in headers and headers[name] != page.headers.get(name)
+        }
+        if updated:
+            headers = page.headers.copy()
+            headers.update(updated)
+            page = CachedPage(page.url, headers, page.body)
+            self.save(page.url, headers, page.body)
+        return page
+
+    def discard(self, url):
+        """Removes the page of a URL, i.e. no longer served with a validator."""
+        with self.lock:
+            self.remove(self.key(url))
+
+    def touch(self, key):
+        self.entries.move_to_end(key)
+        try:
+            os.utime(self.path(key, ".json"))
+        except FileNotFoundError:
+            pass
+
+    def remove(self, key):
+        self.size -= self.entries.pop(key, 0)
+        for extension in (".json", ".body"):
+            try:
+                os.remove(self.path(key, extension))
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        while self.size > self.max_bytes and self.entries:
+            self.remove(next(iter(self.entries)))
+
+    def __len__(self):
+        return len(self.entries)
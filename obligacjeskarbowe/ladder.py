@@ -0,0 +1,173 @@
+"""Planning monthly purchases so the money of a portfolio comes back evenly, month after month.
+
+Every month of the plan buys the same number of bonds. They are split between the offered durations so that they
+mature in the months with the fewest maturing bonds so far, the bonds of the portfolio and of the earlier months of
+the plan included (water filling).
+
+The decision of a month depends only on the maturities it can reach, one per duration. After a change, i.e. a
+purchase that differs from the plan, only the months that can reach an affected maturity month are planned again,
+in order, and the changes stop spreading as soon as a month ends up with the same purchases as before.
+"""
+
+import heapq
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+
+
+def month_index(day):
+    """Months since year 0, so months can be added with integers."""
+    return day.year * 12 + day.month - 1
+
+
+def month_date(index):
+    """First day of a month, see `month_index`."""
+    year, month = divmod(index, 12)
+    return date(year, month + 1, 1)
+
+
+@dataclass(frozen=True, slots=True)
+class Purchase:
+    month: date
+    # Bond type, i.e. ROD, for `buy --symbol`
+    symbol: str
+    dlugosc: int
+    count: int
+
+    @property
+    def maturity(self):
+        return month_date(month_index(self.month) + self.dlugosc)
+
+
+class LadderPlanner:
+    """Plan of purchases for a number of months, see the module docstring.
+
+    :param bonds: Iterable of `Bond` of the current portfolio
+    :param offers: Iterable of `AvailableBond` to buy, one bond type per duration (the first one is kept)
+    :param date start: Month of the first purchase
+    :param int months: Number of monthly purchases
+    :param int monthly: Bonds bought every month
+    """
+
+    def __init__(self, bonds, offers, start, months, monthly):
+        self.symbols = {}
+        for offer in offers:
+            self.symbols.setdefault(offer.dlugosc, offer.emisja[:3])
+        if not self.symbols:
+            raise ValueError("Expected at least one offer")
+        # Longer bonds first, so they win ties
+        self.durations = sorted(self.symbols, reverse=True)
+        first = month_index(start)
+        # Months of the plan without a recorded purchase yet
+        self.remaining = set(range(first, first + months))
+        self.monthly = monthly
+
+        # Bonds maturing in every month outside of the plan, that is the portfolio
+        self.fixed = Counter()
+        self.add_bonds(bonds, replan=False)
+        # Planned purchases of every month, as {duration: count}
+        self.planned = {}
+        self.recomputed = 0
+        self.replan(self.remaining)
+
+    def add_bonds(self, bonds, replan=True):
+        """Adds bonds to the portfolio, i.e. bought outside of the plan, and updates the plan."""
+        affected = set()
+        for bond in bonds:
+            target = month_index(bond.data_wykupu)
+            self.fixed[target] += bond.dostepnych + bond.zablokowanych
+            affected.add(target)
+        if replan:
+            self.replan(self.reaching(affected))
+
+    def purchased(self, month, bonds):
+        """Records the purchases of a month of the plan, which leaves the plan, and updates the rest of it.
+
+        :param date month: Month of the plan the bonds were bought in, the first one usually
+        :param bonds: Iterable of `Bond` bought, as listed in the portfolio
+        """
+        index = month_index(month)
+        self.remaining.discard(index)
+        planned = self.planned.pop(index, {})
+        affected = {index + duration for duration in planned}
+        for bond in bonds:
+            target = month_index(bond.data_wykupu)
+            self.fixed[target] += bond.dostepnych + bond.zablokowanych
+            affected.add(target)
+        self.replan(self.reaching(affected))
+
+    def reaching(self, targets):
+        """Months of the plan with a purchase that can mature in any of the target months."""
+        return {
+            target - duration
+            for target in targets
+            for duration in self.durations
+            if target - duration in self.remaining
+        }
+
+    def level(self, target, before):
+        """Bonds maturing in a month, counting the plan only up to the month `before`."""
+        total = self.fixed[target]
+        for duration in self.durations:
+            month = target - duration
+            if month < before:
+                total += self.planned.get(month, {}).get(duration, 0)
+        return total
+
+    def decide(self, month):
+        """Water fills the bonds of a month into the maturity months with the fewest bonds."""
+        heap = [
+            (self.level(month + duration, month), position, duration)
+            for position, duration in enumerate(self.durations)
+        ]
+        heapq.heapify(heap)
+        counts = Counter()
+        for _ in range(self.monthly):
+            level, position, duration = heapq.heappop(heap)
+            counts[duration] += 1
+            heapq.heappush(heap, (level + 1, position, duration))
+        return dict(counts)
+
+    def replan(self, months):
+        """Plans the months again, in order, and then every later month whose decision might have changed."""
+        queue = sorted(months)
+        queued = set(queue)
+        while queue:
+            month = heapq.heappop(queue)
+            queued.discard(month)
+            self.recomputed += 1
+            decision = self.decide(month)
+            previous = self.planned.get(month)
+            if decision == previous:
+                continue
+            self.planned[month] = decision
+            changed = {
+                month + duration
+                for duration in set(decision) | set(previous or ())
+                if decision.get(duration) != (previous or {}).get(duration)
+            }
+            for later in self.reaching(changed):
+                if later > month and later not in queued:
+                    heapq.heappush(queue, later)
+                    queued.add(later)
+
+    def purchases(self):
+        """Planned purchases, in order of the months."""
+        return [
+            Purchase(
+                month=month_date(month),
+                symbol=self.symbols[duration],
+                dlugosc=duration,
+                count=count,
+            )
+            for month in sorted(self.planned)
+            for duration, count in sorted(self.planned[month].items())
+        ]
+
+    def maturities(self):
+        """Bonds maturing in every month, the portfolio and the whole plan included, as {date: count}."""
+        totals = Counter(self.fixed)
+        for month, decision in self.planned.items():
+            for duration, count in decision.items():
+                totals[month + duration] += count
+        return {month_date(month): totals[month] for month in sorted(totals)}
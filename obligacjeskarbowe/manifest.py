@@ -0,0 +1,194 @@
+"""Index of the letters of issuance downloaded into a directory, for an incremental sync of the archive.
+
+Every letter downloaded is recorded in a SQLite database next to the PDFs, with the URL it is listed under in the
+archive, its size and SHA-256 and the time it was fetched. A sync compares the listing of the archive with the
+index, a primary key lookup per letter, and downloads only the letters that are new, listed under another URL, or
+whose file is missing or doesn't match the index. The size of a file is checked on every sync, its hash only when
+asked to.
+"""
+
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from obligacjeskarbowe.downloader import Download
+from obligacjeskarbowe.transfer import Transfer, hash_file
+
+MANIFEST_FILENAME = ".manifest.sqlite3"
+
+# Reasons to download a letter
+NEW = "new"
+CHANGED = "changed"
+DAMAGED = "damaged"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS letters (
+    name TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    fetched TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class Letter:
+    # Name listed in the archive, as in the name of the file, i.e. EDO0134
+    name: str
+    # URL listed in the archive
+    url: str
+    filename: str
+    size: int
+    sha256: str
+    fetched: datetime
+
+
+@dataclass(slots=True)
+class Changes:
+    """Letters of a listing, by what a sync has to do about them."""
+
+    # (reason, Download) to download
+    downloads: list = field(default_factory=list)
+    # Names of the letters up to date
+    current: list = field(default_factory=list)
+    # Letters recorded without a download, found complete in the directory
+    adopted: list = field(default_factory=list)
+
+
+def looks_complete(filename):
+    """Whether a file starts and ends like a PDF, a cheap check of a file downloaded before the manifest."""
+    with open(filename, "rb") as f:
+        if f.read(5) != b"%PDF-":
+            return False
+        f.seek(max(os.fstat(f.fileno()).st_size - 1024, 0))
+        return b"%%EOF" in f.read()
+
+
+class Manifest:
+    """Letters downloaded into a directory, see the module docstring.
+
+    Not to be shared between threads, record the letters from the thread that opened the manifest.
+
+    :param str path: Directory of the letters
+    :param str filename: Database, `MANIFEST_FILENAME` in the directory by default
+    """
+
+    def __init__(self, path, filename=None):
+        self.path = path
+        self.connection = sqlite3.connect(
+            filename or os.path.join(path, MANIFEST_FILENAME)
+        )
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM letters").fetchone()
+        return count
+
+    def __iter__(self):
+        rows = self.connection.execute(
+            "SELECT name, url, filename, size, sha256, fetched FROM letters ORDER BY name"
+        )
+        return (self.letter(row) for row in rows)
+
+    @staticmethod
+    def letter(row):
+        name, url, filename, size, sha256, fetched = row
+        return Letter(
+            name, url, filename, size, sha256, datetime.fromisoformat(fetched)
+        )
+
+    def get(self, name):
+        row = self.connection.execute(
+            "SELECT name, url, filename, size, sha256, fetched FROM letters WHERE name = ?",
+            (name,),
+        ).fetchone()
+        return self.letter(row) if row is not None else None
+
+    def record(self, download, transfer, fetched=None, commit=True):
+        """Records a letter downloaded, see `ObligacjeSkarbowe.save_pdf`.
+
+        :param Download download: Letter downloaded
+        :param Transfer transfer: Size and hash of the file
+        :param datetime fetched: Time of the download, now by default
+        """
+        fetched = fetched or datetime.now()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO letters VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                self.key(download.filename),
+                download.url,
+                os.path.basename(download.filename),
+                transfer.size,
+                transfer.sha256,
+                fetched.isoformat(timespec="seconds"),
+            ),
+        )
+        if commit:
+            self.connection.commit()
+
+    def filename(self, name):
+        return os.path.join(self.path, f"{name.upper()}.pdf")
+
+    @staticmethod
+    def key(filename):
+        """Name of a letter in the manifest, the name of its file without the extension."""
+        return os.path.splitext(os.path.basename(filename))[0]
+
+    def diff(self, listing, verify=False):
+        """Compares the listing of the archive with the manifest and the files.
+
+        Files of the directory without a record, i.e. downloaded before the manifest, are recorded when they look like
+        a complete PDF.
+
+        :param listing: Iterable of (name, URL), i.e. the bonds of `ObligacjeSkarbowe.archive`. Files and the letters
+            of the manifest are named after the whole name, the letter is downloaded by its first word.
+        :param bool verify: Whether to compare the hash of every file with the manifest, not only its size
+        :returns: `Changes`
+        """
+        changes = Changes()
+        for listed, url in listing:
+            filename = self.filename(listed)
+            name = self.key(filename)
+            download = Download(name=listed.split()[0], filename=filename, url=url)
+            letter = self.get(name)
+            try:
+                size = os.path.getsize(filename)
+            except FileNotFoundError:
+                size = None
+
+            if letter is None:
+                if size is not None and looks_complete(filename):
+                    hashed, digest = hash_file(filename)
+                    self.record(
+                        download,
+                        Transfer(filename, hashed, digest.hexdigest()),
+                        fetched=datetime.fromtimestamp(os.path.getmtime(filename)),
+                        commit=False,
+                    )
+                    changes.adopted.append(name)
+                    changes.current.append(name)
+                else:
+                    changes.downloads.append((NEW, download))
+            elif letter.url != url:
+                changes.downloads.append((CHANGED, download))
+            elif size != letter.size or (
+                verify and hash_file(filename)[1].hexdigest() != letter.sha256
+            ):
+                changes.downloads.append((DAMAGED, download))
+            else:
+                changes.current.append(name)
+        self.connection.commit()
+        return changes
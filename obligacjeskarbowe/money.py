@@ -0,0 +1,145 @@
+"""Amounts of money as an integer number of grosze (1/100 PLN).
+
+Every amount shown by the site has exactly two decimal places, so keeping them as integers is exact and makes
+totals of thousands of lots a sum of ints rather than of `Decimal` objects.
+"""
+
+from decimal import Decimal
+
+DEFAULT_CURRENCY = "PLN"
+
+# Minor units in a major unit, i.e. grosze in a złoty.
+MINOR_UNITS = 100
+MINOR_PLACES = 2
+
+
+class Money:
+    """Amount of money in a currency, stored in minor units.
+
+    :param amount: Amount in major units, a `Decimal` (or an int, or a str accepted by `Decimal`) with at most two
+        decimal places
+    :param str currency: ISO 4217 code
+    """
+
+    __slots__ = ("grosze", "currency")
+
+    def __init__(self, amount, currency=DEFAULT_CURRENCY):
+        self.grosze = to_grosze(amount)
+        self.currency = currency
+
+    @classmethod
+    def from_grosze(cls, grosze, currency=DEFAULT_CURRENCY):
+        money = cls.__new__(cls)
+        money.grosze = grosze
+        money.currency = currency
+        return money
+
+    @property
+    def amount(self):
+        """Amount in major units, always with two decimal places."""
+        return Decimal(self.grosze).scaleb(-MINOR_PLACES)
+
+    def __repr__(self):
+        return f"Money(amount={self.amount!r}, currency={self.currency!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.grosze == other.grosze and self.currency == other.currency
+
+    def __hash__(self):
+        return hash((self.grosze, self.currency))
+
+    def __add__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money.from_grosze(
+            self.grosze + self.__same_currency(other).grosze, self.currency
+        )
+
+    def __sub__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money.from_grosze(
+            self.grosze - self.__same_currency(other).grosze, self.currency
+        )
+
+    def __mul__(self, other):
+        if not isinstance(other, int):
+            return NotImplemented
+        return Money.from_grosze(self.grosze * other, self.currency)
+
+    __rmul__ = __mul__
+
+    def __same_currency(self, other):
+        if other.currency != self.currency:
+            raise ValueError(f"Expected {self.currency} but received {other.currency}")
+        return other
+
+
+def to_grosze(amount):
+    """Converts an amount in major units into minor units, refusing to round."""
+    if not isinstance(amount, Decimal):
+        amount = Decimal(amount)
+    grosze = amount.scaleb(MINOR_PLACES)
+    if grosze != grosze.to_integral_value():
+        raise ValueError(f"{amount} has more than {MINOR_PLACES} decimal places")
+    return int(grosze)
+
+
+def parse_polish_amount(text, currency=DEFAULT_CURRENCY):
+    """Parses an amount formatted the Polish way, i.e. `1 234,56 PLN`.
+
+    Thousands are separated with regular or non-breaking spaces. The digits are converted straight into grosze,
+    without building a `Decimal` on the way.
+
+    :param str currency: Expected currency
+    """
+    number = text.replace(" ", "").replace("\xa0", "")
+    if not number.endswith(currency):
+        raise RuntimeError(f"Expected {currency} currency but found amount {text!r}")
+    number = number[: -len(currency)]
+    zlote, separator, grosze = number.partition(",")
+    if not separator:
+        zlote, separator, grosze = number.partition(".")
+    if not (
+        zlote.removeprefix("-").isdigit()
+        and (grosze.isdigit() or not separator)
+        and len(grosze) <= MINOR_PLACES
+    ):
+        raise RuntimeError(f"Unable to parse amount {text!r}")
+    # The sign of the złote carries over, i.e. "-0" + "50" is -50 grosze.
+    return Money.from_grosze(int(zlote + grosze.ljust(MINOR_PLACES, "0")), currency)
+
+
+def sum_money(items, currency=DEFAULT_CURRENCY):
+    """Sums amounts of the same currency, an empty sum is zero.
+
+    :param items: Iterable of `Money`
+    """
+    total = 0
+    for money in items:
+        if money.currency != currency:
+            raise ValueError(f"Expected {currency} but received {money.currency}")
+        total += money.grosze
+    return Money.from_grosze(total, currency)
+
+
+def sum_money_by(items, key, value, currency=DEFAULT_CURRENCY):
+    """Sums amounts per group.
+
+    :param items: Iterable of any objects
+    :param key: Callable returning the group of an item
+    :param value: Callable returning the `Money` of an item
+    :returns: Dict of group -> `Money`, in the order groups were first seen
+    """
+    totals = {}
+    for item in items:
+        money = value(item)
+        if money.currency != currency:
+            raise ValueError(f"Expected {currency} but received {money.currency}")
+        group = key(item)
+        totals[group] = totals.get(group, 0) + money.grosze
+    return {
+        group: Money.from_grosze(grosze, currency) for group, grosze in totals.items()
+    }
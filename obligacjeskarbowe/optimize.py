@@ -0,0 +1,317 @@
+"""Splitting a budget between the bonds currently on offer.
+
+Every offer is scored by the net gain of a single bond held until the horizon: interest received (capitalized,
+paid out, or accrued), less the early redemption fee when the bond matures after the horizon, less the 19% tax. Money
+of bonds maturing before the horizon is assumed to stay in cash. Inflation indexed bonds earn the expected CPI plus
+their margin from the second period on, other bonds keep their first period rate.
+
+Every bond costs its nominal value of 100 PLN, so the allocation is an integer program over the number of bonds of
+every offer with a few shared limits: the budget, the 800+ limit of the family bonds (ROS, ROD), and a minimum amount
+in bonds maturing soon (liquidity). Offers with the same family and liquidity are interchangeable apart from their
+gain, which turns the program into a min cost flow on a network of a handful of nodes. Its constraint matrix is
+totally unimodular, so the successive shortest path algorithm finds the optimal integer allocation, in a number of
+steps that depends on the number of offers and not on the size of the budget.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from obligacjeskarbowe.money import Money, sum_money
+from obligacjeskarbowe.parser import Bond, InterestPeriod
+from obligacjeskarbowe.redemption import TAX_PERCENT
+from obligacjeskarbowe.series import series_of
+from obligacjeskarbowe.valuation import Valuation, divide_half_up, to_ordinals
+
+
+@dataclass(slots=True)
+class Allocation:
+    emisja: str
+    count: int
+    # Net gain of all the bonds of the allocation at the horizon
+    gain: Money
+
+
+@dataclass(slots=True)
+class Plan:
+    allocations: list
+    invested: Money
+    # Part of the budget left uninvested
+    cash: Money
+    gain: Money
+
+
+def offer_gains(offers, on, horizon, cpi=None):
+    """Net gain of a single bond of every offer bought on a day and cashed after `horizon` months.
+
+    :param offers: Iterable of `AvailableBond`
+    :param date on: Day of the purchase
+    :param int horizon: Months until the money is needed back
+    :param Decimal cpi: Expected annual CPI, in percent. By default inflation indexed bonds keep their first period
+        rate.
+    :returns: List of gains in grosze, None for the offers that can't be cashed at the horizon (OTS before its
+        maturity)
+    """
+    offers = list(offers)
+    if not offers:
+        return []
+    series = [series_of(offer.emisja) for offer in offers]
+    bonds = []
+    for offer, s in zip(offers, series):
+        later = offer.oprocentowanie
+        if s.indexed and cpi is not None:
+            later = max(cpi, Decimal(0)) + s.margin
+        bonds.append(
+            Bond(
+                emisja=offer.emisja,
+                dostepnych=1,
+                zablokowanych=0,
+                nominalna=Money.from_grosze(s.nominal_grosze),
+                aktualna=Money.from_grosze(s.nominal_grosze),
+                okresy=tuple(
+                    InterestPeriod(okres=period + 1, oprocentowanie=rate)
+                    for period, rate in enumerate(
+                        [offer.oprocentowanie] + [later] * (s.periods - 1)
+                    )
+                ),
+                data_wykupu=on + relativedelta(months=s.months),
+            )
+        )
+
+    valuation = Valuation(bonds)
+    cashed = on + relativedelta(months=horizon)
+    lots = np.arange(len(bonds))
+    _, period = valuation.locate(cashed)
+    period = period[0]
+    accrued = valuation.unit_values(cashed)[0] - valuation.start_values[:, 0]
+    # Interest of the periods paid out before the current one, capitalized interest is already in `accrued`.
+    paid_out = np.cumsum(valuation.interest, axis=1) - valuation.interest
+    paid = np.where(valuation.capitalized, 0, paid_out[lots, period])
+    matured = to_ordinals(cashed)[0] >= valuation.maturity
+    fees = np.array([s.redemption_fee_grosze or 0 for s in series], dtype=np.int64)
+    fee = np.where(matured, 0, np.minimum(fees, accrued))
+    income = paid + accrued - fee
+    gain = income - divide_half_up(income * TAX_PERCENT, 100)
+    return [
+        int(g) if m or s.redemption_fee_grosze is not None else None
+        for g, m, s in zip(gain, matured, series)
+    ]
+
+
+class ClassArc:
+    """Arc of the flow network standing for all the offers of a class, best offers are filled first."""
+
+    __slots__ = ("items", "flows", "position")
+
+    def __init__(self, items):
+        # (gain, cap, index of the offer), best gain first
+        self.items = sorted(items, key=lambda item: -item[0])
+        self.flows = [0] * len(self.items)
+        # Index of the first offer that isn't full, all the ones before it are
+        self.position = 0
+        self.skip_full()
+
+    def skip_full(self):
+        while (
+            self.position < len(self.items)
+            and self.flows[self.position] == self.items[self.position][1]
+        ):
+            self.position += 1
+
+    def forward(self):
+        """Cost and capacity of buying one more bond, None if every offer is full."""
+        if self.position == len(self.items):
+            return None
+        gain, cap, _ = self.items[self.position]
+        return -gain, cap - self.flows[self.position]
+
+    def backward_position(self):
+        if self.position < len(self.items) and self.flows[self.position]:
+            return self.position
+        return self.position - 1 if self.position else None
+
+    def backward(self):
+        """Cost and capacity of giving back one bond of the worst offer bought, None if nothing is bought."""
+        position = self.backward_position()
+        if position is None:
+            return None
+        return self.items[position][0], self.flows[position]
+
+    def push(self, amount):
+        self.flows[self.position] += amount
+        self.skip_full()
+
+    def pull(self, amount):
+        position = self.backward_position()
+        self.flows[position] -= amount
+        self.position = min(self.position, position)
+
+
+def solve(gains, caps, family, liquid, total, family_limit, liquid_minimum):
+    """Finds the number of bonds of every offer with the largest total gain.
+
+    :param gains: Gain of a single bond of every offer
+    :param caps: Maximum number of bonds of every offer
+    :param family: Whether an offer counts against the `family_limit`
+    :param liquid: Whether an offer counts towards the `liquid_minimum`
+    :param int total: Maximum number of bonds in total
+    :param int family_limit: Maximum number of family bonds
+    :param int liquid_minimum: Minimum number of liquid bonds
+    :returns: List of counts, in the order of the offers
+    :raises ValueError: When the liquidity minimum can't be met
+    """
+    source, root, fam, other, liq, rest, sink = range(7)
+    unlimited = total
+    # Every unit of flow through the bonus arc is worth more than any path of offer arcs (there are at most 4 on a
+    # path), so the liquidity minimum is met first whenever it can be.
+    bonus = 4 * max((abs(gain) for gain in gains), default=0) + 1
+
+    # Plain arcs as [tail, head, capacity, cost, flow]
+    arcs = [
+        [source, root, total, 0, 0],
+        [root, fam, min(family_limit, total), 0, 0],
+        [root, other, unlimited, 0, 0],
+        [liq, sink, min(liquid_minimum, total), -bonus, 0],
+        [liq, sink, unlimited, 0, 0],
+        [rest, sink, unlimited, 0, 0],
+    ]
+    classes = {(fam, liq): [], (fam, rest): [], (other, liq): [], (other, rest): []}
+    for index, (gain, cap, f, l) in enumerate(zip(gains, caps, family, liquid)):
+        if cap > 0:
+            classes[(fam if f else other, liq if l else rest)].append(
+                (gain, cap, index)
+            )
+    class_arcs = {nodes: ClassArc(items) for nodes, items in classes.items()}
+
+    while True:
+        # Residual arcs as (tail, head, cost, capacity, arc, direction)
+        residual = []
+        for arc in arcs:
+            tail, head, capacity, cost, flow = arc
+            if flow < capacity:
+                residual.append((tail, head, cost, capacity - flow, arc, 1))
+            if flow > 0:
+                residual.append((head, tail, -cost, flow, arc, -1))
+        for (tail, head), arc in class_arcs.items():
+            if step := arc.forward():
+                residual.append((tail, head, *step, arc, 1))
+            if step := arc.backward():
+                residual.append((head, tail, *step, arc, -1))
+
+        # Bellman-Ford, the residual network has no negative cycles
+        distance = [None] * 7
+        previous = [None] * 7
+        distance[source] = 0
+        for _ in range(6):
+            changed = False
+            for edge in residual:
+                tail, head, cost = edge[0], edge[1], edge[2]
+                if distance[tail] is not None and (
+                    distance[head] is None or distance[tail] + cost < distance[head]
+                ):
+                    distance[head] = distance[tail] + cost
+                    previous[head] = edge
+                    changed = True
+            if not changed:
+                break
+        if distance[sink] is None or distance[sink] >= 0:
+            break
+
+        path = []
+        node = sink
+        while node != source:
+            edge = previous[node]
+            path.append(edge)
+            node = edge[0]
+        amount = min(edge[3] for edge in path)
+        for _, _, _, _, arc, direction in path:
+            if isinstance(arc, ClassArc) and direction > 0:
+                arc.push(amount)
+            elif isinstance(arc, ClassArc):
+                arc.pull(amount)
+            else:
+                arc[4] += direction * amount
+
+    if arcs[3][4] < liquid_minimum:
+        raise ValueError(
+            f"Unable to put {liquid_minimum} bonds into offers maturing soon enough"
+        )
+
+    counts = [0] * len(gains)
+    for arc in class_arcs.values():
+        for (_, _, index), flow in zip(arc.items, arc.flows):
+            counts[index] = flow
+    return counts
+
+
+def optimize(
+    offers,
+    budget,
+    horizon,
+    cpi=None,
+    family_limit=0,
+    liquid_amount=None,
+    liquid_months=12,
+    max_per_offer=None,
+    on=None,
+):
+    """Splits a budget between the offers with the largest net gain at the horizon.
+
+    :param offers: Iterable of `AvailableBond` i.e. `ObligacjeSkarbowe.list_bonds().emisje`, offers outside of
+        their sale window are skipped
+    :param Money budget: Money to invest
+    :param int horizon: Months until the money is needed back
+    :param Decimal cpi: Expected annual CPI, see `offer_gains`
+    :param int family_limit: Family bonds (ROS, ROD) that can still be bought with the 800+ benefit, see
+        `calculate_available_bonds`
+    :param Money liquid_amount: Minimum amount in bonds maturing within `liquid_months`
+    :param int max_per_offer: Maximum number of bonds of a single offer
+    :param date on: Day of the purchase, today by default
+    :returns: `Plan`
+    """
+    on = on or date.today()
+    offers = [
+        offer
+        for offer in offers
+        if offer.okres_sprzedazy_od <= on <= offer.okres_sprzedazy_do
+    ]
+    series = [series_of(offer.emisja) for offer in offers]
+    price = max((s.nominal_grosze for s in series), default=1)
+    if any(s.nominal_grosze != price for s in series):
+        raise ValueError("Expected every offer to have the same nominal value")
+    total = budget.grosze // price
+    liquid_minimum = -(-liquid_amount.grosze // price) if liquid_amount else 0
+
+    gains = offer_gains(offers, on, horizon, cpi)
+    cap = total if max_per_offer is None else min(total, max_per_offer)
+    counts = solve(
+        gains=[gain or 0 for gain in gains],
+        caps=[0 if gain is None else cap for gain in gains],
+        family=[s.family for s in series],
+        liquid=[s.months <= liquid_months for s in series],
+        total=total,
+        family_limit=family_limit,
+        liquid_minimum=liquid_minimum,
+    )
+
+    allocations = [
+        Allocation(
+            emisja=offer.emisja,
+            count=count,
+            gain=Money.from_grosze(gain * count, budget.currency),
+        )
+        for offer, gain, count in zip(offers, gains, counts)
+        if count
+    ]
+    invested = Money.from_grosze(sum(counts) * price, budget.currency)
+    return Plan(
+        allocations=allocations,
+        invested=invested,
+        cash=budget - invested,
+        gain=sum_money(
+            (allocation.gain for allocation in allocations), budget.currency
+        ),
+    )
@@ -1,26 +1,104 @@
 from dataclasses import dataclass
+import functools
+import importlib.util
 import json
-import operator
 import re
 from datetime import date, datetime
 from decimal import Decimal
-from typing import List
+from html import unescape
+from typing import List, Tuple
+from xml.etree import ElementTree
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.filter import ElementFilter
 
+from obligacjeskarbowe.money import DEFAULT_CURRENCY, Money, parse_polish_amount
 
-DEFAULT_CURRENCY = "PLN"
+# Tree builders supported by the extractors, fastest first. "lxml" is C-backed,
+# "html.parser" is the pure-Python fallback shipped with the standard library.
+HTML_PARSERS = ("lxml", "html.parser")
+
+if importlib.util.find_spec("lxml") is not None:
+    DEFAULT_HTML_PARSER = "lxml"
+else:
+    DEFAULT_HTML_PARSER = "html.parser"
+
+
+class ParseProfile(ElementFilter):
+    """Keeps only the regions of a page matched by any of the strainers.
+
+    A matched element is kept along with everything inside of it. Whatever lies outside of the matched regions
+    (menus, headers, footers, scripts) is skipped while parsing, so no tree is built for it.
+    """
+
+    def __init__(self, *strainers):
+        super().__init__()
+        self.strainers = strainers
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return any(
+            strainer.allow_tag_creation(nsprefix, name, attrs)
+            for strainer in self.strainers
+        )
+
+    def allow_string_creation(self, string):
+        return False
+
+
+def class_regexp(name):
+    """Matches a single class of a multi-valued class attribute."""
+    return re.compile(rf"(^|\s){re.escape(name)}(\s|$)")
+
+
+VIEW_STATE_STRAINER = SoupStrainer("input", attrs={"name": "javax.faces.ViewState"})
+MAIN_FORM_STRAINER = SoupStrainer("span", id="spanContent")
+
+# Regions of each page the extractors need, see `parse_html`.
+PARSE_PROFILES = {
+    # daneRachunku.html
+    "login_info": ParseProfile(SoupStrainer("form", id="userInfoForm")),
+    # Pages that are only navigated through i.e. historiaDyspozycji.html
+    "navigation": ParseProfile(MAIN_FORM_STRAINER, VIEW_STATE_STRAINER),
+    # zakupObligacji.html, zakupObligacji500Plus.html
+    "offers": ParseProfile(
+        MAIN_FORM_STRAINER,
+        VIEW_STATE_STRAINER,
+        SoupStrainer("tbody", id=re.compile(r"^dostepneEmisje:j_idt")),
+        SoupStrainer("span", class_=class_regexp("formlabel-base")),
+        SoupStrainer("span", class_=class_regexp("formfield-base")),
+    ),
+    # stanRachunku.html
+    "portfolio": ParseProfile(
+        VIEW_STATE_STRAINER,
+        SoupStrainer(["select", "tbody"], id=re.compile(r"^stanRachunku:j_idt")),
+    ),
+    # https://www.obligacjeskarbowe.pl/archiwum-listow-emisyjnych/
+    "archive": ParseProfile(
+        SoupStrainer("select", id=["id_type_bonds", "id_issue_bonds"])
+    ),
+    # https://www.obligacjeskarbowe.pl/listy-emisyjne/?id=...
+    "issue_letter": ParseProfile(
+        SoupStrainer("a", class_=class_regexp("issue-letter__file"))
+    ),
+}
+
+
+def parse_html(content, parser=None, profile=None):
+    """Parses a HTML page into a tree understood by all the extractors.
+
+    :param content: Raw response body (bytes or str)
+    :param str parser: Tree builder to use, defaults to the fastest available one
+    :param str profile: Name of a `PARSE_PROFILES` entry. If given, the tree is built only for the regions of the
+        page the extractors of that page need.
+    """
+    parse_only = PARSE_PROFILES[profile] if profile is not None else None
+    return BeautifulSoup(
+        content, features=parser or DEFAULT_HTML_PARSER, parse_only=parse_only
+    )
 
 
 def parse_balance(balance):
-    balance = balance.replace("\xa0", " ")
-    assert (
-        DEFAULT_CURRENCY in balance
-    ), f"Expected PLN currency but found balance {balance!r}"
-    balance = balance.replace(DEFAULT_CURRENCY, "")
-    balance = balance.replace(" ", "")
-    balance = balance.replace(",", ".")
-    return Money(Decimal(balance), DEFAULT_CURRENCY)
+    return parse_polish_amount(balance, DEFAULT_CURRENCY)
 
 
 def extract_balance(bs):
@@ -31,24 +109,25 @@ def extract_balance(bs):
     return parse_balance(span.text)
 
 
-def html_to_string(html):
-    soup = BeautifulSoup(html, features="html.parser")
-    return soup.get_text("\n")
+HTML_TAG_REGEXP = re.compile(r"<[^>]*>")
 
 
-@dataclass
-class Money:
-    amount: Decimal
-    currency: str
+def html_to_string(html):
+    """Converts a short HTML snippet into text, one line per text node.
 
+    Equivalent to `BeautifulSoup(html).get_text("\\n")` for the tooltip markup
+    but without building a tree for every row.
+    """
+    return "\n".join(unescape(chunk) for chunk in HTML_TAG_REGEXP.split(html) if chunk)
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class InterestPeriod:
     okres: int
     oprocentowanie: Decimal
 
 
-@dataclass
+@dataclass(slots=True)
 class Bond:
     """Zakupiona obligacja."""
 
@@ -57,7 +136,7 @@ class Bond:
     zablokowanych: int
     nominalna: Money
     aktualna: Money
-    okresy: List[InterestPeriod]
+    okresy: Tuple[InterestPeriod, ...]
     data_wykupu: date
 
 
@@ -80,19 +159,41 @@ class LoginInfo:
     ostatnie_nieudane_logowanie: datetime
 
 
+INTEREST_PERIOD_REGEXP = re.compile(r"^okres (\d+) oprocentowanie (\d+(?:\.\d+)?)%$")
+
+# Distinct interest schedules kept by `parse_interest_periods`. Bonds of the same type bought in the same month
+# share a schedule, so even large portfolios have only a few hundred of them.
+TOOLTIP_CACHE_SIZE = 1024
+
+
 def parse_tooltip(text):
-    """This works well for ROD/RO"""
+    """This works well for ROD/RO
+
+    :returns: Tuple of interest periods, shared by all the bonds with the same schedule
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return parse_interest_periods("\n".join(line for line in lines if line))
+
+
+@functools.lru_cache(maxsize=TOOLTIP_CACHE_SIZE)
+def parse_interest_periods(text):
+    """Parses a normalized tooltip, one interest period per line without blank lines.
+
+    Results are cached, which is safe as both the tuple and the periods are immutable.
+    """
     results = []
     for line in text.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        if m := re.match(r"^okres (\d+) oprocentowanie (\d+(?:\.\d+)?)%$", line):
+        if m := INTEREST_PERIOD_REGEXP.match(line):
             (okres, oprocentowanie) = m.groups()
             okres = int(okres)
-            oprocentowanie = Decimal(oprocentowanie)
-            interest_period = InterestPeriod(okres=okres, oprocentowanie=oprocentowanie)
-            results += [interest_period]
+            # Periods are numbered 1, 2, 3... in order.
+            if okres != len(results) + 1:
+                raise RuntimeError(
+                    f"Expected interest period {len(results) + 1} but found {okres} in {text!r}"
+                )
+            results.append(
+                InterestPeriod(okres=okres, oprocentowanie=Decimal(oprocentowanie))
+            )
         else:
             raise RuntimeError(f"Unable to parse tooltip {line!r}")
 
@@ -101,30 +202,79 @@ def parse_tooltip(text):
             f"There should be at least one interest period parsed in {text!r}"
         )
 
-    assert results[0].okres == 1, "First interest period should be marked as 1"
-    assert sorted(map(operator.attrgetter("okres"), results))
-    assert len(results) / 2 * (results[0].okres + results[-1].okres) == sum(
-        map(operator.attrgetter("okres"), results)
-    )
+    return tuple(results)
+
+
+TOOLTIP_PATTERN = r'forTarget:\s*"(stanRachunku:j_idt\d+:\d+:nazwaSkrocona)",\s*content:\s*\{\s*text:\s*(".+?")\s*\}'
+TOOLTIP_REGEXP = re.compile(TOOLTIP_PATTERN)
+TOOLTIP_BYTES_REGEXP = re.compile(TOOLTIP_PATTERN.encode())
 
-    return results
 
+def extract_tooltips(content):
+    """Extracts PrimeFaces tooltips of the portfolio table.
 
-def extract_bonds(bs):
+    Works directly on the raw response body, so there is no need to serialize
+    a parsed tree back into a string just to find the tooltip scripts.
+
+    :param content: Raw response body (bytes or str)
+    :return: A mapping of tooltip target id into the tooltip text
+    """
+    tooltips = {}
+    if isinstance(content, bytes):
+        for for_target, text in TOOLTIP_BYTES_REGEXP.findall(content):
+            tooltips[for_target.decode()] = html_to_string(json.loads(text))
+    else:
+        for for_target, text in TOOLTIP_REGEXP.findall(content):
+            tooltips[for_target] = html_to_string(json.loads(text))
+    return tooltips
+
+
+def extract_bonds(bs, content=None):
+    """Extracts bonds from the portfolio table.
+
+    :param bs: Parsed page
+    :param content: Raw response body the page was parsed from. If given, the tooltips are read from it
+        directly, otherwise they're collected from the scripts found in the tree.
+    """
     tbody = bs.select('tbody[id^="stanRachunku:j_idt"]')  # Match only beggining
     # assert len(tbody) == 1, f'{len(tbody)}', list(map(lambda tb: tb.attrs['id'], bs.find_all('tbody')))
     tbody = tbody[0]
 
-    bonds = []
+    if content is None:
+        content = "".join(script.get_text() for script in bs.find_all("script"))
+    tooltips = extract_tooltips(content)
+
+    return extract_bond_rows(tbody, tooltips)
 
-    tooltips = {}
-    for tooltip in re.findall(
-        r'forTarget:\s*"(stanRachunku:j_idt\d+:\d+:nazwaSkrocona)",\s*content:\s*\{\s*text:\s*(".+?")\s*\}',
-        str(bs),
-    ):
-        (for_target, content) = tooltip
-        raw_html = json.loads(content)
-        tooltips[for_target] = html_to_string(raw_html)
+
+def extract_bonds_fragment(fragment, parser=None):
+    """Extracts bonds from a partial response update of the portfolio table.
+
+    A paginated table sends back only the `<tr>` rows of the requested page (along with their tooltip scripts), so
+    there is no need to splice them into the original page and parse it all over again.
+
+    :param str fragment: Contents of the `<update>` element for the table
+    :param str parser: Tree builder to use, see `parse_html`
+    """
+    bs = parse_html(f"<table><tbody>{fragment}</tbody></table>", parser)
+    return extract_bond_rows(bs.find("tbody"), extract_tooltips(fragment))
+
+
+TABLE_ROW_REGEXP = re.compile(r"<tr[\s>]")
+
+
+def count_table_rows(fragment):
+    """Counts `<tr>` rows in a HTML fragment without parsing it."""
+    return len(TABLE_ROW_REGEXP.findall(fragment))
+
+
+def extract_bond_rows(tbody, tooltips):
+    """Extracts bonds from the rows of a portfolio table.
+
+    :param tbody: Table body with the rows
+    :param dict tooltips: Tooltips as returned by `extract_tooltips`
+    """
+    bonds = []
 
     for row in tbody.find_all("tr"):
         tds = row.find_all("td")
@@ -154,7 +304,7 @@ def extract_bonds(bs):
     return bonds
 
 
-@dataclass
+@dataclass(slots=True)
 class AvailableBond:
     emitent: str
     rodzaj: str
@@ -266,25 +416,97 @@ class Redirect(XMLResponse):
 
 
 @dataclass
-class PartialResponse:
+class PartialResponse(XMLResponse):
     id: str
     updates: dict
 
 
-def parse_xml_response(html):
-    bs = BeautifulSoup(html, features="xml")
-    try:
-        if redirect := bs.find("redirect"):
-            yield Redirect(url=redirect.attrs["url"])
-        elif partial_response := bs.find("partial-response"):
-            updates = {}
-            if changes := partial_response.find("changes"):
-                for update in changes.find_all("update"):
-                    updates[update.attrs["id"]] = update.text
-            yield PartialResponse(id=partial_response.attrs["id"], updates=updates)
+class PartialResponseError(RuntimeError):
+    """Malformed partial response, or an error reported by the server in it."""
+
+
+JAVAX_VIEW_STATE_ID = "j_id1:javax.faces.ViewState:0"
+
+CDATA_REGEXP = re.compile(rb"<!\[CDATA\[(.*?)\]\]>", re.DOTALL)
+
+
+def scan_partial_update(content, update_id):
+    """Finds contents of a single `<update>` element of a partial response without parsing the document.
+
+    Cheap enough to pull out the view state (or the rows of a table) while the rest of the response is still
+    waiting to be processed.
+
+    :param content: Raw response body (bytes or str)
+    :param str update_id: Id of the update element
+    :return: Contents of the update, or None if not found
+    """
+    if isinstance(content, str):
+        content = content.encode()
+    if m := re.search(
+        rb'<update id="' + re.escape(update_id.encode()) + rb'">(.*?)</update>',
+        content,
+        re.DOTALL,
+    ):
+        # Nested "]]>" is split by JSF into multiple CDATA sections.
+        if sections := CDATA_REGEXP.findall(m.group(1)):
+            return b"".join(sections).decode()
+    return None
+
+
+def parse_xml_response(content):
+    """Parses a JSF partial response, the answer to every AJAX request.
+
+    The document is processed as a stream of parser events, without building the whole tree first.
+
+    :param content: Raw response body (bytes or str), or an iterable of chunks of it
+    :return: Generator of `Redirect` or `PartialResponse` events
+    :raises PartialResponseError: If the document is malformed, or the server reports an error
+    """
+    if isinstance(content, (bytes, str)):
+        content = [content]
 
-    except AttributeError:
-        print(f"{html}")
+    parser = ElementTree.XMLPullParser(events=("start", "end"))
+    partial_response_id = None
+    redirect = None
+    updates = {}
+    depth = 0
+
+    try:
+        for chunk in content:
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == "start":
+                    depth += 1
+                    if depth == 1:
+                        if element.tag != "partial-response":
+                            raise PartialResponseError(
+                                f"Expected partial-response but found {element.tag!r}"
+                            )
+                        partial_response_id = element.get("id")
+                    continue
+
+                depth -= 1
+                if element.tag == "redirect":
+                    redirect = Redirect(url=element.attrib["url"])
+                elif element.tag == "update":
+                    updates[element.attrib["id"]] = element.text or ""
+                    element.clear()
+                elif element.tag == "error":
+                    raise PartialResponseError(
+                        f"{element.findtext('error-name')}: {element.findtext('error-message')}"
+                    )
+        parser.close()
+    except ElementTree.ParseError as e:
+        raise PartialResponseError(f"Malformed partial response: {e}") from e
+    except KeyError as e:
+        raise PartialResponseError(f"Missing attribute {e} in partial response") from e
+
+    if partial_response_id is None:
+        raise PartialResponseError("Empty partial response")
+    if redirect is not None:
+        yield redirect
+    else:
+        yield PartialResponse(id=partial_response_id, updates=updates)
 
 
 def find_main_form(bs):
@@ -351,8 +573,13 @@ def emisje_parse_wartosc_nominalna_800plus(bs):
         raise RuntimeError(f"Unexpected value for wartosc nominalna: {node.text!r}")
 
 
-def extract_dane_dyspozycji(bs):
-    text = dict(extract_two_columns(bs))
+def extract_dane_dyspozycji(bs, fields=None):
+    """Extracts the details of a purchase order from the first step of a purchase.
+
+    :param bs: Parsed page
+    :param dict fields: Fields of the page as returned by `index_form_fields`, if already built
+    """
+    text = dict(fields if fields is not None else index_form_fields(bs))
     pelna_nazwa_emisji_1 = text.pop("Pełna nazwa emisji").strip()
     pelna_nazwa_emisji_2 = text.pop("").strip()
     oprocentowanie = parse_oprocentowanie(text.pop("Oprocentowanie"))
@@ -386,30 +613,50 @@ def extract_dane_dyspozycji(bs):
     )
 
 
-def extract_two_columns(bs):
-    text = []
-
-    # Gather all the spans with descriptions from left and right column.
-    for span in bs.select(".formlabel-230.formlabel-base"):
-        left_column = span.text.strip()
-        right_column = span.find_next("span").text
-        right_column = " ".join(
-            map(lambda line: line.strip(), right_column.splitlines())
-        )
+FORM_LABEL_CLASSES = {"formlabel-230", "formlabel-base"}
+
+
+def index_form_fields(bs):
+    """Builds an index of all the label/value pairs of a two column form in a single pass.
+
+    Every label span in the left column is followed by a span with its value in the right column.
+
+    :param bs: Parsed page
+    :returns: Dict of label -> value, in the order of the page
+    """
+    fields = {}
+    label = None
 
-        assert left_column not in dict(text)
-        text.append([left_column, right_column])
+    for span in bs.find_all("span"):
+        if label is not None:
+            value = " ".join(line.strip() for line in span.text.splitlines())
+            if label in fields:
+                raise RuntimeError(f"Duplicated form label: {label!r}")
+            fields[label] = value
+            label = None
+        if FORM_LABEL_CLASSES.issubset(span.get("class", ())):
+            label = span.text.strip()
 
-    return text
+    return fields
+
+
+def extract_two_columns(bs):
+    return [[label, value] for label, value in index_form_fields(bs).items()]
 
 
 def extract_purchase_step_title(bs):
     return bs.select("div#content > h3")[0].text
 
 
-def extract_data_przyjecia_zlecenia(bs):
-    text = dict(extract_two_columns(bs))
-    data_przyjecia = text["Data i czas przyjęcia zlecenia:"]
+def extract_data_przyjecia_zlecenia(bs, fields=None):
+    """Extracts the time the purchase order was accepted from the last step of a purchase.
+
+    :param bs: Parsed page
+    :param dict fields: Fields of the page as returned by `index_form_fields`, if already built
+    """
+    if fields is None:
+        fields = index_form_fields(bs)
+    data_przyjecia = fields["Data i czas przyjęcia zlecenia:"]
     return datetime.fromisoformat(data_przyjecia)
 
 
@@ -436,7 +683,7 @@ def parse_duration(input_text):
 RE_KOD_NUMER = re.compile(r"^(\w{3}\d{4})/(\d+)$")
 
 
-@dataclass
+@dataclass(slots=True)
 class History:
     data_dyspozycji: datetime
     rodzaj_dyspozycji: str
@@ -0,0 +1,121 @@
+"""Connection pooling for the public sites (obligacjeskarbowe.pl, finanse.mf.gov.pl), no account needed.
+
+A letter of issue takes a few requests, and a fresh session for every letter pays a TCP and TLS handshake for each
+of them. A single pooled session keeps the connections alive across the letters, and across the workers of a
+concurrent download, as the pools of urllib3 are thread safe.
+"""
+
+import threading
+from dataclasses import dataclass
+
+from requests.adapters import HTTPAdapter
+
+from obligacjeskarbowe.httpcache import cached_response, storable
+
+# Hosts kept in the pool, the public sites are a handful
+DEFAULT_POOL_CONNECTIONS = 4
+# Idle connections kept to a single host, more are opened when needed and closed after their request
+DEFAULT_POOL_MAXSIZE = 10
+
+
+@dataclass(frozen=True, slots=True)
+class PoolStats:
+    requests: int
+    # New connections, every other request reused a kept-alive one
+    connections: int
+
+    @property
+    def reused(self):
+        return max(self.requests - self.connections, 0)
+
+
+class PooledAdapter(HTTPAdapter):
+    """Adapter keeping track of its connection pools, to count the connections reused.
+
+    :param HttpCache cache: Cache of the public pages, revalidated with conditional requests
+    """
+
+    def __init__(self, cache=None, **kwargs):
+        self.cache = cache
+        self.pools_lock = threading.Lock()
+        # Pools of every host, including the ones evicted from the pool manager since
+        self.pools = set()
+        super().__init__(**kwargs)
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        pool = super().get_connection_with_tls_context(
+            request, verify, proxies=proxies, cert=cert
+        )
+        with self.pools_lock:
+            self.pools.add(pool)
+        return pool
+
+    def send(self, request, stream=False, **kwargs):
+        if self.cache is None or stream or not self.cache.cacheable(request):
+            return super().send(request, stream=stream, **kwargs)
+        page = self.cache.get(request.url)
+        if page is not None:
+            request.headers.update(page.validators())
+        response = super().send(request, stream=stream, **kwargs)
+        if page is not None and response.status_code == 304:
+            # No body, reading it hands the connection back to the pool
+            response.content
+            page = self.cache.refresh(page, response.headers)
+            return cached_response(page, request, response)
+        if storable(response):
+            self.cache.put(request.url, response.headers, response.content)
+        elif page is not None and response.status_code == 200:
+            self.cache.discard(request.url)
+        return response
+
+    def stats(self):
+        with self.pools_lock:
+            pools = list(self.pools)
+        return PoolStats(
+            requests=sum(pool.num_requests for pool in pools),
+            connections=sum(pool.num_connections for pool in pools),
+        )
+
+
+def pooled_session(
+    session,
+    pool_connections=DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize=DEFAULT_POOL_MAXSIZE,
+    pool_block=False,
+    cache=None,
+):
+    """Mounts a `PooledAdapter` on a session, for both http and https.
+
+    :param session: `requests.Session` i.e. from `preconfigured_session`
+    :param int pool_connections: Hosts kept in the pool
+    :param int pool_maxsize: Idle connections kept to a single host, at least the number of concurrent requests to
+        a host for all of them to be reused
+    :param bool pool_block: Whether a request waits for one of the `pool_maxsize` connections of its host instead
+        of opening another one, which caps the concurrent requests to every host. A streamed response holds its
+        connection until it is read or closed.
+    :param HttpCache cache: Cache of the public pages, see `obligacjeskarbowe.httpcache`
+    :returns: The session
+    """
+    adapter = PooledAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        cache=cache,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def session_stats(session):
+    """`PoolStats` of the requests sent by a session through its `PooledAdapter`."""
+    adapters = {
+        id(adapter): adapter
+        for adapter in session.adapters.values()
+        if isinstance(adapter, PooledAdapter)
+    }
+    stats = [adapter.stats() for adapter in adapters.values()]
+    return PoolStats(
+        requests=sum(s.requests for s in stats),
+        connections=sum(s.connections for s in stats),
+    )
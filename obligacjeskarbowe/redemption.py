@@ -0,0 +1,126 @@
+"""What redeeming every lot of a portfolio before maturity would cost, on any number of dates at once.
+
+A bond redeemed early pays its current value: the nominal value, the capitalized interest and the interest accrued
+in the current period. The fee of the series is taken from the interest, so it never exceeds the interest accrued,
+and the 19% capital gains tax ("podatek Belki") is due on the interest left after the fee. Redeeming early also
+gives up the interest the lot would earn until its maturity, assuming the last published rate for the periods
+without a rate yet.
+
+Accounts exempt from the tax (IKE) are not handled, the tax is always deducted.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+
+from obligacjeskarbowe.money import Money
+from obligacjeskarbowe.series import series_of
+from obligacjeskarbowe.valuation import Valuation, divide_half_up, to_ordinals
+
+# Capital gains tax, in percent
+TAX_PERCENT = 19
+
+
+@dataclass(slots=True)
+class RedemptionCosts:
+    """Early redemption of every lot, amounts in grosze of shape (dates, lots), multiplied by the bonds of a lot."""
+
+    bonds: list
+    dates: list
+    # Whether the lot can be redeemed before maturity on a date, OTS can't and matured lots have been redeemed already
+    redeemable: np.ndarray
+    # Value paid before the fee and the tax
+    value: np.ndarray
+    fee: np.ndarray
+    tax: np.ndarray
+    # Interest the lot would earn from the date until its maturity, before tax
+    forgone: np.ndarray
+    # Lots of an unknown bond type, left out of the arrays
+    skipped: list = field(default_factory=list)
+
+    @property
+    def net(self):
+        """Cash received after the fee and the tax."""
+        return self.value - self.fee - self.tax
+
+    @property
+    def lost(self):
+        """Fee paid and interest given up by redeeming early."""
+        return self.fee + self.forgone
+
+    def order(self, on=0):
+        """Indices of the redeemable lots, cheapest to redeem first.
+
+        Lots are compared by what is lost for every złoty received, so a large lot isn't put last only because of
+        its size.
+
+        :param int on: Index of the date
+        """
+        (lots,) = np.nonzero(self.redeemable[on])
+        ratio = self.lost[on, lots] / np.maximum(self.net[on, lots], 1)
+        return lots[np.argsort(ratio, kind="stable")].tolist()
+
+    def money(self, amounts, on=0):
+        """Amounts of one date as `Money` of every lot, i.e. `costs.money(costs.net)`."""
+        return [
+            Money.from_grosze(int(grosze), bond.nominalna.currency)
+            for grosze, bond in zip(amounts[on], self.bonds)
+        ]
+
+
+def redemption_costs(bonds, dates):
+    """Computes the cost of redeeming every lot early on every date.
+
+    :param bonds: Iterable of `Bond` i.e. from `ObligacjeSkarbowe.list_portfolio`
+    :param dates: A date, or an iterable of dates
+    :returns: `RedemptionCosts`, without the lots of an unknown bond type (see `RedemptionCosts.skipped`)
+    """
+    if isinstance(dates, date):
+        dates = [dates]
+    dates = list(dates)
+    valuation = Valuation(bonds)
+    lots = len(valuation)
+    fees = [series_of(bond.emisja).redemption_fee_grosze for bond in valuation.bonds]
+
+    days, period = valuation.locate(dates)
+    value = valuation.unit_values(dates)
+    nominal = valuation.start_values[:, 0][None, :]
+    # Interest capitalized in the finished periods plus the interest of the current one, paid out interest excluded.
+    accrued = value - nominal
+
+    redeemable = np.array([fee is not None for fee in fees], dtype=bool)[None, :] & (
+        to_ordinals(dates)[:, None] < valuation.maturity[None, :]
+    )
+    fee = np.where(
+        redeemable,
+        np.minimum(np.array([fee or 0 for fee in fees], dtype=np.int64), accrued),
+        0,
+    )
+    tax = np.where(redeemable, divide_half_up((accrued - fee) * TAX_PERCENT, 100), 0)
+
+    # Interest of the whole periods from every period on, until the maturity.
+    within = (
+        np.arange(valuation.interest.shape[1])[None, :] < valuation.periods[:, None]
+    )
+    remaining = np.cumsum((valuation.interest * within)[:, ::-1], axis=1)[:, ::-1]
+    index = np.arange(lots)[None, :]
+    final = valuation.start_values[index, valuation.periods[None, :]]
+    forgone = np.where(
+        valuation.capitalized[None, :],
+        final - value,
+        remaining[index, period] - accrued,
+    )
+    forgone = np.where(days < valuation.maturity[None, :], forgone, 0)
+
+    count = valuation.count[None, :]
+    return RedemptionCosts(
+        bonds=valuation.bonds,
+        dates=dates,
+        redeemable=redeemable,
+        value=value * count,
+        fee=fee * count,
+        tax=tax * count,
+        forgone=forgone * count,
+        skipped=valuation.skipped,
+    )
@@ -0,0 +1,149 @@
+"""Totals of a portfolio grouped by any of its dimensions, for dashboards running many queries on the same data.
+
+A single pass over the bonds sums them up by all the dimensions at once. Every grouping asked for is then summed up
+from those cells, which are far fewer than the bonds, and kept for the next query. Filtering (drilling down) reuses
+the grouping by the dimensions grouped and filtered by.
+"""
+
+from dataclasses import dataclass
+
+from obligacjeskarbowe.money import DEFAULT_CURRENCY, Money
+from obligacjeskarbowe.series import known_series, series_of
+
+# Bond type, i.e. EDO; year of the purchase; year of the maturity; account label
+DIMENSIONS = ("typ", "rok_zakupu", "wykup", "konto")
+
+
+@dataclass(slots=True)
+class Aggregate:
+    """Sums of a group of lots, amounts in grosze."""
+
+    lots: int = 0
+    dostepnych: int = 0
+    zablokowanych: int = 0
+    nominalna: int = 0
+    aktualna: int = 0
+
+    @property
+    def odsetki(self):
+        """Interest accrued, as reported by the site."""
+        return self.aktualna - self.nominalna
+
+    def add(self, other):
+        self.lots += other.lots
+        self.dostepnych += other.dostepnych
+        self.zablokowanych += other.zablokowanych
+        self.nominalna += other.nominalna
+        self.aktualna += other.aktualna
+
+
+def purchase_year(emisja, data_wykupu):
+    # Same year as `Series.start_date`, without building a date for every lot.
+    months = data_wykupu.year * 12 + data_wykupu.month - 1 - series_of(emisja).months
+    return months // 12
+
+
+def dimensions_of(bond, account):
+    return (
+        bond.emisja[:3],
+        purchase_year(bond.emisja, bond.data_wykupu),
+        bond.data_wykupu.year,
+        account,
+    )
+
+
+class Rollup:
+    """Portfolios of many accounts summed up by `DIMENSIONS`.
+
+    Lots of an unknown bond type have no year of purchase, they are left out of the totals and kept in `skipped`.
+
+    :param portfolios: Dict of account label -> iterable of `Bond`
+    :param str currency: Currency of all the amounts
+    """
+
+    def __init__(self, portfolios, currency=DEFAULT_CURRENCY):
+        self.currency = currency
+        self.skipped = []
+        cells = {}
+        for account, bonds in portfolios.items():
+            for bond in bonds:
+                if not known_series(bond.emisja):
+                    self.skipped.append(bond)
+                    continue
+                for money in (bond.nominalna, bond.aktualna):
+                    if money.currency != currency:
+                        raise ValueError(
+                            f"Expected {currency} but {bond.emisja} is in {money.currency}"
+                        )
+                key = dimensions_of(bond, account)
+                cell = cells.get(key)
+                if cell is None:
+                    cell = cells[key] = Aggregate()
+                cell.lots += 1
+                cell.dostepnych += bond.dostepnych
+                cell.zablokowanych += bond.zablokowanych
+                cell.nominalna += bond.nominalna.grosze
+                cell.aktualna += bond.aktualna.grosze
+        # Groupings by a sorted tuple of dimensions, the finest one is the pass over the bonds
+        self.cache = {DIMENSIONS: cells}
+
+    @classmethod
+    def from_bonds(cls, bonds, account=None, currency=DEFAULT_CURRENCY):
+        return cls({account: bonds}, currency)
+
+    def grouped(self, dimensions):
+        """Cells grouped by the dimensions, computed from the finest cells once."""
+        dimensions = tuple(d for d in DIMENSIONS if d in dimensions)
+        cells = self.cache.get(dimensions)
+        if cells is None:
+            positions = [DIMENSIONS.index(d) for d in dimensions]
+            cells = {}
+            for key, cell in self.cache[DIMENSIONS].items():
+                key = tuple(key[position] for position in positions)
+                group = cells.get(key)
+                if group is None:
+                    group = cells[key] = Aggregate()
+                group.add(cell)
+            self.cache[dimensions] = cells
+        return dimensions, cells
+
+    def query(self, group_by=(), **where):
+        """Totals by the `group_by` dimensions, of the lots matching every `where` dimension.
+
+        i.e. `rollup.query(["rok_zakupu"], typ="EDO")` sums up EDO bonds by the year of purchase.
+
+        :returns: Dict of tuple of dimension values (in the order of `group_by`) -> `Aggregate`, sorted by the keys
+        """
+        for dimension in (*group_by, *where):
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension {dimension!r}")
+        dimensions, cells = self.grouped(set(group_by) | set(where))
+        positions = {d: i for i, d in enumerate(dimensions)}
+        result = {}
+        for key, cell in cells.items():
+            if all(key[positions[d]] == value for d, value in where.items()):
+                result[tuple(key[positions[d]] for d in group_by)] = cell
+        return dict(sorted(result.items(), key=lambda item: sort_key(item[0])))
+
+    def total(self, **where):
+        return self.query((), **where).get((), Aggregate())
+
+    def money(self, grosze):
+        return Money.from_grosze(grosze, self.currency)
+
+
+def parse_condition(text):
+    """Parses a `dimension=value` filter, i.e. `typ=EDO` or `wykup=2030`."""
+    dimension, separator, value = text.partition("=")
+    if not separator or dimension not in DIMENSIONS:
+        raise ValueError(
+            f"Expected one of {', '.join(DIMENSIONS)}=VALUE, received {text!r}"
+        )
+    if dimension in ("rok_zakupu", "wykup"):
+        value = int(value)
+    return dimension, value
+
+
+def sort_key(key):
+    # Account labels may be None
+    return tuple((value is not None, value) for value in key)
@@ -0,0 +1,127 @@
+"""Terms shared by all the emissions of a bond type, as published in the "list emisyjny" of every emission."""
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+
+# Every retail treasury bond is sold at 100 PLN.
+NOMINAL_GROSZE = 100_00
+
+
+@dataclass(frozen=True, slots=True)
+class Series:
+    # Three letter code in front of an emission, i.e. EDO in EDO0135
+    symbol: str
+    # Interest periods until maturity
+    periods: int
+    # Length of a single interest period
+    period_months: int
+    # Whether interest is added to the value of the bond at the end of every period (TOS, EDO, ROS, ROD), or paid
+    # out (OTS at maturity, ROR and DOR monthly, COI yearly)
+    capitalized: bool
+    # Percentage points over the annual CPI paid from the second period on by the inflation indexed bonds (COI, EDO,
+    # ROS, ROD), as offered in the current emissions. None for the fixed and reference rate bonds.
+    margin: Decimal | None = None
+    # Fee per bond redeemed before maturity, capped at the interest accrued so far. None when the bonds can't be
+    # redeemed early (OTS).
+    redemption_fee_grosze: int | None = None
+    # Family bonds (ROS, ROD) can only be bought with the 800+ benefit
+    family: bool = False
+    nominal_grosze: int = NOMINAL_GROSZE
+
+    @property
+    def indexed(self):
+        return self.margin is not None
+
+    @property
+    def months(self):
+        return self.periods * self.period_months
+
+    def start_date(self, data_wykupu):
+        """Day the bond was bought, which is when its first interest period begins."""
+        return data_wykupu - relativedelta(months=self.months)
+
+    def period_boundaries(self, data_wykupu):
+        """Dates every interest period starts at, followed by the maturity date."""
+        start = self.start_date(data_wykupu)
+        return [
+            start + relativedelta(months=period * self.period_months)
+            for period in range(self.periods + 1)
+        ]
+
+
+SERIES = {
+    series.symbol: series
+    for series in (
+        Series("OTS", periods=1, period_months=3, capitalized=False),
+        Series(
+            "ROR",
+            periods=12,
+            period_months=1,
+            capitalized=False,
+            redemption_fee_grosze=50,
+        ),
+        Series(
+            "DOR",
+            periods=24,
+            period_months=1,
+            capitalized=False,
+            redemption_fee_grosze=70,
+        ),
+        Series(
+            "TOS",
+            periods=3,
+            period_months=12,
+            capitalized=True,
+            redemption_fee_grosze=70,
+        ),
+        Series(
+            "COI",
+            periods=4,
+            period_months=12,
+            capitalized=False,
+            margin=Decimal("1.50"),
+            redemption_fee_grosze=70,
+        ),
+        Series(
+            "EDO",
+            periods=10,
+            period_months=12,
+            capitalized=True,
+            margin=Decimal("2.00"),
+            redemption_fee_grosze=200,
+        ),
+        Series(
+            "ROS",
+            periods=6,
+            period_months=12,
+            capitalized=True,
+            margin=Decimal("2.00"),
+            redemption_fee_grosze=70,
+            family=True,
+        ),
+        Series(
+            "ROD",
+            periods=12,
+            period_months=12,
+            capitalized=True,
+            margin=Decimal("2.50"),
+            redemption_fee_grosze=200,
+            family=True,
+        ),
+    )
+}
+
+
+def known_series(emisja):
+    """Whether the terms of an emission are known, new bond types are missing until added to `SERIES`."""
+    return emisja[:3] in SERIES
+
+
+def series_of(emisja):
+    """Looks up the terms of an emission, i.e. EDO0135."""
+    try:
+        return SERIES[emisja[:3]]
+    except KeyError:
+        raise ValueError(f"Unknown bond type of {emisja!r}") from None
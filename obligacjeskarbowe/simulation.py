@@ -0,0 +1,144 @@
+"""Monte Carlo simulation of the value at maturity of the bonds currently on offer.
+
+The first period rate of every offered bond is known (`AvailableBond.oprocentowanie`). From the second period on, the
+inflation indexed bonds (COI, EDO, ROS, ROD) pay the annual CPI published two months before the period starts plus
+the margin of the series, or just the margin when the CPI is negative. The CPI is simulated as a mean reverting AR(1)
+process, month by month, for many paths at once; every bond is valued on the same paths so the series can be
+compared with each other.
+
+Fixed rate bonds (OTS, TOS) have a single outcome. Reference rate bonds (ROR, DOR) are assumed to keep their first
+period rate, as the NBP reference rate is not modelled.
+
+Paths are split into chunks with an independent seed each (`numpy.random.SeedSequence.spawn`), so a given seed gives
+the same results whether the chunks run in this process or in a process pool.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from obligacjeskarbowe.series import Series, series_of
+
+# Rate of a period follows the annual CPI published for the month this many months before the period starts.
+CPI_LAG_MONTHS = 2
+# Paths simulated by a single task, small enough to keep a chunk of 12 years of CPI at around 10 MB.
+CHUNK_SIZE = 10_000
+
+
+@dataclass(frozen=True, slots=True)
+class CpiModel:
+    """Annual CPI in percent, reverting month by month towards its long term mean.
+
+    :param float current: Last published annual CPI
+    :param float mean: Long term mean, the inflation target by default
+    :param float persistence: Part of the distance from the mean carried over to the next month
+    :param float volatility: Standard deviation of the monthly shock, in percentage points
+    """
+
+    current: float
+    mean: float = 2.5
+    persistence: float = 0.97
+    volatility: float = 0.35
+
+    def paths(self, rng, count, months):
+        """Simulated CPI of every month after the purchase, of shape (months, count). Month 0 is the current CPI."""
+        cpi = rng.standard_normal((months, count))
+        cpi *= self.volatility
+        cpi[0] = self.current
+        for month in range(1, months):
+            cpi[month] += self.mean + self.persistence * (cpi[month - 1] - self.mean)
+        return cpi
+
+
+@dataclass(slots=True)
+class Outcome:
+    """Simulated value of a single bond at maturity, in grosze, before tax."""
+
+    emisja: str
+    series: Series
+    # One value per path. Interest paid out during the life of a bond (COI, ROR, DOR) is added without reinvesting.
+    payoffs: np.ndarray
+
+    def mean(self):
+        return float(self.payoffs.mean())
+
+    def percentiles(self, q=(5, 50, 95)):
+        return np.percentile(self.payoffs, q)
+
+    def annualized(self):
+        """Annualized return of every path, as a fraction."""
+        growth = self.payoffs / self.series.nominal_grosze
+        return growth ** (12 / self.series.months) - 1
+
+
+def round_grosze(grosze):
+    """Rounds to grosze half up, the way the issuer rounds interest (values are never negative)."""
+    return np.floor(grosze + 0.5)
+
+
+def bond_payoffs(series, first_rate, cpi):
+    """Value at maturity of a single bond on every simulated path.
+
+    :param Series series: Terms of the bond
+    :param float first_rate: Rate of the first period, in percent
+    :param cpi: Simulated CPI of shape (months, paths), see `CpiModel.paths`
+    """
+    paths = cpi.shape[1]
+    value = np.full(paths, float(series.nominal_grosze))
+    coupons = np.zeros(paths)
+    years = series.period_months / 12
+    for period in range(series.periods):
+        if period == 0 or not series.indexed:
+            rate = np.full(paths, first_rate)
+        else:
+            published = cpi[period * series.period_months - CPI_LAG_MONTHS]
+            rate = np.maximum(published, 0) + float(series.margin)
+        interest = round_grosze(value * rate / 100 * years)
+        if series.capitalized:
+            value += interest
+        else:
+            coupons += interest
+    return value + coupons
+
+
+def simulate_chunk(terms, model, seed, count, months):
+    """Simulates a chunk of paths, returns the payoffs of every bond of shape (bonds, count)."""
+    cpi = model.paths(np.random.default_rng(seed), count, months)
+    return np.stack([bond_payoffs(series, rate, cpi) for series, rate in terms])
+
+
+def simulate(bonds, model, paths=100_000, seed=None, workers=None):
+    """Simulates the value at maturity of bonds bought today.
+
+    :param bonds: Iterable of `AvailableBond` i.e. `ObligacjeSkarbowe.list_bonds().emisje`
+    :param CpiModel model: CPI scenarios
+    :param int paths: Number of simulated paths
+    :param seed: Seed for reproducible results, fresh entropy by default
+    :param int workers: Run the chunks in a pool of this many processes, in this process by default
+    :returns: List of `Outcome` in the order of the bonds
+    """
+    bonds = list(bonds)
+    terms = [(series_of(bond.emisja), float(bond.oprocentowanie)) for bond in bonds]
+    months = max((series.months for series, _ in terms), default=1)
+
+    counts = [min(CHUNK_SIZE, paths - start) for start in range(0, paths, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    arguments = (
+        [terms] * len(counts),
+        [model] * len(counts),
+        seeds,
+        counts,
+        [months] * len(counts),
+    )
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(simulate_chunk, *arguments))
+    else:
+        chunks = list(map(simulate_chunk, *arguments))
+
+    payoffs = np.concatenate(chunks, axis=1) if chunks else np.empty((len(bonds), 0))
+    return [
+        Outcome(emisja=bond.emisja, series=series, payoffs=payoffs[i])
+        for i, (bond, (series, _)) in enumerate(zip(bonds, terms))
+    ]
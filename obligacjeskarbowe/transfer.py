@@ -0,0 +1,163 @@
+"""Streaming a file to disk, chunk by chunk, so memory stays flat whatever its size.
+
+The file is written next to its destination with a `.part` suffix and renamed into place once complete, so an
+interrupted transfer never leaves a truncated file behind. The next transfer of the same file asks only for the
+missing bytes (HTTP Range). The request is conditional (If-Range) on the ETag or Last-Modified date of the first
+response, saved next to the `.part` file with the URL it came from. The bytes of an older version of the file, or
+of a file from another URL, are never completed with the bytes of another one. The SHA-256 of the file is computed
+while it is written.
+"""
+
+import contextlib
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+
+import requests
+
+PART_SUFFIX = ".part"
+# Next to the `.part` file, the URL and the validator of the response it was written from
+VALIDATOR_SUFFIX = ".validator"
+CHUNK_SIZE = 64 * 1024
+
+CONTENT_RANGE_REGEX = re.compile(r"^bytes (?:(\d+)-\d+|\*)/(\d+|\*)$")
+
+
+@dataclass(frozen=True, slots=True)
+class Transfer:
+    filename: str
+    size: int
+    sha256: str
+    # Bytes kept from an interrupted transfer
+    resumed: int = 0
+
+
+def hash_file(filename, chunk_size=CHUNK_SIZE):
+    """Size and running SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(filename, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest
+
+
+def content_range(response):
+    """First byte and total size of a `Content-Range` header, either one None when not given."""
+    match = CONTENT_RANGE_REGEX.match(response.headers.get("Content-Range", ""))
+    if not match:
+        return None, None
+    first, total = match.groups()
+    return (
+        int(first) if first is not None else None,
+        int(total) if total != "*" else None,
+    )
+
+
+def validator_of(response):
+    """Validator of a response usable with If-Range: a strong ETag, or else the Last-Modified date, or None."""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def source_of(url, params):
+    """URL a transfer is requested from, query parameters included."""
+    return requests.Request("GET", url, params=params).prepare().url
+
+
+def read_validator(part, source):
+    """Validator saved next to a `.part` file, None when missing or when the part came from another URL."""
+    with contextlib.suppress(FileNotFoundError):
+        with open(part + VALIDATOR_SUFFIX, encoding="utf-8") as f:
+            saved, _, validator = f.read().partition("\n")
+        if saved == source:
+            return validator or None
+    return None
+
+
+def write_validator(part, source, validator):
+    if validator is None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(part + VALIDATOR_SUFFIX)
+        return
+    with open(part + VALIDATOR_SUFFIX, "w", encoding="utf-8") as f:
+        f.write(f"{source}\n{validator}")
+
+
+def discard_part(filename):
+    """Removes the `.part` file of an interrupted transfer, and its validator."""
+    part = filename + PART_SUFFIX
+    for name in (part, part + VALIDATOR_SUFFIX):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(name)
+
+
+def request(session, url, params, offset, validator=None):
+    # Ranges count bytes as sent, a compressed body would shift them
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        # The server sends the whole file instead when it changed since
+        headers["If-Range"] = validator
+    return session.get(url, params=params, headers=headers, stream=True)
+
+
+def stream_to_file(
+    session, url, filename, params=None, resume=True, chunk_size=CHUNK_SIZE
+):
+    """Downloads a URL into a file, resuming an interrupted transfer of it.
+
+    :param session: `requests.Session` to download with
+    :param str url: URL of the file
+    :param str filename: Destination, replaced once the file is complete
+    :param dict params: Query parameters of the URL
+    :param bool resume: Whether to keep the bytes of an interrupted transfer. A `.part` file without a validator,
+        or from another URL, is downloaded again.
+    :returns: `Transfer`
+    :raises requests.exceptions.HTTPError: When the server responds with an error, the `.part` file is kept
+    """
+    part = filename + PART_SUFFIX
+    source = source_of(url, params)
+    offset, digest = 0, hashlib.sha256()
+    validator = read_validator(part, source) if resume else None
+    if validator is not None and os.path.exists(part):
+        offset, digest = hash_file(part, chunk_size)
+
+    response = request(session, url, params, offset, validator)
+    if offset:
+        first, total = content_range(response)
+        if response.status_code == 416:
+            response.close()
+            if total == offset and validator_of(response) == validator:
+                # Interrupted after the last byte, before the rename
+                os.replace(part, filename)
+                write_validator(part, source, None)
+                return Transfer(filename, offset, digest.hexdigest(), resumed=offset)
+            # The part is longer than the file, or of another version of it
+            offset, digest = 0, hashlib.sha256()
+            response = request(session, url, params, offset)
+        elif response.status_code == 206 and first != offset:
+            response.close()
+            offset, digest = 0, hashlib.sha256()
+            response = request(session, url, params, offset)
+        elif response.status_code != 206:
+            # The whole file, the server ignores ranges or the file changed since
+            offset, digest = 0, hashlib.sha256()
+
+    resumed = offset
+    with response:
+        response.raise_for_status()
+        if not offset:
+            write_validator(part, source, validator_of(response))
+        with open(part, "ab" if offset else "wb") as out:
+            for chunk in response.iter_content(chunk_size):
+                digest.update(chunk)
+                out.write(chunk)
+                offset += len(chunk)
+    os.replace(part, filename)
+    write_validator(part, source, None)
+    return Transfer(filename, offset, digest.hexdigest(), resumed=resumed)
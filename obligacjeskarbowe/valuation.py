@@ -0,0 +1,179 @@
+"""Value of every lot of a portfolio on any number of dates, computed for all the lots at once.
+
+Every `Bond` row of the portfolio (a lot) is laid out as a row of NumPy arrays: its interest period boundaries, the
+annual rate of every period, and the value of a single bond at the start of every period. Valuing the whole
+portfolio on a set of dates is then a handful of array operations, regardless of the number of lots.
+
+Values follow the terms of the emissions: interest accrues linearly over the days of a period, and capitalized
+bonds add the interest of every finished period to their value, rounded to grosze. Periods without a published
+rate yet (the future periods of floating rate bonds) are assumed to keep the last published rate.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from obligacjeskarbowe.columnar import RATE_PLACES, to_fixed
+from obligacjeskarbowe.money import Money
+from obligacjeskarbowe.parser import Bond
+from obligacjeskarbowe.series import known_series, series_of
+
+
+# Rates are kept as integers in 1/10000 of a percent, so all the arithmetic below is exact.
+RATE_SCALE = 100 * 10**RATE_PLACES
+
+
+def divide_half_up(numerator, denominator):
+    """Integer division rounding half up, the way the issuer rounds interest to grosze (values are never negative)."""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def to_ordinals(dates):
+    if isinstance(dates, date):
+        dates = [dates]
+    return np.fromiter((d.toordinal() for d in dates), dtype=np.int64)
+
+
+@dataclass(slots=True)
+class Discrepancy:
+    """A lot whose value differs from the value reported by the site."""
+
+    bond: Bond
+    reported: Money
+    computed: Money
+
+    @property
+    def difference(self):
+        return self.computed - self.reported
+
+
+class Valuation:
+    """Portfolio laid out for valuation, see the module docstring.
+
+    Lots of an unknown bond type (see `known_series`) can't be valued, they are left out of `bonds` and kept in
+    `skipped` instead.
+
+    :param bonds: Iterable of `Bond` i.e. from `ObligacjeSkarbowe.iter_portfolio`
+    """
+
+    def __init__(self, bonds):
+        self.bonds = []
+        self.skipped = []
+        for bond in bonds:
+            (self.bonds if known_series(bond.emisja) else self.skipped).append(bond)
+        series = [series_of(bond.emisja) for bond in self.bonds]
+        lots = len(self.bonds)
+        width = max((s.periods for s in series), default=1)
+
+        self.count = np.array(
+            [bond.dostepnych + bond.zablokowanych for bond in self.bonds],
+            dtype=np.int64,
+        )
+        self.periods = np.array([s.periods for s in series], dtype=np.int64)
+        self.period_months = np.array([s.period_months for s in series], dtype=np.int64)
+        self.capitalized = np.array([s.capitalized for s in series], dtype=bool)
+        nominal = np.array([s.nominal_grosze for s in series], dtype=np.int64)
+
+        # Boundaries of the periods as date ordinals. Rows of shorter series are padded with their maturity, so
+        # a period past the end of a series has no days.
+        self.boundaries = np.empty((lots, width + 1), dtype=np.int64)
+        # Annual rate of every period, see RATE_SCALE.
+        self.rates = np.empty((lots, width), dtype=np.int64)
+        for lot, (bond, s) in enumerate(zip(self.bonds, series)):
+            boundaries = [d.toordinal() for d in s.period_boundaries(bond.data_wykupu)]
+            self.boundaries[lot, : s.periods + 1] = boundaries
+            self.boundaries[lot, s.periods + 1 :] = boundaries[-1]
+            rates = [
+                to_fixed(okres.oprocentowanie, RATE_PLACES) for okres in bond.okresy
+            ]
+            rates = rates[: s.periods]
+            self.rates[lot, : len(rates)] = rates
+            self.rates[lot, len(rates) :] = rates[-1]
+
+        # Value of a single bond at the start of every period, in grosze. Bonds paying out their interest are
+        # worth their nominal value at the start of every period.
+        self.start_values = np.empty((lots, width + 1), dtype=np.int64)
+        # Interest of a single bond for every whole period, in grosze.
+        self.interest = np.empty((lots, width), dtype=np.int64)
+        self.start_values[:, 0] = nominal
+        for period in range(width):
+            value = self.start_values[:, period]
+            self.interest[:, period] = divide_half_up(
+                value * self.rates[:, period] * self.period_months, RATE_SCALE * 12
+            )
+            self.start_values[:, period + 1] = np.where(
+                self.capitalized, value + self.interest[:, period], nominal
+            )
+
+        self.maturity = self.boundaries[np.arange(lots), self.periods]
+
+    def __len__(self):
+        return len(self.bonds)
+
+    def locate(self, dates):
+        """Finds the interest period of every lot on every date.
+
+        :param dates: A date, or an iterable of dates
+        :returns: Tuple of day ordinals (capped at the maturity of every lot) and period indices, both of shape
+            (dates, lots)
+        """
+        days = np.minimum(to_ordinals(dates)[:, None], self.maturity[None, :])
+
+        # The loop runs over the (few) periods, not the lots.
+        period = np.zeros(days.shape, dtype=np.int64)
+        for boundary in self.boundaries[:, 1:-1].T:
+            period += boundary[None, :] <= days
+        return days, np.minimum(period, self.periods[None, :] - 1)
+
+    def unit_values(self, dates):
+        """Value of a single bond of every lot, in grosze.
+
+        :param dates: A date, or an iterable of dates
+        :returns: Array of shape (dates, lots). Past the maturity a bond keeps the value it was redeemed at.
+        """
+        days, period = self.locate(dates)
+        lots = np.arange(len(self))[None, :]
+        begins = self.boundaries[lots, period]
+        ends = self.boundaries[lots, period + 1]
+        elapsed = np.clip(days - begins, 0, None)
+        value = self.start_values[lots, period]
+        interest = divide_half_up(
+            value * self.rates[lots, period] * self.period_months[None, :] * elapsed,
+            RATE_SCALE * 12 * (ends - begins),
+        )
+        return value + interest
+
+    def lot_values(self, dates):
+        """Value of every lot (a single bond times the number of bonds held), in grosze, of shape (dates, lots)."""
+        return self.unit_values(dates) * self.count[None, :]
+
+    def totals(self, dates):
+        """Value of the whole portfolio on every date."""
+        return [
+            Money.from_grosze(int(total))
+            for total in self.lot_values(dates).sum(axis=1)
+        ]
+
+    def reconcile(self, on=None, tolerance=1):
+        """Compares the computed value of every lot with the `aktualna` value reported by the site.
+
+        :param date on: Day the portfolio was fetched on, today by default
+        :param int tolerance: Accepted difference per bond, in grosze
+        :returns: List of `Discrepancy` of the lots off by more than the tolerance
+        """
+        computed = self.lot_values(on or date.today())[0]
+        reported = np.array(
+            [bond.aktualna.grosze for bond in self.bonds], dtype=np.int64
+        )
+        mismatched = np.flatnonzero(
+            np.abs(computed - reported) > tolerance * self.count
+        )
+        return [
+            Discrepancy(
+                bond=self.bonds[lot],
+                reported=self.bonds[lot].aktualna,
+                computed=Money.from_grosze(int(computed[lot])),
+            )
+            for lot in mismatched
+        ]
@@ -0,0 +1,90 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves `server.body` over kept-alive connections, honouring ranges (If-Range unless `server.if_range` is
+    False) and `server.etag` when set."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(dict(self.headers))
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            time.sleep(server.delay)
+            self.respond(server.body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def respond(self, body):
+        if self.path.startswith("/missing"):
+            self.send_error(404)
+            return
+        etag = self.server.etag
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        start = 0
+        header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if (
+            header
+            and self.server.ranges
+            and (if_range is None or if_range == etag or not self.server.if_range)
+        ):
+            start = int(header.removeprefix("bytes=").rstrip("-"))
+            if start >= len(body):
+                self.send_response(416)
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        self.wfile.write(body[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Local HTTP server of a PDF, see `Handler`."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.body = bytes(range(256)) * 1000
+    server.ranges = True
+    server.if_range = True
+    server.etag = None
+    server.delay = 0
+    server.lock = threading.Lock()
+    server.requests = []
+    server.active = 0
+    server.peak = 0
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
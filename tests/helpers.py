@@ -0,0 +1,38 @@
+"""Builders of the bonds and offers shared by the tests."""
+
+import datetime
+from decimal import Decimal
+
+from obligacjeskarbowe.money import Money
+from obligacjeskarbowe.parser import AvailableBond, Bond, InterestPeriod
+
+
+def bond(emisja, rates, data_wykupu, count=1, aktualna="0"):
+    """A lot of the portfolio, with one rate per published interest period."""
+    return Bond(
+        emisja=emisja,
+        dostepnych=count,
+        zablokowanych=0,
+        nominalna=Money(Decimal(100 * count)),
+        aktualna=Money(Decimal(aktualna)),
+        okresy=tuple(
+            InterestPeriod(okres, Decimal(rate))
+            for okres, rate in enumerate(rates, start=1)
+        ),
+        data_wykupu=data_wykupu,
+    )
+
+
+def available_bond(rodzaj, emisja, oprocentowanie):
+    """An offer of the current month."""
+    return AvailableBond(
+        emitent="Skarb Państwa",
+        rodzaj=rodzaj,
+        emisja=emisja,
+        okres_sprzedazy_od=datetime.date(2025, 4, 1),
+        okres_sprzedazy_do=datetime.date(2025, 4, 30),
+        oprocentowanie=Decimal(oprocentowanie),
+        list_emisyjny=f"http://www.obligacjeskarbowe.pl/listy-emisyjne/?id={emisja}",
+        wybierz={},
+        path="/foo.html",
+    )
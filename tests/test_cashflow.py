@@ -0,0 +1,72 @@
+import datetime
+from decimal import Decimal
+
+from obligacjeskarbowe.cashflow import INTEREST, REDEMPTION, CashFlowCalendar
+from obligacjeskarbowe.money import Money
+from tests.helpers import bond
+
+COI = bond("COI0127", ["7", "6"], datetime.date(2027, 1, 20), count=5)
+TOS = bond("TOS0126", ["6.5"], datetime.date(2026, 1, 12), count=2)
+ROR = bond("ROR0226", ["5.75"], datetime.date(2026, 2, 3))
+
+
+def test_calendar():
+    calendar = CashFlowCalendar.from_portfolios({"IKE": [COI], None: [TOS, ROR]})
+    # 4 coupons and the nominal value of COI, TOS at maturity, 12 coupons and the nominal value of ROR
+    assert len(calendar) == 5 + 1 + 13
+
+    flows = calendar.between(datetime.date(2026, 1, 1), datetime.date(2026, 1, 31))
+    assert [(f.day, f.emisja, f.kind, f.amount, f.account) for f in flows] == [
+        (datetime.date(2026, 1, 3), "ROR0226", INTEREST, Money(Decimal("0.48")), None),
+        # 2 bonds capitalized at 6.5% for 3 years
+        (
+            datetime.date(2026, 1, 12),
+            "TOS0126",
+            REDEMPTION,
+            Money(Decimal("241.58")),
+            None,
+        ),
+        # 5 bonds paying 6% of 100 PLN
+        (
+            datetime.date(2026, 1, 20),
+            "COI0127",
+            INTEREST,
+            Money(Decimal("30.00")),
+            "IKE",
+        ),
+    ]
+    # Rates of the last periods are not published yet
+    assert [f.estimated for f in flows] == [True, True, True]
+    (first,) = calendar.upcoming(datetime.date(2000, 1, 1), 1)
+    assert (first.day, first.emisja, first.estimated) == (
+        datetime.date(2024, 1, 20),
+        "COI0127",
+        False,
+    )
+    assert calendar.total(
+        datetime.date(2026, 1, 1), datetime.date(2026, 1, 31)
+    ) == Money(Decimal("272.06"))
+
+    upcoming = calendar.upcoming(datetime.date(2026, 2, 1), 3)
+    assert [(f.day, f.emisja, f.kind) for f in upcoming] == [
+        (datetime.date(2026, 2, 3), "ROR0226", INTEREST),
+        (datetime.date(2026, 2, 3), "ROR0226", REDEMPTION),
+        (datetime.date(2027, 1, 20), "COI0127", INTEREST),
+    ]
+
+
+def test_calendar_skips_unknown_series():
+    unknown = bond("XYZ0127", ["7"], datetime.date(2027, 1, 20))
+    calendar = CashFlowCalendar.from_portfolios({"IKE": [COI, unknown], None: [TOS]})
+    assert len(calendar) == 5 + 1
+    assert calendar.skipped == [unknown]
+
+
+def test_calendar_monthly():
+    calendar = CashFlowCalendar.from_portfolios({None: [TOS, ROR]})
+    assert calendar.monthly(datetime.date(2025, 12, 15), datetime.date(2026, 2, 2)) == [
+        (datetime.date(2025, 12, 1), Money(Decimal("0"))),
+        (datetime.date(2026, 1, 1), Money(Decimal("242.06"))),
+        (datetime.date(2026, 2, 1), Money(Decimal("0"))),
+    ]
+    assert calendar.between(datetime.date(2030, 1, 1), datetime.date(2031, 1, 1)) == []
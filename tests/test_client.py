@@ -0,0 +1,115 @@
+import itertools
+import logging
+
+import pytest
+import requests
+
+from benchmarks.pagination import StanRachunkuServer
+from obligacjeskarbowe.client import ObligacjeSkarbowe
+
+
+class RepeatingServer(StanRachunkuServer):
+    """Renders the first rows whatever page is requested."""
+
+    def render_rows(self, first, count):
+        return super().render_rows(0, count)
+
+
+def client_of(server):
+    client = ObligacjeSkarbowe()
+    client.session = server
+    return client
+
+
+def server(rows, **kwargs):
+    return StanRachunkuServer(rows, latency=0, per_row=0, **kwargs)
+
+
+def names(bonds):
+    return [bond.emisja for bond in bonds]
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_iter_portfolio(pipelined):
+    stan = server(95)
+    bonds = list(client_of(stan).iter_portfolio(pipelined=pipelined))
+    assert names(bonds) == [f"EDO{i:04d}" for i in range(95)]
+    # The page of the GET, 4 pages of 20 rows and an empty one. Every POST sends the view state of the previous
+    # response, which the server asserts.
+    assert stan.round_trips == 1 + 5
+    assert stan.view_state == 1 + 5
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_iter_portfolio_stops_early(pipelined):
+    stan = server(95)
+    bonds = client_of(stan).iter_portfolio(pipelined=pipelined)
+    assert names(itertools.islice(bonds, 20)) == [f"EDO{i:04d}" for i in range(20)]
+    # Only the page of the GET
+    assert stan.round_trips == 1
+    assert names(itertools.islice(bonds, 5)) == [f"EDO{i:04d}" for i in range(20, 25)]
+    assert stan.round_trips == 2 + pipelined
+
+
+def test_iter_portfolio_per_page():
+    stan = server(95)
+    bonds = list(client_of(stan).iter_portfolio(per_page=50))
+    assert len(bonds) == 95
+    # Rows 20-69, 70-94 and an empty page
+    assert stan.round_trips == 1 + 3
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_iter_portfolio_adaptive_falls_back(pipelined):
+    stan = server(250, reject_above=100)
+    bonds = list(client_of(stan).iter_portfolio(adaptive=True, pipelined=pipelined))
+    assert names(bonds) == [f"EDO{i:04d}" for i in range(250)]
+    # 500 and 200 rejected once, then pages of 100 rows: 20-119, 120-219, 220-249 and an empty one
+    assert stan.round_trips == 1 + 2 + 4
+
+
+def test_iter_portfolio_adaptive_rejected_everywhere():
+    stan = server(250, reject_above=10)
+    with pytest.raises(requests.exceptions.HTTPError):
+        list(client_of(stan).iter_portfolio(adaptive=True))
+
+
+def test_iter_portfolio_adaptive_capped(caplog):
+    caplog.set_level(logging.INFO)
+    stan = server(250, cap=60)
+    bonds = list(client_of(stan).iter_portfolio(adaptive=True))
+    assert names(bonds) == [f"EDO{i:04d}" for i in range(250)]
+    # Pages of 60 rows: 20-79, 80-139, 140-199, 200-249 and an empty one
+    assert stan.round_trips == 1 + 5
+    # Once, the last page is short because the portfolio ends there
+    assert [r.getMessage() for r in caplog.records] == ["Page size 500 capped to 60"]
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_iter_portfolio_last_page_is_not_a_cap(caplog, pipelined):
+    caplog.set_level(logging.INFO)
+    stan = server(250)
+    bonds = list(client_of(stan).iter_portfolio(adaptive=True, pipelined=pipelined))
+    assert len(bonds) == 250
+    # Rows 20-249 and an empty page
+    assert stan.round_trips == 1 + 2
+    assert caplog.records == []
+
+
+def test_iter_portfolio_duplicate_bond():
+    stan = RepeatingServer(95, latency=0, per_row=0)
+    with pytest.raises(RuntimeError, match="Duplicate bond"):
+        list(client_of(stan).iter_portfolio())
+
+
+def pool_options(client):
+    adapter = client.public_session.get_adapter("https://www.obligacjeskarbowe.pl/")
+    return adapter.poolmanager.connection_pool_kw
+
+
+def test_public_session_per_host():
+    options = pool_options(ObligacjeSkarbowe(per_host=3))
+    assert (options["maxsize"], options["block"]) == (3, True)
+    assert not pool_options(ObligacjeSkarbowe())["block"]
+    with pytest.raises(ValueError):
+        ObligacjeSkarbowe(per_host=0)
@@ -0,0 +1,88 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from obligacjeskarbowe.columnar import HistoryTable, PortfolioTable
+from obligacjeskarbowe.parser import Bond, History, InterestPeriod, Money
+
+BONDS = [
+    Bond(
+        emisja="ZXCV4567",
+        dostepnych=999,
+        zablokowanych=0,
+        nominalna=Money(amount=Decimal("111111.11"), currency="PLN"),
+        aktualna=Money(amount=Decimal("333333.33"), currency="PLN"),
+        okresy=(
+            InterestPeriod(okres=1, oprocentowanie=Decimal("12.55")),
+            InterestPeriod(okres=2, oprocentowanie=Decimal("5.55")),
+        ),
+        data_wykupu=datetime.date(2033, 8, 1),
+    ),
+    Bond(
+        emisja="ASDF5555",
+        dostepnych=666,
+        zablokowanych=0,
+        nominalna=Money(amount=Decimal("555555.55"), currency="PLN"),
+        aktualna=Money(amount=Decimal("99999.99"), currency="PLN"),
+        okresy=(
+            InterestPeriod(okres=1, oprocentowanie=Decimal("7.5")),
+            InterestPeriod(okres=2, oprocentowanie=Decimal("69")),
+            InterestPeriod(okres=3, oprocentowanie=Decimal("6.05")),
+        ),
+        data_wykupu=datetime.date(2043, 10, 25),
+    ),
+]
+
+
+def test_portfolio_table():
+    table = PortfolioTable.from_rows(BONDS)
+    assert len(table) == 2
+    assert list(table) == BONDS
+    assert table[-1] == BONDS[1]
+    assert table[1:] == BONDS[1:]
+    assert str(table[1].okresy[1].oprocentowanie) == "69"
+    assert table.total_nominalna() == Money(Decimal("666666.66"), "PLN")
+    assert table.total_aktualna() == Money(Decimal("433333.32"), "PLN")
+    with pytest.raises(IndexError):
+        table[2]
+
+
+def test_portfolio_table_rejects_lossy_values():
+    table = PortfolioTable.from_rows(BONDS[:1])
+    bond = Bond(
+        emisja="QWER0101",
+        dostepnych=1,
+        zablokowanych=0,
+        nominalna=Money(amount=Decimal("100.00"), currency="PLN"),
+        aktualna=Money(amount=Decimal("100.00"), currency="PLN"),
+        okresy=(InterestPeriod(okres=1, oprocentowanie=Decimal("6.80001")),),
+        data_wykupu=datetime.date(2035, 1, 1),
+    )
+    with pytest.raises(ValueError):
+        table.append(bond)
+    bond.nominalna = Money(amount=Decimal("100.00"), currency="EUR")
+    with pytest.raises(ValueError):
+        table.append(bond)
+    assert list(table) == BONDS[:1]
+
+
+def test_history_table():
+    history = [
+        History(
+            data_dyspozycji=datetime.date(2024, 1, 1) + datetime.timedelta(days=i),
+            rodzaj_dyspozycji="dyspozycja zakupu",
+            kod_obligacji=f"EDO{i:04d}/{i}",
+            nr_zapisu=i,
+            seria=i % 100,
+            liczba_obligacji=10,
+            kwota_operacji=Decimal("1000.00"),
+            status="zrealizowana",
+            uwagi=f"uwaga {i}",
+        )
+        for i in range(300)
+    ]
+    table = HistoryTable.from_rows(history)
+    assert list(table) == history
+    assert table.uwagi.codes.typecode == "I"
+    assert table.status.values == ["zrealizowana"]
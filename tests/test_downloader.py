@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from obligacjeskarbowe.downloader import Download, Failure, download_all
+from obligacjeskarbowe.pool import pooled_session
+from obligacjeskarbowe.transfer import Transfer
+
+
+class FakeClient:
+    """Downloads letters without network, keeping track of how many are in flight."""
+
+    def __init__(self, failing=(), delay=0.01, barrier=None):
+        self.failing = set(failing)
+        self.delay = delay
+        # Holds every letter until as many are in flight as the barrier expects
+        self.barrier = barrier
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.sessions = set()
+        self.public_session = pooled_session(requests.Session())
+
+    def save_pdf(self, bond_name, filename, session=None):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.sessions.add(id(session))
+        try:
+            if self.barrier is not None:
+                self.barrier.wait(timeout=5)
+            time.sleep(self.delay)
+            if bond_name in self.failing:
+                raise RuntimeError(f"Bond letter of issuance for {bond_name} not found")
+            body = f"%PDF {bond_name}".encode()
+            with open(filename, "wb") as out:
+                out.write(body)
+            return Transfer(filename, len(body), "0" * 64)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def downloads(tmp_path, count):
+    return [
+        Download(name=f"EDO{index:04d}", filename=str(tmp_path / f"EDO{index:04d}.pdf"))
+        for index in range(count)
+    ]
+
+
+def test_download_all_writes_every_letter(tmp_path):
+    client = FakeClient(delay=0, barrier=threading.Barrier(4))
+    queue = downloads(tmp_path, 12)
+    finished = []
+    report = download_all(
+        client,
+        queue,
+        workers=4,
+        progress=lambda download, result: finished.append(
+            (threading.current_thread(), download, result)
+        ),
+    )
+    assert report.failures == []
+    for download in queue:
+        with open(download.filename, "rb") as f:
+            assert f.read() == f"%PDF {download.name}".encode()
+    # Progress is reported once per letter, from the calling thread
+    assert sorted(download.name for _, download, _ in finished) == [
+        download.name for download in queue
+    ]
+    assert {thread for thread, _, _ in finished} == {threading.current_thread()}
+    assert all(isinstance(result, Transfer) for _, _, result in finished)
+    # Letters are downloaded in batches of 4, released together by the barrier
+    assert client.peak == 4
+    # The pooled public session of the client, shared by the workers
+    assert client.sessions == {id(client.public_session)}
+
+
+def test_download_all_collects_failures(tmp_path):
+    queue = downloads(tmp_path, 6)
+    client = FakeClient(failing={"EDO0004", "EDO0001"})
+    failed = []
+    failures = download_all(
+        client,
+        queue,
+        workers=3,
+        progress=lambda download, result: failed.append(isinstance(result, Failure)),
+    ).failures
+    assert [failure.download.name for failure in failures] == ["EDO0001", "EDO0004"]
+    assert all(isinstance(failure.error, RuntimeError) for failure in failures)
+    assert sorted(failed) == [False] * 4 + [True] * 2
+    assert not (tmp_path / "EDO0001.pdf").exists()
+    assert (tmp_path / "EDO0005.pdf").exists()
+
+
+def test_download_all_rejects_no_workers(tmp_path):
+    with pytest.raises(ValueError):
+        download_all(FakeClient(), downloads(tmp_path, 1), workers=0)
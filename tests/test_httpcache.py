@@ -0,0 +1,105 @@
+import pytest
+import requests
+
+from obligacjeskarbowe.httpcache import HttpCache
+from obligacjeskarbowe.pool import pooled_session
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(str(tmp_path / "cache"), hosts={"127.0.0.1"})
+
+
+def test_revalidates_cached_page(server, cache):
+    server.etag = '"v1"'
+    session = pooled_session(requests.Session(), cache=cache)
+    first = session.get(server.url + "/page")
+    assert first.content == server.body
+    assert cache.stored == 1
+    assert "If-None-Match" not in server.requests[0]
+
+    second = session.get(server.url + "/page")
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+    assert second.status_code == 200
+    assert second.content == server.body
+    assert second.headers["ETag"] == '"v1"'
+    assert cache.revalidated == 1
+
+    # The page changed
+    server.etag = '"v2"'
+    server.body = b"%PDF changed"
+    third = session.get(server.url + "/page")
+    assert third.content == b"%PDF changed"
+    assert cache.get(server.url + "/page").headers["ETag"] == '"v2"'
+    assert cache.stored == 2
+
+    # No validator any more
+    server.etag = None
+    session.get(server.url + "/page")
+    assert len(cache) == 0
+
+
+def test_skips_pages_without_validators(server, cache):
+    session = pooled_session(requests.Session(), cache=cache)
+    session.get(server.url + "/page")
+    session.get(server.url + "/page")
+    assert len(cache) == 0
+    assert "If-None-Match" not in server.requests[1]
+
+
+def test_skips_streamed_and_other_hosts(server, tmp_path):
+    server.etag = '"v1"'
+    cache = HttpCache(str(tmp_path / "cache"))
+    session = pooled_session(requests.Session(), cache=cache)
+    session.get(server.url + "/page")
+    assert len(cache) == 0
+
+    cache = HttpCache(str(tmp_path / "other"), hosts={"127.0.0.1"})
+    session = pooled_session(requests.Session(), cache=cache)
+    session.get(server.url + "/page", stream=True).close()
+    assert len(cache) == 0
+
+
+def test_never_caches_account_pages(tmp_path):
+    with pytest.raises(ValueError):
+        HttpCache(str(tmp_path), hosts={"www.zakup.obligacjeskarbowe.pl"})
+    cache = HttpCache(str(tmp_path))
+    assert not cache.cacheable(
+        requests.Request("GET", "https://www.zakup.obligacjeskarbowe.pl/").prepare()
+    )
+    assert cache.cacheable(
+        requests.Request(
+            "GET", "https://www.obligacjeskarbowe.pl/listy-emisyjne/?id=edo0134"
+        ).prepare()
+    )
+    assert not cache.cacheable(
+        requests.Request("POST", "https://www.obligacjeskarbowe.pl/").prepare()
+    )
+
+
+def test_evicts_least_recently_used(tmp_path):
+    directory = str(tmp_path / "cache")
+    cache = HttpCache(directory, max_bytes=10_000)
+    headers = {"ETag": '"v1"', "Content-Encoding": "gzip"}
+    for name in "abc":
+        cache.put(f"https://www.obligacjeskarbowe.pl/{name}", headers, b"x" * 3000)
+    assert len(cache) == 3
+    # Stored decoded
+    assert (
+        "Content-Encoding"
+        not in cache.get("https://www.obligacjeskarbowe.pl/a").headers
+    )
+
+    cache.put("https://www.obligacjeskarbowe.pl/d", headers, b"x" * 3000)
+    assert cache.get("https://www.obligacjeskarbowe.pl/b") is None
+    assert cache.get("https://www.obligacjeskarbowe.pl/a") is not None
+    assert cache.size <= 10_000
+
+    reopened = HttpCache(directory, max_bytes=10_000)
+    assert set(reopened.entries) == set(cache.entries)
+    assert reopened.size == cache.size
+    assert reopened.get("https://www.obligacjeskarbowe.pl/d").body == b"x" * 3000
+
+    smaller = HttpCache(directory, max_bytes=0)
+    assert len(smaller) == 0
+    assert list((tmp_path / "cache").iterdir()) == []
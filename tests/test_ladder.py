@@ -0,0 +1,72 @@
+import datetime
+import random
+
+from obligacjeskarbowe.ladder import LadderPlanner, Purchase
+from tests.helpers import available_bond, bond
+
+OFFERS = [
+    available_bond("6-letnie", "ROS0431", "6.50"),
+    available_bond("12-letnie", "ROD0437", "6.80"),
+]
+START = datetime.date(2025, 4, 1)
+
+
+def test_plan():
+    portfolio = [
+        bond("ROD0437", ["6.8"], datetime.date(2037, 4, 10), count=5),
+        bond("ROS0531", ["6.5"], datetime.date(2031, 5, 10), count=1),
+    ]
+    planner = LadderPlanner(portfolio, OFFERS, START, months=3, monthly=4)
+    assert planner.purchases() == [
+        # 5 bonds mature in 2037-04 already, all go to 2031-04
+        Purchase(START, "ROS", 72, 4),
+        # 2031-05 has a bond, so ROD gets the tie breaking bond
+        Purchase(datetime.date(2025, 5, 1), "ROS", 72, 1),
+        Purchase(datetime.date(2025, 5, 1), "ROD", 144, 3),
+        Purchase(datetime.date(2025, 6, 1), "ROS", 72, 2),
+        Purchase(datetime.date(2025, 6, 1), "ROD", 144, 2),
+    ]
+    assert planner.purchases()[0].maturity == datetime.date(2031, 4, 1)
+    maturities = planner.maturities()
+    assert maturities[datetime.date(2031, 4, 1)] == 4
+    assert maturities[datetime.date(2037, 4, 1)] == 5
+
+
+def test_replan_is_incremental():
+    rng = random.Random(7)
+    portfolio = [
+        bond(
+            "ROD0437",
+            ["6.8"],
+            datetime.date(2031, 1, 10) + datetime.timedelta(days=rng.randint(0, 4000)),
+            count=rng.randint(1, 20),
+        )
+        for _ in range(50)
+    ]
+    planner = LadderPlanner(portfolio, OFFERS, START, months=216, monthly=10)
+
+    # Bought one bond less than planned, and in a different series
+    month = datetime.date(2025, 4, 1)
+    bought = [bond("ROD0437", ["6.8"], datetime.date(2037, 4, 1), count=9)]
+    planner.recomputed = 0
+    planner.purchased(month, bought)
+    assert 0 < planner.recomputed < 216
+
+    # Same plan as planning everything from scratch
+    fresh = LadderPlanner(
+        portfolio + bought, OFFERS, datetime.date(2025, 5, 1), months=215, monthly=10
+    )
+    assert planner.purchases() == fresh.purchases()
+
+    # A purchase that follows the plan changes nothing else
+    (first, *_) = planner.purchases()
+    planner.recomputed = 0
+    planner.purchased(
+        first.month,
+        [
+            bond(f"{p.symbol}0000", ["6.5"], p.maturity, count=p.count)
+            for p in planner.purchases()
+            if p.month == first.month
+        ],
+    )
+    assert planner.recomputed <= 2
@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from obligacjeskarbowe.__main__ import AmountType, DecimalType, cli
+from obligacjeskarbowe.money import Money
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("1000", "1000"),
+        ("1 000,50", "1000.50"),
+        ("1000.5 PLN", "1000.50"),
+    ],
+)
+def test_amount_type(text, expected):
+    assert AmountType().convert(text, None, None) == Money(Decimal(expected))
+
+
+@pytest.mark.parametrize("text", ["0", "-100", "abc", "1e3", "10.001", "100 EUR"])
+def test_amount_type_rejects(text):
+    with pytest.raises(click.BadParameter):
+        AmountType().convert(text, None, None)
+
+
+def test_decimal_type():
+    assert DecimalType().convert("3,5", None, None) == Decimal("3.5")
+    # Deflation
+    assert DecimalType().convert("0", None, None) == Decimal(0)
+    assert DecimalType().convert("-1.2", None, None) == Decimal("-1.2")
+    for text in ["nan", "inf", "abc"]:
+        with pytest.raises(click.BadParameter):
+            DecimalType().convert(text, None, None)
+
+
+@pytest.mark.parametrize(
+    "option", [["--budget", "-5"], ["--budget", "100", "--liquid", "x"]]
+)
+def test_optimize_rejects_bad_amounts(option):
+    result = CliRunner().invoke(cli, ["optimize", "--horizon", "12", *option])
+    assert result.exit_code == 2
+    assert "Invalid value" in result.output
+
+
+@pytest.mark.parametrize("option", [["--per-page", "0"], ["--limit", "-1"]])
+def test_portfolio_rejects_bad_counts(option):
+    result = CliRunner().invoke(cli, ["portfolio", *option])
+    assert result.exit_code == 2
+    assert "Invalid value" in result.output
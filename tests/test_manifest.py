@@ -0,0 +1,107 @@
+import hashlib
+import os
+
+from obligacjeskarbowe.downloader import Download
+from obligacjeskarbowe.manifest import CHANGED, DAMAGED, NEW, Manifest
+from obligacjeskarbowe.transfer import Transfer
+
+PDF = b"%PDF-1.4\n...\n%%EOF\n"
+
+LISTING = [
+    ("EDO0134", "https://www.obligacjeskarbowe.pl/listy-emisyjne/?id=edo0134"),
+    ("ROR0126", "https://www.obligacjeskarbowe.pl/listy-emisyjne/?id=ror0126"),
+]
+
+
+def save(path, name, body=PDF):
+    filename = os.path.join(path, f"{name}.pdf")
+    with open(filename, "wb") as f:
+        f.write(body)
+    return Transfer(filename, len(body), hashlib.sha256(body).hexdigest())
+
+
+def test_diff_downloads_only_new_changed_or_damaged(tmp_path):
+    path = str(tmp_path)
+    with Manifest(path) as manifest:
+        changes = manifest.diff(LISTING)
+        assert [(reason, d.name) for reason, d in changes.downloads] == [
+            (NEW, "EDO0134"),
+            (NEW, "ROR0126"),
+        ]
+        for _, download in changes.downloads:
+            manifest.record(download, save(path, download.name))
+        assert len(manifest) == 2
+        assert manifest.get("EDO0134").url == LISTING[0][1]
+        assert manifest.get("EDO0134").sha256 == hashlib.sha256(PDF).hexdigest()
+
+        changes = manifest.diff(LISTING)
+        assert changes.downloads == []
+        assert changes.current == ["EDO0134", "ROR0126"]
+
+        # Listed under another URL, and a file truncated with the same size
+        listing = [(LISTING[0][0], LISTING[0][1] + "&v=2"), LISTING[1]]
+        save(path, "ROR0126", PDF.replace(b"...", b"xxx"))
+        assert [(r, d.name) for r, d in manifest.diff(listing).downloads] == [
+            (CHANGED, "EDO0134")
+        ]
+        assert [
+            (r, d.name) for r, d in manifest.diff(listing, verify=True).downloads
+        ] == [(CHANGED, "EDO0134"), (DAMAGED, "ROR0126")]
+
+        # Missing file
+        os.remove(os.path.join(path, "ROR0126.pdf"))
+        assert [(r, d.name) for r, d in manifest.diff(LISTING).downloads] == [
+            (DAMAGED, "ROR0126")
+        ]
+
+
+def test_diff_adopts_files_downloaded_before_the_manifest(tmp_path):
+    path = str(tmp_path)
+    save(path, "EDO0134")
+    save(path, "ROR0126", b"%PDF-1.4\ntruncated")
+    with Manifest(path) as manifest:
+        changes = manifest.diff(LISTING)
+        assert changes.adopted == ["EDO0134"]
+        assert [(r, d.name) for r, d in changes.downloads] == [(NEW, "ROR0126")]
+        assert manifest.get("EDO0134").size == len(PDF)
+
+    # Persisted
+    with Manifest(path) as manifest:
+        assert [letter.name for letter in manifest] == ["EDO0134"]
+
+
+def test_diff_names_letters_after_their_files(tmp_path):
+    path = str(tmp_path)
+    listing = [
+        ("EDO0134", LISTING[0][1]),
+        ("EDO0134 (2)", LISTING[0][1] + "&v=2"),
+    ]
+    with Manifest(path) as manifest:
+        changes = manifest.diff(listing)
+        assert [
+            (reason, d.name, os.path.basename(d.filename))
+            for reason, d in changes.downloads
+        ] == [
+            (NEW, "EDO0134", "EDO0134.pdf"),
+            (NEW, "EDO0134", "EDO0134 (2).pdf"),
+        ]
+        for _, download in changes.downloads:
+            manifest.record(download, save(path, manifest.key(download.filename)))
+        assert [letter.name for letter in manifest] == ["EDO0134", "EDO0134 (2)"]
+        assert manifest.get("EDO0134 (2)").url == listing[1][1]
+
+        changes = manifest.diff(listing)
+        assert changes.downloads == []
+        assert changes.current == ["EDO0134", "EDO0134 (2)"]
+
+
+def test_record_replaces_letter(tmp_path):
+    path = str(tmp_path)
+    download = Download("EDO0134", os.path.join(path, "EDO0134.pdf"), LISTING[0][1])
+    with Manifest(path) as manifest:
+        manifest.record(download, save(path, "EDO0134"))
+        manifest.record(download, save(path, "EDO0134", PDF + b"\n"))
+        assert len(manifest) == 1
+        assert manifest.get("EDO0134").size == len(PDF) + 1
+        assert manifest.get("EDO0134").filename == "EDO0134.pdf"
+        assert manifest.get("EDO9999") is None
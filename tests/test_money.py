@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+import pytest
+
+from obligacjeskarbowe.money import (
+    Money,
+    parse_polish_amount,
+    sum_money,
+    sum_money_by,
+)
+
+
+def test_money_from_decimal():
+    money = Money(Decimal("111111.11"), "PLN")
+    assert money.grosze == 11111111
+    assert money.amount == Decimal("111111.11")
+    assert str(Money(Decimal("1000"), "PLN").amount) == "1000.00"
+    assert money == Money.from_grosze(11111111, "PLN")
+    assert money != Money.from_grosze(11111111, "EUR")
+    assert repr(money) == "Money(amount=Decimal('111111.11'), currency='PLN')"
+    with pytest.raises(ValueError):
+        Money(Decimal("0.001"), "PLN")
+
+
+def test_money_arithmetic():
+    assert Money(Decimal("1.50")) + Money(Decimal("0.75")) == Money(Decimal("2.25"))
+    assert Money(Decimal("1.50")) - Money(Decimal("0.75")) == Money(Decimal("0.75"))
+    assert 3 * Money(Decimal("100.00")) == Money(Decimal("300.00"))
+    with pytest.raises(ValueError):
+        Money(Decimal("1.50"), "PLN") + Money(Decimal("1.50"), "EUR")
+
+
+def test_parse_polish_amount():
+    assert parse_polish_amount("1 234,56 PLN").grosze == 123456
+    assert parse_polish_amount("11 1111,11 PLN").grosze == 11111111
+    assert parse_polish_amount("66\xa06666,42\xa0PLN").grosze == 66666642
+    assert parse_polish_amount("0,5 PLN").grosze == 50
+    assert parse_polish_amount("100 PLN").grosze == 10000
+    assert parse_polish_amount("-12,30 PLN").grosze == -1230
+    with pytest.raises(RuntimeError, match="Expected PLN"):
+        parse_polish_amount("1 234,56 EUR")
+    with pytest.raises(RuntimeError, match="Unable to parse"):
+        parse_polish_amount("1 234,567 PLN")
+
+
+def test_sum_money():
+    amounts = [Money.from_grosze(grosze) for grosze in (1, 20, 300)]
+    assert sum_money(amounts) == Money.from_grosze(321)
+    assert sum_money([]) == Money(Decimal("0"))
+    with pytest.raises(ValueError):
+        sum_money([Money.from_grosze(1, "EUR")])
+
+
+def test_sum_money_by():
+    lots = [("EDO", 100), ("ROD", 250), ("EDO", 50)]
+    totals = sum_money_by(
+        lots, key=lambda lot: lot[0], value=lambda lot: Money.from_grosze(lot[1])
+    )
+    assert totals == {"EDO": Money.from_grosze(150), "ROD": Money.from_grosze(250)}
+    assert list(totals) == ["EDO", "ROD"]
@@ -0,0 +1,107 @@
+import datetime
+import itertools
+import random
+from decimal import Decimal
+
+import pytest
+
+from obligacjeskarbowe.money import Money
+from obligacjeskarbowe.optimize import offer_gains, optimize, solve
+from tests.helpers import available_bond
+
+OFFERS = [
+    available_bond("3-miesięczne", "OTS0725", "3.00"),
+    available_bond("roczne", "ROR0426", "5.75"),
+    available_bond("2-letnie", "DOR0427", "5.90"),
+    available_bond("3-letnie", "TOS0428", "5.95"),
+    available_bond("4-letnie", "COI0429", "6.30"),
+    available_bond("10-letnie", "EDO0435", "6.55"),
+    available_bond("6-letnie", "ROS0431", "6.50"),
+    available_bond("12-letnie", "ROD0437", "6.80"),
+]
+ON = datetime.date(2025, 4, 10)
+
+
+def test_offer_gains():
+    gains = offer_gains(OFFERS, ON, 3, cpi=Decimal("3.5"))
+    # OTS matures, 3 ROR coupons of 0.48 PLN less the tax, EDO accrues less than its 2 PLN fee
+    assert gains[0] == 75 - 14
+    assert gains[1] == 144 - 27
+    assert gains[5] == 0
+    # EDO: 6.55% and 3.5% + 2% margin for 3 more years, capitalized, redeemed early and less the tax
+    gains = offer_gains(OFFERS, ON, 48, cpi=Decimal("3.5"))
+    assert gains[5] == 2511 - 200 - 439
+    # OTS can't be redeemed before its maturity
+    assert offer_gains(OFFERS, ON, 1)[0] is None
+
+
+def brute_force(gains, caps, family, liquid, total, family_limit, liquid_minimum):
+    best = None
+    for counts in itertools.product(*(range(cap + 1) for cap in caps)):
+        if (
+            sum(counts) <= total
+            and sum(c for c, f in zip(counts, family) if f) <= family_limit
+            and sum(c for c, l in zip(counts, liquid) if l) >= liquid_minimum
+        ):
+            gain = sum(c * g for c, g in zip(counts, gains))
+            best = gain if best is None else max(best, gain)
+    return best
+
+
+def test_solve_is_optimal():
+    rng = random.Random(1)
+    for _ in range(200):
+        n = rng.randint(1, 5)
+        problem = dict(
+            gains=[rng.randint(-50, 300) for _ in range(n)],
+            caps=[rng.randint(0, 4) for _ in range(n)],
+            family=[rng.random() < 0.4 for _ in range(n)],
+            liquid=[rng.random() < 0.4 for _ in range(n)],
+            total=rng.randint(0, 8),
+            family_limit=rng.randint(0, 5),
+            liquid_minimum=rng.randint(0, 4),
+        )
+        best = brute_force(**problem)
+        if best is None:
+            with pytest.raises(ValueError):
+                solve(**problem)
+            continue
+        counts = solve(**problem)
+        assert sum(c * g for c, g in zip(counts, problem["gains"])) == best
+        assert sum(counts) <= problem["total"]
+
+
+def test_optimize():
+    plan = optimize(
+        OFFERS,
+        Money(Decimal("10050")),
+        horizon=48,
+        cpi=Decimal("3.5"),
+        family_limit=20,
+        liquid_amount=Money(Decimal("1500")),
+        on=ON,
+    )
+    # 20 ROD within the 800+ limit, the rest in EDO apart from 15 ROR maturing within a year
+    assert [(a.emisja, a.count) for a in plan.allocations] == [
+        ("ROR0426", 15),
+        ("EDO0435", 65),
+        ("ROD0437", 20),
+    ]
+    assert plan.invested == Money(Decimal("10000"))
+    assert plan.cash == Money(Decimal("50"))
+    assert plan.gain == sum(
+        (a.gain for a in plan.allocations), start=Money(Decimal("0"))
+    )
+
+    # Nothing is on sale after the sale window
+    plan = optimize(OFFERS, Money(Decimal("1000")), 48, on=datetime.date(2025, 5, 1))
+    assert plan.allocations == []
+
+    with pytest.raises(ValueError):
+        optimize(
+            OFFERS,
+            Money(Decimal("1000")),
+            48,
+            liquid_amount=Money(Decimal("2000")),
+            on=ON,
+        )
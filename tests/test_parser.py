@@ -1,55 +1,72 @@
+import dataclasses
 import datetime
 from decimal import Decimal
 from bs4 import BeautifulSoup
+import pytest
+from benchmarks import fixtures
 from obligacjeskarbowe.parser import (
+    HTML_PARSERS,
     AvailableBond,
     Bond,
     LoginInfo,
     PartialResponse,
+    PartialResponseError,
     DaneDyspozycji,
     History,
     InterestPeriod,
     Money,
     Redirect,
+    count_table_rows,
     extract_available_bonds,
     extract_balance,
     extract_bonds,
+    extract_bonds_fragment,
     extract_dane_dyspozycji,
     extract_data_przyjecia_zlecenia,
     extract_form_action_by_id,
     extract_javax_view_state,
     extract_purchase_step_title,
+    extract_tooltips,
     emisje_parse_saldo_srodkow_pienieznych,
     emisje_parse_wartosc_nominalna_800plus,
     find_main_form,
     html_to_string,
+    index_form_fields,
     parse_duration,
+    parse_html,
     parse_history,
     parse_login_info,
     parse_szt,
     parse_tak_nie,
     parse_tooltip,
     parse_xml_response,
+    scan_partial_update,
 )
 
 
-def test_extract_balance():
+@pytest.fixture(params=HTML_PARSERS)
+def html_parser(request):
+    """Runs every fixture through all supported tree builders."""
+    return request.param
+
+
+def test_extract_balance(html_parser):
     bs = BeautifulSoup(
         r"""<h4><strong>Gotówka</strong></h4>
 			<span class="formlabel-230 formlabel-base">Saldo środków pieniężnych</span><span class="formfield-base" style="font-weight: bold;">42 4242,42 PLN</span>
 			<br />
 """,
-        features="html.parser",
+        features=html_parser,
     )
     balance = extract_balance(bs)
     assert balance.amount == Decimal(424242) + (Decimal(42) / Decimal(100))
     assert balance.currency == "PLN"
 
 
-def test_extract_bonds():
+def test_extract_bonds(html_parser):
     bs = BeautifulSoup(
         r"""<tbody id="stanRachunku:j_idt171_data" class="ui-datatable-data ui-widget-content"><tr data-ri="0" class="ui-widget-content ui-datatable-even"><td role="gridcell"><span id="stanRachunku:j_idt171:0:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: left; width: 100%; display: inline-block; white-space: nowrap;">ZXCV4567</span><script id="stanRachunku:j_idt171:0:j_idt185_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_stanRachunku_j_idt171_0_j_idt185",{id:"stanRachunku:j_idt171:0:j_idt185",global:false,shared:false,autoShow:false,forTarget:"stanRachunku:j_idt171:0:nazwaSkrocona",content: {text: "okres 1 oprocentowanie 12.55%<\/br>okres 2 oprocentowanie 5.55%<\/br>"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">999</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">0</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">11 1111,11 PLN</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">33 3333,33 PLN</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">2033-08-01</span></td></tr><tr data-ri="1" class="ui-widget-content ui-datatable-odd"><td role="gridcell"><span id="stanRachunku:j_idt171:1:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: left; width: 100%; display: inline-block; white-space: nowrap;">ASDF5555</span><script id="stanRachunku:j_idt171:1:j_idt185_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_stanRachunku_j_idt171_1_j_idt185",{id:"stanRachunku:j_idt171:1:j_idt185",global:false,shared:false,autoShow:false,forTarget:"stanRachunku:j_idt171:1:nazwaSkrocona",content: {text: "okres 1 oprocentowanie 7.5%<\/br>okres 2 oprocentowanie 69%<\/br>okres 3 oprocentowanie 6.05%<\/br>"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">666</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">0</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">55 5555,55 PLN</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">99 999,99 PLN</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">2043-10-25</span></td></tr></tbody>""",
-        features="html.parser",
+        features=html_parser,
     )
     bonds = extract_bonds(bs)
     print(bonds)
@@ -61,10 +78,10 @@ def test_extract_bonds():
             zablokowanych=0,
             nominalna=Money(amount=Decimal("111111.11"), currency="PLN"),
             aktualna=Money(amount=Decimal("333333.33"), currency="PLN"),
-            okresy=[
+            okresy=(
                 InterestPeriod(okres=1, oprocentowanie=Decimal("12.55")),
                 InterestPeriod(okres=2, oprocentowanie=Decimal("5.55")),
-            ],
+            ),
             data_wykupu=datetime.date(2033, 8, 1),
         ),
         Bond(
@@ -73,20 +90,144 @@ def test_extract_bonds():
             zablokowanych=0,
             nominalna=Money(amount=Decimal("555555.55"), currency="PLN"),
             aktualna=Money(amount=Decimal("99999.99"), currency="PLN"),
-            okresy=[
+            okresy=(
+                InterestPeriod(okres=1, oprocentowanie=Decimal("7.5")),
+                InterestPeriod(okres=2, oprocentowanie=Decimal("69")),
+                InterestPeriod(okres=3, oprocentowanie=Decimal("6.05")),
+            ),
+            data_wykupu=datetime.date(2043, 10, 25),
+        ),
+    ]
+
+
+def test_extract_bonds_fragment(html_parser):
+    bonds = extract_bonds_fragment(
+        r"""<tr data-ri="20" class="ui-widget-content ui-datatable-odd"><td role="gridcell"><span id="stanRachunku:j_idt171:20:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: left; width: 100%; display: inline-block; white-space: nowrap;">ASDF5555</span><script id="stanRachunku:j_idt171:20:j_idt185_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_stanRachunku_j_idt171_20_j_idt185",{id:"stanRachunku:j_idt171:20:j_idt185",global:false,shared:false,autoShow:false,forTarget:"stanRachunku:j_idt171:20:nazwaSkrocona",content: {text: "okres 1 oprocentowanie 7.5%<\/br>okres 2 oprocentowanie 69%<\/br>okres 3 oprocentowanie 6.05%<\/br>"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">666</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">0</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">55 5555,55 PLN</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: right; width: 100%; display: inline-block; white-space: nowrap;">99 999,99 PLN</span></td><td role="gridcell"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">2043-10-25</span></td></tr>""",
+        parser=html_parser,
+    )
+    assert bonds == [
+        Bond(
+            emisja="ASDF5555",
+            dostepnych=666,
+            zablokowanych=0,
+            nominalna=Money(amount=Decimal("555555.55"), currency="PLN"),
+            aktualna=Money(amount=Decimal("99999.99"), currency="PLN"),
+            okresy=(
                 InterestPeriod(okres=1, oprocentowanie=Decimal("7.5")),
                 InterestPeriod(okres=2, oprocentowanie=Decimal("69")),
                 InterestPeriod(okres=3, oprocentowanie=Decimal("6.05")),
-            ],
+            ),
             data_wykupu=datetime.date(2043, 10, 25),
         ),
     ]
 
 
-def test_available_bonds():
+def test_count_table_rows():
+    assert count_table_rows(" ") == 0
+    assert count_table_rows('<tr data-ri="20"><td><track></td></tr><tr>') == 2
+
+
+def test_parse_html_with_profile(html_parser):
+    content = r"""<html><head><script type="text/javascript" src="/primefaces.js"></script></head><body>
+<ul class="menu"><li><a href="/stanRachunku.html">Stan rachunku</a></li></ul>
+<form id="userInfoForm" name="userInfoForm">Zalogowany użytkownik:&nbsp;JAN&nbsp;KOWALSKI</form>
+<span id="spanContent"><form id="stanRachunku" name="stanRachunku" method="post" action="/stanRachunku.html?execution=e1s2">
+<table><tbody id="stanRachunku:j_idt171_data" class="ui-datatable-data ui-widget-content"><tr data-ri="0" class="ui-widget-content ui-datatable-even"><td role="gridcell"><span id="stanRachunku:j_idt171:0:nazwaSkrocona">ZXCV4567</span><script id="stanRachunku:j_idt171:0:j_idt185_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_stanRachunku_j_idt171_0_j_idt185",{forTarget:"stanRachunku:j_idt171:0:nazwaSkrocona",content: {text: "okres 1 oprocentowanie 12.55%<\/br>"}});});</script></td><td role="gridcell"><span>999</span></td><td role="gridcell"><span>0</span></td><td role="gridcell"><span>11 1111,11 PLN</span></td><td role="gridcell"><span>33 3333,33 PLN</span></td><td role="gridcell"><span>2033-08-01</span></td></tr></tbody></table>
+<input type="hidden" name="javax.faces.ViewState" id="j_id1:javax.faces.ViewState:0" value="e1s2" autocomplete="off" />
+</form></span>
+<div id="footer">Obligacje skarbowe</div>
+</body></html>"""
+    full = parse_html(content, html_parser)
+    partial = parse_html(content, html_parser, profile="portfolio")
+    assert extract_bonds(partial, content) == extract_bonds(full, content)
+    assert extract_javax_view_state(partial) == "e1s2"
+    assert partial.find("form", id="userInfoForm") is None
+    assert partial.find("ul", class_="menu") is None
+
+
+SALDO = (
+    '<span class="formlabel-230 formlabel-base">Saldo środków pieniężnych</span>'
+    '<span class="formfield-base" style="font-weight: bold;">1 000 000,00 PLN</span>'
+)
+
+
+@pytest.mark.parametrize("outside_form", [False, True])
+def test_parse_html_with_offers_profile(html_parser, outside_form):
+    content = fixtures.offers_page(3)
+    if outside_form:
+        # The balance rendered next to the main form instead of in it
+        content = content.replace(SALDO, "").replace(
+            '<div id="content"', SALDO + '<div id="content"'
+        )
+    full = parse_html(content, html_parser)
+    partial = parse_html(content, html_parser, profile="offers")
+    assert extract_available_bonds(partial, "/zakupObligacji.html") == (
+        extract_available_bonds(full, "/zakupObligacji.html")
+    )
+    assert len(extract_available_bonds(partial, "/zakupObligacji.html")) == 3
+    # Looked up by the label right before the amount
+    assert emisje_parse_saldo_srodkow_pienieznych(partial) == Money(
+        Decimal("1000000.00")
+    )
+    assert emisje_parse_saldo_srodkow_pienieznych(full) == Money(Decimal("1000000.00"))
+    assert emisje_parse_wartosc_nominalna_800plus(partial) == Money(Decimal("69420.99"))
+    assert extract_form_action_by_id(partial) == extract_form_action_by_id(full)
+    assert extract_javax_view_state(partial) == extract_javax_view_state(full)
+    assert partial.find("ul", class_="menu") is None
+
+
+def test_parse_html_with_navigation_profile(html_parser):
+    content = fixtures.history_page(3)
+    full = parse_html(content, html_parser)
+    partial = parse_html(content, html_parser, profile="navigation")
+    assert (
+        extract_form_action_by_id(partial) == "/historiaDyspozycji.html?execution=e1s1"
+    )
+    assert extract_form_action_by_id(partial) == extract_form_action_by_id(full)
+    assert extract_javax_view_state(partial) == extract_javax_view_state(full)
+    assert find_main_form(partial).text == find_main_form(full).text
+    assert partial.find("div", id="footer") is None
+
+
+def archive_options(bs):
+    return [
+        (option.get("value"), option.get("data-id"), option.get_text(strip=True))
+        for select_id in ("id_type_bonds", "id_issue_bonds")
+        for option in bs.find("select", id=select_id).find_all("option")
+    ]
+
+
+def test_parse_html_with_archive_profile(html_parser):
+    content = fixtures.archive_page(3)
+    full = parse_html(content, html_parser)
+    partial = parse_html(content, html_parser, profile="archive")
+    assert archive_options(partial) == archive_options(full)
+    assert len(archive_options(partial)) == len(fixtures.BOND_TYPES) + 1 + 3
+    assert partial.find("form") is None
+
+
+def test_parse_html_with_issue_letter_profile(html_parser):
+    content = r"""<html><head><title>List emisyjny</title></head><body>
+<ul class="menu"><li><a href="/oferta/">Oferta</a></li></ul>
+<div class="issue-letter"><div class="files">
+<a class="files__item issue-letter__file" href="/media/listy/EDO0134.pdf" target="_blank"><span>List emisyjny EDO0134</span></a>
+</div></div>
+<a class="files__item" href="/media/regulamin.pdf">Regulamin</a>
+</body></html>"""
+    full = parse_html(content, html_parser)
+    partial = parse_html(content, html_parser, profile="issue_letter")
+    for bs in (full, partial):
+        a_tag = bs.find("a", class_="files__item issue-letter__file")
+        assert a_tag.get("href") == "/media/listy/EDO0134.pdf"
+    assert [a.get("href") for a in partial.find_all("a")] == [
+        "/media/listy/EDO0134.pdf"
+    ]
+
+
+def test_available_bonds(html_parser):
     bs = BeautifulSoup(
         r"""<tbody id="dostepneEmisje:j_idt190_data" class="ui-datatable-data ui-widget-content"><tr data-ri="0" class="ui-widget-content ui-datatable-even"><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:0:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">6-letnie: ROS0431</span><script id="dostepneEmisje:j_idt190:0:j_idt192_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_dostepneEmisje_j_idt190_0_j_idt192",{id:"dostepneEmisje:j_idt190:0:j_idt192",global:false,shared:false,autoShow:false,forTarget:"dostepneEmisje:j_idt190:0:nazwaSkrocona",content: {text: "RODZINNYCH SZEŚCIOLETNICH OSZCZĘDNOŚCIOWYCH OBLIGACJI SKARBOWYCH"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell" style="white-space: normal; text-align: center;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">od 2025-04-01 <br/> do 2025-04-30</span></td><td role="gridcell" style="white-space: normal;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">6,50%</span></td><td role="gridcell" style="white-space: normal; text-align: center;"><a href="http://www.obligacjeskarbowe.pl/listy-emisyjne/?id=ROS0431" style="font-size: 0.875em;" target="_blank">pokaż</a></td><td role="gridcell" style="text-align: center; font-size: 0.875em;"><a id="dostepneEmisje:j_idt190:0:wybierz" href="#" class="ui-commandlink ui-widget" onclick="PrimeFaces.ab({s:&quot;dostepneEmisje:j_idt190:0:wybierz&quot;,f:&quot;dostepneEmisje&quot;,u:&quot;dostepneEmisje&quot;});return false;">wybierz</a><script id="dostepneEmisje:j_idt190:0:wybierz_s" type="text/javascript">$(function(){PrimeFaces.cw("CommandLink","widget_dostepneEmisje_j_idt190_0_wybierz",{id:"dostepneEmisje:j_idt190:0:wybierz"});});</script></td></tr><tr data-ri="1" class="ui-widget-content ui-datatable-odd"><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:1:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">12-letnie: ROD0437</span><script id="dostepneEmisje:j_idt190:1:j_idt192_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_dostepneEmisje_j_idt190_1_j_idt192",{id:"dostepneEmisje:j_idt190:1:j_idt192",global:false,shared:false,autoShow:false,forTarget:"dostepneEmisje:j_idt190:1:nazwaSkrocona",content: {text: "RODZINNYCH DWUNASTOLETNICH OSZCZĘDNOŚCIOWYCH OBLIGACJI SKARBOWYCH"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell" style="white-space: normal; text-align: center;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">od 2025-04-01 <br/> do 2025-04-30</span></td><td role="gridcell" style="white-space: normal;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">6,80%</span></td><td role="gridcell" style="white-space: normal; text-align: center;"><a href="http://www.obligacjeskarbowe.pl/listy-emisyjne/?id=ROD0437" style="font-size: 0.875em;" target="_blank">pokaż</a></td><td role="gridcell" style="text-align: center; font-size: 0.875em;"><a id="dostepneEmisje:j_idt190:1:wybierz" href="#" class="ui-commandlink ui-widget" onclick="PrimeFaces.ab({s:&quot;dostepneEmisje:j_idt190:1:wybierz&quot;,f:&quot;dostepneEmisje&quot;,u:&quot;dostepneEmisje&quot;});return false;">wybierz</a><script id="dostepneEmisje:j_idt190:1:wybierz_s" type="text/javascript">$(function(){PrimeFaces.cw("CommandLink","widget_dostepneEmisje_j_idt190_1_wybierz",{id:"dostepneEmisje:j_idt190:1:wybierz"});});</script></td></tr></tbody>""",
-        features="html.parser",
+        features=html_parser,
     )
     extracted_bonds = extract_available_bonds(bs, path="/foo.html")
     print(extracted_bonds)
@@ -119,10 +260,10 @@ def test_available_bonds():
     assert extracted_bonds[1].dlugosc == 12 * 12
 
 
-def test_available_bonds_skarb_panstwa():
+def test_available_bonds_skarb_panstwa(html_parser):
     bs = BeautifulSoup(
         r"""<tbody id="dostepneEmisje:j_idt190_data" class="ui-datatable-data ui-widget-content"><tr data-ri="0" class="ui-widget-content ui-datatable-even"><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:0:nazwaEmitenta" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">Skarb Państwa</span></td><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:0:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">3-miesięczne: OTS0725</span><script id="dostepneEmisje:j_idt190:0:j_idt193_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_dostepneEmisje_j_idt190_0_j_idt193",{id:"dostepneEmisje:j_idt190:0:j_idt193",global:false,shared:false,autoShow:false,forTarget:"dostepneEmisje:j_idt190:0:nazwaSkrocona",content: {text: "TRZYMIESIĘCZNYCH OSZCZĘDNOŚCIOWYCH OBLIGACJI SKARBOWYCH O OPROCENTOWANIU STAŁYM"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell" style="white-space: normal; text-align: center;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">od 2025-04-01 <br/> do 2025-04-30</span></td><td role="gridcell" style="white-space: normal;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">3,00%</span></td><td role="gridcell" style="white-space: normal; text-align: center;"><a href="http://www.obligacjeskarbowe.pl/listy-emisyjne/?id=OTS0725" style="font-size: 0.875em; " target="_blank">pokaż</a></td><td role="gridcell" style="text-align: center; font-size: 0.875em; "><a id="dostepneEmisje:j_idt190:0:wybierz" href="#" class="ui-commandlink ui-widget" onclick="PrimeFaces.ab({s:&quot;dostepneEmisje:j_idt190:0:wybierz&quot;,f:&quot;dostepneEmisje&quot;,u:&quot;dostepneEmisje&quot;});return false;">wybierz</a><script id="dostepneEmisje:j_idt190:0:wybierz_s" type="text/javascript">$(function(){PrimeFaces.cw("CommandLink","widget_dostepneEmisje_j_idt190_0_wybierz",{id:"dostepneEmisje:j_idt190:0:wybierz"});});</script></td></tr><tr data-ri="1" class="ui-widget-content ui-datatable-odd"><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:1:nazwaEmitenta" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">Skarb Państwa</span></td><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:1:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">roczne: ROR0426</span><script id="dostepneEmisje:j_idt190:1:j_idt193_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_dostepneEmisje_j_idt190_1_j_idt193",{id:"dostepneEmisje:j_idt190:1:j_idt193",global:false,shared:false,autoShow:false,forTarget:"dostepneEmisje:j_idt190:1:nazwaSkrocona",content: {text: "ROCZNYCH OSZCZĘDNOŚCIOWYCH OBLIGACJI SKARBOWYCH O ZMIENNEJ STOPIE PROCENTOWEJ"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell" style="white-space: normal; text-align: center;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">od 2025-04-01 <br/> do 2025-04-30</span></td><td role="gridcell" style="white-space: normal;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">5,75%</span></td><td role="gridcell" style="white-space: normal; text-align: center;"><a href="http://www.obligacjeskarbowe.pl/listy-emisyjne/?id=ROR0426" style="font-size: 0.875em; " target="_blank">pokaż</a></td><td role="gridcell" style="text-align: center; font-size: 0.875em; "><a id="dostepneEmisje:j_idt190:1:wybierz" href="#" class="ui-commandlink ui-widget" onclick="PrimeFaces.ab({s:&quot;dostepneEmisje:j_idt190:1:wybierz&quot;,f:&quot;dostepneEmisje&quot;,u:&quot;dostepneEmisje&quot;});return false;">wybierz</a><script id="dostepneEmisje:j_idt190:1:wybierz_s" type="text/javascript">$(function(){PrimeFaces.cw("CommandLink","widget_dostepneEmisje_j_idt190_1_wybierz",{id:"dostepneEmisje:j_idt190:1:wybierz"});});</script></td></tr><tr data-ri="2" class="ui-widget-content ui-datatable-even"><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:2:nazwaEmitenta" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">Skarb Państwa</span></td><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:2:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">2-letnie: DOR0427</span><script id="dostepneEmisje:j_idt190:2:j_idt193_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_dostepneEmisje_j_idt190_2_j_idt193",{id:"dostepneEmisje:j_idt190:2:j_idt193",global:false,shared:false,autoShow:false,forTarget:"dostepneEmisje:j_idt190:2:nazwaSkrocona",content: {text: "DWULETNICH OSZCZĘDNOŚCIOWYCH OBLIGACJI SKARBOWYCH O ZMIENNEJ STOPIE PROCENTOWEJ"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell" style="white-space: normal; text-align: center;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">od 2025-04-01 <br/> do 2025-04-30</span></td><td role="gridcell" style="white-space: normal;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">5,90%</span></td><td role="gridcell" style="white-space: normal; text-align: center;"><a href="http://www.obligacjeskarbowe.pl/listy-emisyjne/?id=DOR0427" style="font-size: 0.875em; " target="_blank">pokaż</a></td><td role="gridcell" style="text-align: center; font-size: 0.875em; "><a id="dostepneEmisje:j_idt190:2:wybierz" href="#" class="ui-commandlink ui-widget" onclick="PrimeFaces.ab({s:&quot;dostepneEmisje:j_idt190:2:wybierz&quot;,f:&quot;dostepneEmisje&quot;,u:&quot;dostepneEmisje&quot;});return false;">wybierz</a><script id="dostepneEmisje:j_idt190:2:wybierz_s" type="text/javascript">$(function(){PrimeFaces.cw("CommandLink","widget_dostepneEmisje_j_idt190_2_wybierz",{id:"dostepneEmisje:j_idt190:2:wybierz"});});</script></td></tr><tr data-ri="3" class="ui-widget-content ui-datatable-odd"><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:3:nazwaEmitenta" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">Skarb Państwa</span></td><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:3:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">3-letnie: TOS0428</span><script id="dostepneEmisje:j_idt190:3:j_idt193_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_dostepneEmisje_j_idt190_3_j_idt193",{id:"dostepneEmisje:j_idt190:3:j_idt193",global:false,shared:false,autoShow:false,forTarget:"dostepneEmisje:j_idt190:3:nazwaSkrocona",content: {text: "TRZYLETNICH OSZCZĘDNOŚCIOWYCH OBLIGACJI SKARBOWYCH O OPROCENTOWANIU STAŁYM"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell" style="white-space: normal; text-align: center;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">od 2025-04-01 <br/> do 2025-04-30</span></td><td role="gridcell" style="white-space: normal;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">5,95%</span></td><td role="gridcell" style="white-space: normal; text-align: center;"><a href="http://www.obligacjeskarbowe.pl/listy-emisyjne/?id=TOS0428" style="font-size: 0.875em; " target="_blank">pokaż</a></td><td role="gridcell" style="text-align: center; font-size: 0.875em; "><a id="dostepneEmisje:j_idt190:3:wybierz" href="#" class="ui-commandlink ui-widget" onclick="PrimeFaces.ab({s:&quot;dostepneEmisje:j_idt190:3:wybierz&quot;,f:&quot;dostepneEmisje&quot;,u:&quot;dostepneEmisje&quot;});return false;">wybierz</a><script id="dostepneEmisje:j_idt190:3:wybierz_s" type="text/javascript">$(function(){PrimeFaces.cw("CommandLink","widget_dostepneEmisje_j_idt190_3_wybierz",{id:"dostepneEmisje:j_idt190:3:wybierz"});});</script></td></tr><tr data-ri="4" class="ui-widget-content ui-datatable-even"><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:4:nazwaEmitenta" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">Skarb Państwa</span></td><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:4:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">4-letnie: COI0429</span><script id="dostepneEmisje:j_idt190:4:j_idt193_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_dostepneEmisje_j_idt190_4_j_idt193",{id:"dostepneEmisje:j_idt190:4:j_idt193",global:false,shared:false,autoShow:false,forTarget:"dostepneEmisje:j_idt190:4:nazwaSkrocona",content: {text: "CZTEROLETNICH INDEKSOWANYCH OSZCZĘDNOŚCIOWYCH OBLIGACJI SKARBOWYCH"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell" style="white-space: normal; text-align: center;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">od 2025-04-01 <br/> do 2025-04-30</span></td><td role="gridcell" style="white-space: normal;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">6,30%</span></td><td role="gridcell" style="white-space: normal; text-align: center;"><a href="http://www.obligacjeskarbowe.pl/listy-emisyjne/?id=COI0429" style="font-size: 0.875em; " target="_blank">pokaż</a></td><td role="gridcell" style="text-align: center; font-size: 0.875em; "><a id="dostepneEmisje:j_idt190:4:wybierz" href="#" class="ui-commandlink ui-widget" onclick="PrimeFaces.ab({s:&quot;dostepneEmisje:j_idt190:4:wybierz&quot;,f:&quot;dostepneEmisje&quot;,u:&quot;dostepneEmisje&quot;});return false;">wybierz</a><script id="dostepneEmisje:j_idt190:4:wybierz_s" type="text/javascript">$(function(){PrimeFaces.cw("CommandLink","widget_dostepneEmisje_j_idt190_4_wybierz",{id:"dostepneEmisje:j_idt190:4:wybierz"});});</script></td></tr><tr data-ri="5" class="ui-widget-content ui-datatable-odd"><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:5:nazwaEmitenta" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">Skarb Państwa</span></td><td role="gridcell" style="white-space: normal;"><span id="dostepneEmisje:j_idt190:5:nazwaSkrocona" style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block;">10-letnie: EDO0435</span><script id="dostepneEmisje:j_idt190:5:j_idt193_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_dostepneEmisje_j_idt190_5_j_idt193",{id:"dostepneEmisje:j_idt190:5:j_idt193",global:false,shared:false,autoShow:false,forTarget:"dostepneEmisje:j_idt190:5:nazwaSkrocona",content: {text: "EMERYTALNYCH DZIESIĘCIOLETNICH OSZCZĘDNOŚCIOWYCH OBLIGACJI SKARBOWYCH"},style: {widget:true},show:{event:'mouseenter',delay:0,effect:function(){$(this).fadeIn(500);}},hide:{event:'mouseleave',delay:0,fixed:false,effect:function(){$(this).fadeOut(500);}},position: {at:'bottom right',my:'top left',adjust:{x:0,y:0},viewport:$(window)}});});</script></td><td role="gridcell" style="white-space: normal; text-align: center;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">od 2025-04-01 <br/> do 2025-04-30</span></td><td role="gridcell" style="white-space: normal;"><span style="font-size: 0.875em; font-style: normal; text-align: center; width: 100%; display: inline-block; white-space: nowrap;">6,55%</span></td><td role="gridcell" style="white-space: normal; text-align: center;"><a href="http://www.obligacjeskarbowe.pl/listy-emisyjne/?id=EDO0435" style="font-size: 0.875em; " target="_blank">pokaż</a></td><td role="gridcell" style="text-align: center; font-size: 0.875em; "><a id="dostepneEmisje:j_idt190:5:wybierz" href="#" class="ui-commandlink ui-widget" onclick="PrimeFaces.ab({s:&quot;dostepneEmisje:j_idt190:5:wybierz&quot;,f:&quot;dostepneEmisje&quot;,u:&quot;dostepneEmisje&quot;});return false;">wybierz</a><script id="dostepneEmisje:j_idt190:5:wybierz_s" type="text/javascript">$(function(){PrimeFaces.cw("CommandLink","widget_dostepneEmisje_j_idt190_5_wybierz",{id:"dostepneEmisje:j_idt190:5:wybierz"});});</script></td></tr>""",
-        features="html.parser",
+        features=html_parser,
     )
     extracted_bonds = extract_available_bonds(bs, path="/foo.html")
     print(extracted_bonds)
@@ -223,10 +364,57 @@ def test_parse_partial_update_of_view_state():
     ]
 
 
-def test_extract_form_action():
+def test_parse_partial_response_in_chunks():
+    content = b'<?xml version=\'1.0\' encoding=\'UTF-8\'?>\n<partial-response id="j_id1"><changes><update id="stanRachunku:j_idt171"><![CDATA[ ]]></update><update id="j_id1:javax.faces.ViewState:0"><![CDATA[e1s2]]></update></changes></partial-response>'
+    chunks = [content[i : i + 7] for i in range(0, len(content), 7)]
+    assert list(parse_xml_response(chunks)) == [
+        PartialResponse(
+            id="j_id1",
+            updates={
+                "stanRachunku:j_idt171": " ",
+                "j_id1:javax.faces.ViewState:0": "e1s2",
+            },
+        )
+    ]
+
+
+def test_parse_malformed_xml_response():
+    with pytest.raises(PartialResponseError):
+        list(parse_xml_response("<html><body>Session expired</body></html>"))
+    with pytest.raises(PartialResponseError):
+        list(parse_xml_response('<partial-response id="j_id1"><changes>'))
+    with pytest.raises(PartialResponseError):
+        list(parse_xml_response(""))
+
+
+def test_parse_error_xml_response():
+    with pytest.raises(
+        PartialResponseError, match="ViewExpiredException: View expired"
+    ):
+        list(
+            parse_xml_response(
+                """<?xml version='1.0' encoding='UTF-8'?>
+<partial-response id="j_id1"><error><error-name>ViewExpiredException</error-name><error-message><![CDATA[View expired]]></error-message></error></partial-response>"""
+            )
+        )
+
+
+def test_scan_partial_update():
+    content = b'<?xml version=\'1.0\' encoding=\'UTF-8\'?>\n<partial-response id="j_id1"><changes><update id="stanRachunku:j_idt171"><![CDATA[<tr><td>]]]]><![CDATA[></td></tr>]]></update><update id="j_id1:javax.faces.ViewState:0"><![CDATA[e1s2]]></update></changes></partial-response>'
+    assert scan_partial_update(content, "j_id1:javax.faces.ViewState:0") == "e1s2"
+    assert (
+        scan_partial_update(content.decode(), "j_id1:javax.faces.ViewState:0") == "e1s2"
+    )
+    assert (
+        scan_partial_update(content, "stanRachunku:j_idt171") == "<tr><td>]]></td></tr>"
+    )
+    assert scan_partial_update(content, "stanRachunku:j_idt172") is None
+
+
+def test_extract_form_action(html_parser):
     bs = BeautifulSoup(
         """<span id="spanContent"><form id="daneDyspozycji" name="daneDyspozycji" method="post" action="/zakupObligacji500Plus.html?execution=e2s2" enctype="application/x-www-form-urlencoded"></span>""",
-        features="html.parser",
+        features=html_parser,
     )
     url = extract_form_action_by_id(bs)
     assert url == "/zakupObligacji500Plus.html?execution=e2s2"
@@ -235,10 +423,10 @@ def test_extract_form_action():
     assert form["name"] == "daneDyspozycji"
 
 
-def test_extract_view_state():
+def test_extract_view_state(html_parser):
     bs = BeautifulSoup(
         """<input type="hidden" name="javax.faces.ViewState" id="javax.faces.ViewState" value="e2s2" />""",
-        features="html.parser",
+        features=html_parser,
     )
     value = extract_javax_view_state(bs)
     assert value == "e2s2"
@@ -254,7 +442,7 @@ def test_parse_tak_nie():
     assert parse_tak_nie("NIE") == False
 
 
-def test_extract_dane_dyspozycji_500():
+def test_extract_dane_dyspozycji_500(html_parser):
     bs = BeautifulSoup(
         r"""<h4><strong>Obligacje</strong></h4>
 <span class="formlabel-230 formlabel-base">Kod emisji</span><span class="formfield-base"
@@ -326,7 +514,7 @@ szt
 
 
 """,
-        features="html.parser",
+        features=html_parser,
     )
     dane = extract_dane_dyspozycji(bs)
     assert dane == DaneDyspozycji(
@@ -340,7 +528,7 @@ szt
     )
 
 
-def test_extract_dane_dyspozycji():
+def test_extract_dane_dyspozycji(html_parser):
     bs = bs = BeautifulSoup(
         r"""<h4><strong>Obligacje</strong></h4>
 				<span class="formlabel-230 formlabel-base">Kod emisji</span><span class="formfield-base" style="font-weight: bold;">QWER0101</span>
@@ -386,7 +574,7 @@ def test_extract_dane_dyspozycji():
 
                     <span class="formlabel-230 formlabel-base" style="vertical-align: top;">Koszt transakcji:</span><span class="formfield-base" style="font-weight: bold; width: 330px;">Klient nie ponosi opłat przy zakupie obligacji.<br/>                                      Wysokość opłaty za przedterminowy wykup obligacji                                      określa List emisyjny danej emisji obligacji.</span>
                     <br />""",
-        features="html.parser",
+        features=html_parser,
     )
     dane = extract_dane_dyspozycji(bs)
     assert dane == DaneDyspozycji(
@@ -400,7 +588,7 @@ def test_extract_dane_dyspozycji():
     )
 
 
-def test_extract_purchase_step_title():
+def test_extract_purchase_step_title(html_parser):
     assert (
         extract_purchase_step_title(
             BeautifulSoup(
@@ -422,25 +610,57 @@ def test_extract_purchase_step_title():
 
         </div>
 """,
-                features="html.parser",
+                features=html_parser,
             )
         )
         == "Zakup obligacji 500+ - Dyspozycja zapisana"
     )
 
 
-def test_extract_data_przyjecia():
+def test_extract_data_przyjecia(html_parser):
     timestamp = extract_data_przyjecia_zlecenia(
         BeautifulSoup(
             r"""
         <span class="formlabel-230 formlabel-base">Data i czas przyjęcia zlecenia: </span><span class="formfield-base" style="font-weight: bold;">2023-05-10 18:03:47</span>
         <br />""",
-            features="html.parser",
+            features=html_parser,
         )
     )
     assert timestamp == datetime.datetime(2023, 5, 10, 18, 3, 47)
 
 
+def test_index_form_fields(html_parser):
+    bs = BeautifulSoup(
+        r"""
+        <span class="formlabel-230 formlabel-base">Kod emisji</span><span class="formfield-base">EDO0535</span><br />
+        <span class="formlabel-230 formlabel-base">Pełna nazwa emisji</span><span class="formfield-base">DZIESIĘCIOLETNIE
+            OBLIGACJE</span><br />
+        <span class="formlabel-230 formlabel-base"></span><span class="formfield-base">OSZCZĘDNOŚCIOWE</span>
+        <span class="formlabel-base">Saldo środków pieniężnych</span><span class="formfield-base">1 000,00 PLN</span>""",
+        features=html_parser,
+    )
+    fields = index_form_fields(bs)
+    assert fields == {
+        "Kod emisji": "EDO0535",
+        "Pełna nazwa emisji": "DZIESIĘCIOLETNIE OBLIGACJE",
+        "": "OSZCZĘDNOŚCIOWE",
+    }
+    assert extract_data_przyjecia_zlecenia(
+        bs, {"Data i czas przyjęcia zlecenia:": "2023-05-10 18:03:47"}
+    ) == datetime.datetime(2023, 5, 10, 18, 3, 47)
+
+
+def test_index_form_fields_duplicated_label(html_parser):
+    bs = BeautifulSoup(
+        r"""
+        <span class="formlabel-230 formlabel-base">Kod emisji</span><span class="formfield-base">EDO0535</span>
+        <span class="formlabel-230 formlabel-base">Kod emisji</span><span class="formfield-base">EDO0635</span>""",
+        features=html_parser,
+    )
+    with pytest.raises(RuntimeError, match="Kod emisji"):
+        index_form_fields(bs)
+
+
 def test_parse_duration():
     DATA = [
         ("3-miesięczne", 3),
@@ -470,7 +690,7 @@ def test_parse_duration():
         assert parse_duration(input) == output
 
 
-def test_parse_history():
+def test_parse_history(html_parser):
     bs = BeautifulSoup(
         r"""<tbody class="ui-datatable-data ui-widget-content" id="historia:tbl_data">
 										<tr class="ui-widget-content ui-datatable-even" data-ri="0" role="row">
@@ -496,7 +716,7 @@ def test_parse_history():
 											<td role="gridcell">tu są uwagi</td>
 										</tr>
                        </tbody>""",
-        features="html.parser",
+        features=html_parser,
     )
     history = parse_history(bs)
     assert history == [
@@ -525,37 +745,67 @@ def test_parse_history():
     ]
 
 
+def test_extract_tooltips():
+    script = r"""<script id="stanRachunku:j_idt171:0:j_idt185_s" type="text/javascript">$(function(){PrimeFaces.cw("ExtTooltip","widget_stanRachunku_j_idt171_0_j_idt185",{id:"stanRachunku:j_idt171:0:j_idt185",global:false,shared:false,autoShow:false,forTarget:"stanRachunku:j_idt171:0:nazwaSkrocona",content: {text: "okres 1 oprocentowanie 12.55%<\/br>okres 2 oprocentowanie 5.55%<\/br>"},style: {widget:true}});});</script>"""
+    expected = {
+        "stanRachunku:j_idt171:0:nazwaSkrocona": "okres 1 oprocentowanie 12.55%\nokres 2 oprocentowanie 5.55%"
+    }
+    assert extract_tooltips(script) == expected
+    assert extract_tooltips(script.encode()) == expected
+    assert extract_tooltips("<tbody></tbody>") == {}
+
+
 def test_html_to_string():
     assert html_to_string("foo</br>bar") == "foo\nbar"
     assert html_to_string("foo<br/>bar") == "foo\nbar"
     assert html_to_string("foo<br>bar") == "foo\nbar"
     assert html_to_string("foo<br />bar") == "foo\nbar"
     assert html_to_string("foo<br/>bar</br>baz</br></br>") == "foo\nbar\nbaz"
+    assert html_to_string("foo &amp; bar<b>baz</b>") == "foo & bar\nbaz"
 
 
 def test_parse_tooltip():
-    assert parse_tooltip("okres 1 oprocentowanie 7.5%") == [
-        InterestPeriod(1, Decimal("7.5"))
-    ]
-    assert parse_tooltip("okres 1 oprocentowanie 7.5%\n") == [
-        InterestPeriod(1, Decimal("7.5"))
-    ]
+    assert parse_tooltip("okres 1 oprocentowanie 7.5%") == (
+        InterestPeriod(1, Decimal("7.5")),
+    )
+    assert parse_tooltip("okres 1 oprocentowanie 7.5%\n") == (
+        InterestPeriod(1, Decimal("7.5")),
+    )
     assert parse_tooltip(
         "okres 1 oprocentowanie 7.5%\nokres 2 oprocentowanie 15.0%\n"
-    ) == [InterestPeriod(1, Decimal("7.5")), InterestPeriod(2, Decimal("15.0"))]
+    ) == (InterestPeriod(1, Decimal("7.5")), InterestPeriod(2, Decimal("15.0")))
     assert parse_tooltip(
         "okres 1 oprocentowanie 7.5%\nokres 2 oprocentowanie 15.0%"
-    ) == [InterestPeriod(1, Decimal("7.5")), InterestPeriod(2, Decimal("15.0"))]
+    ) == (InterestPeriod(1, Decimal("7.5")), InterestPeriod(2, Decimal("15.0")))
     assert parse_tooltip(
         "okres 1 oprocentowanie 7.5%\nokres 2 oprocentowanie 15.0%\n\n"
-    ) == [InterestPeriod(1, Decimal("7.5")), InterestPeriod(2, Decimal("15.0"))]
+    ) == (InterestPeriod(1, Decimal("7.5")), InterestPeriod(2, Decimal("15.0")))
     # assert parse_tooltip('')
 
 
-def test_parse_saldo_and_wartosc():
+def test_parse_tooltip_shares_schedules():
+    first = parse_tooltip("okres 1 oprocentowanie 6.8%\nokres 2 oprocentowanie 5.55%")
+    second = parse_tooltip(
+        "  okres 1 oprocentowanie 6.8%\n\n  okres 2 oprocentowanie 5.55%\n"
+    )
+    assert first is second
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        first[0].oprocentowanie = Decimal("100")
+
+
+def test_parse_tooltip_out_of_order():
+    with pytest.raises(RuntimeError, match="Expected interest period 2"):
+        parse_tooltip("okres 1 oprocentowanie 6.8%\nokres 3 oprocentowanie 5.55%")
+    with pytest.raises(RuntimeError, match="Unable to parse tooltip"):
+        parse_tooltip("okres 1 oprocentowanie 6.8%\nokres drugi")
+    with pytest.raises(RuntimeError, match="at least one interest period"):
+        parse_tooltip("\n")
+
+
+def test_parse_saldo_and_wartosc(html_parser):
     bs = BeautifulSoup(
         r"""<span class="formlabel-230 formlabel-base">Saldo środków pieniężnych</span><span class="formfield-base" style="font-weight: bold;">1 000 000,00 PLN</span><span class="formfield-base">Wartość nominalna dotychczas zakupionych obligacji za środki przyznane w ramach programów wsparcia rodziny wynosi: 69420.99</span>""",
-        features="html.parser",
+        features=html_parser,
     )
     assert emisje_parse_saldo_srodkow_pienieznych(bs), Money(
         amount=Decimal("1000000.00"), currency="PLN"
@@ -563,7 +813,7 @@ def test_parse_saldo_and_wartosc():
     assert emisje_parse_wartosc_nominalna_800plus(bs), Decimal("69420.99")
 
 
-def test_parse_login_info():
+def test_parse_login_info(html_parser):
     bs = BeautifulSoup(
         r"""<form id="userInfoForm" name="userInfoForm" method="post" action="/daneRachunku.html?execution=e39s1" enctype="application/x-www-form-urlencoded">
 <input type="hidden" name="userInfoForm" value="userInfoForm">
@@ -573,7 +823,7 @@ def test_parse_login_info():
 						<br>Ostatnie udane logowanie:&nbsp;2025-04-24 13:29:48
 						<br>Ostatnie nieudane logowanie:&nbsp;2025-04-23 18:44:29<input type="hidden" name="javax.faces.ViewState" id="javax.faces.ViewState" value="e39s1">
 </form>""",
-        features="html.parser",
+        features=html_parser,
     )
     login_info = parse_login_info(bs)
     assert login_info == LoginInfo(
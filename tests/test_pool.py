@@ -0,0 +1,39 @@
+import threading
+
+import requests
+
+from obligacjeskarbowe.pool import PoolStats, pooled_session, session_stats
+from obligacjeskarbowe.transfer import stream_to_file
+
+
+def test_pooled_session_reuses_connections(server, tmp_path):
+    session = pooled_session(requests.Session())
+    for _ in range(3):
+        session.get(server.url + "/pdf").raise_for_status()
+    for index in range(2):
+        stream_to_file(session, server.url + "/pdf", str(tmp_path / f"{index}.pdf"))
+    assert session_stats(session) == PoolStats(requests=5, connections=1)
+    assert session_stats(session).reused == 4
+
+
+def test_pooled_session_blocks_per_host(server, tmp_path):
+    server.delay = 0.02
+    session = pooled_session(requests.Session(), pool_maxsize=2, pool_block=True)
+
+    def download(index):
+        stream_to_file(session, server.url + "/pdf", str(tmp_path / f"{index}.pdf"))
+
+    threads = [threading.Thread(target=download, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(server.requests) == 8
+    assert server.peak <= 2
+    stats = session_stats(session)
+    assert stats.requests == 8
+    assert stats.connections == 2
+
+
+def test_session_stats_without_pooled_adapter():
+    assert session_stats(requests.Session()) == PoolStats(requests=0, connections=0)
@@ -0,0 +1,56 @@
+import datetime
+from decimal import Decimal
+
+from obligacjeskarbowe.money import Money
+from obligacjeskarbowe.redemption import redemption_costs
+from tests.helpers import bond
+
+EDO = bond("EDO0133", ["7", "10"], datetime.date(2033, 1, 15), count=10)
+ROR = bond("ROR0326", ["5.75"], datetime.date(2026, 3, 10))
+OTS = bond("OTS0725", ["3"], datetime.date(2025, 7, 1))
+
+
+def test_redemption_costs():
+    costs = redemption_costs(
+        [EDO, ROR, OTS],
+        [
+            datetime.date(2023, 1, 20),
+            datetime.date(2023, 7, 16),
+            datetime.date(2025, 3, 25),
+            datetime.date(2026, 6, 1),
+        ],
+    )
+    assert costs.redeemable.tolist() == [
+        [True, True, False],
+        [True, True, False],
+        [True, True, False],
+        [True, False, False],
+    ]
+
+    # 5 days of 7% is less than the 2 PLN fee, which takes all the interest, no tax is due
+    assert costs.value[0, 0] == 10 * (10000 + 10)
+    assert costs.fee[0, 0] == 10 * 10
+    assert costs.tax[0, 0] == 0
+    assert costs.net[0, 0] == 10 * 10000
+
+    # 19% of the interest left after the fee
+    assert costs.value[1, 0] == 10 * 10349
+    assert costs.fee[1, 0] == 10 * 200
+    assert costs.tax[1, 0] == 10 * 28
+    assert costs.money(costs.net, on=1)[0] == Money(Decimal("1012.10"))
+    # Capitalized at the last published rate until the maturity
+    assert costs.forgone[1, 0] == 10 * (25231 - 10349)
+
+    # 15 days of the first monthly coupon, the 0.50 PLN fee takes all of it. All 12 coupons are given up.
+    assert (costs.value[2, 1], costs.fee[2, 1], costs.tax[2, 1]) == (10023, 23, 0)
+    assert costs.forgone[2, 1] == 12 * 48 - 23
+
+    # Matured
+    assert (costs.fee[3, 1], costs.tax[3, 1], costs.forgone[3, 1]) == (0, 0, 0)
+    # OTS can't be redeemed early
+    assert (costs.fee[2, 2], costs.tax[2, 2]) == (0, 0)
+
+
+def test_redemption_order():
+    costs = redemption_costs([EDO, ROR, OTS], datetime.date(2025, 3, 25))
+    assert costs.order() == [1, 0]
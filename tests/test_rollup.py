@@ -0,0 +1,72 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from obligacjeskarbowe.money import Money
+from obligacjeskarbowe.rollup import Rollup, parse_condition
+from tests.helpers import bond
+
+
+def lot(emisja, data_wykupu, count, aktualna):
+    return bond(emisja, ["6.8"], data_wykupu, count=count, aktualna=aktualna)
+
+
+PORTFOLIOS = {
+    "IKE": [
+        lot("EDO0133", datetime.date(2033, 1, 15), 10, "1199.30"),
+        lot("EDO0234", datetime.date(2034, 2, 1), 5, "531.00"),
+    ],
+    None: [
+        lot("EDO0134", datetime.date(2034, 1, 10), 2, "212.00"),
+        lot("ROR0326", datetime.date(2026, 3, 10), 1, "100.23"),
+    ],
+}
+
+
+def test_query():
+    rollup = Rollup(PORTFOLIOS)
+    by_type = rollup.query(["typ"])
+    assert list(by_type) == [("EDO",), ("ROR",)]
+    assert by_type[("EDO",)].lots == 3
+    assert by_type[("EDO",)].dostepnych == 17
+    assert rollup.money(by_type[("EDO",)].odsetki) == Money(Decimal("242.30"))
+
+    assert {
+        key: aggregate.dostepnych
+        for key, aggregate in rollup.query(["rok_zakupu", "konto"], typ="EDO").items()
+    } == {(2023, "IKE"): 10, (2024, None): 2, (2024, "IKE"): 5}
+
+    total = rollup.total()
+    assert (total.lots, total.dostepnych) == (4, 18)
+    assert rollup.money(total.nominalna) == Money(Decimal("1800"))
+    assert rollup.total(wykup=2026, konto=None).lots == 1
+    assert rollup.total(typ="TOS").lots == 0
+
+    with pytest.raises(ValueError):
+        rollup.query(["emisja"])
+
+
+def test_skips_unknown_series():
+    unknown = lot("XYZ0133", datetime.date(2033, 1, 15), 1, "100")
+    rollup = Rollup({"IKE": [*PORTFOLIOS["IKE"], unknown], None: PORTFOLIOS[None]})
+    assert rollup.skipped == [unknown]
+    assert rollup.total().lots == 4
+
+
+def test_query_is_cached():
+    rollup = Rollup(PORTFOLIOS)
+    rollup.query(["typ"], wykup=2034)
+    rollup.query(["wykup"], typ="EDO")
+    # Finest cells, and a single grouping by both dimensions
+    assert list(rollup.cache) == [
+        ("typ", "rok_zakupu", "wykup", "konto"),
+        ("typ", "wykup"),
+    ]
+
+
+def test_parse_condition():
+    assert parse_condition("typ=EDO") == ("typ", "EDO")
+    assert parse_condition("wykup=2030") == ("wykup", 2030)
+    with pytest.raises(ValueError):
+        parse_condition("emisja=EDO0133")
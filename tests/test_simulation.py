@@ -0,0 +1,47 @@
+import numpy as np
+
+from obligacjeskarbowe.simulation import CpiModel, simulate
+from tests.helpers import available_bond
+
+TOS = available_bond("3-letnie", "TOS0428", "5.95")
+COI = available_bond("4-letnie", "COI0429", "6.30")
+EDO = available_bond("10-letnie", "EDO0435", "6.55")
+
+
+def test_simulate_fixed_rate():
+    (tos,) = simulate([TOS], CpiModel(current=4.9), paths=100, seed=1)
+    # 5.95% capitalized yearly, rounded to grosze every year
+    assert set(tos.payoffs.tolist()) == {10000 + 595 + 630 + 668}
+    assert np.allclose(tos.annualized(), 0.0595, atol=1e-4)
+
+
+def test_simulate_constant_cpi():
+    model = CpiModel(current=3.0, mean=3.0, volatility=0)
+    coi, edo = simulate([COI, EDO], model, paths=10, seed=1)
+    # 6.30% in the first year, then 3% CPI + 1.50% margin paid out every year
+    assert set(coi.payoffs.tolist()) == {10000 + 630 + 3 * 450}
+    value = 10000 + 655
+    for _ in range(9):
+        value += int(value * 0.05 + 0.5)
+    assert set(edo.payoffs.tolist()) == {value}
+
+
+def test_simulate_negative_cpi():
+    model = CpiModel(current=-1.0, mean=-1.0, volatility=0)
+    (coi,) = simulate([COI], model, paths=1, seed=1)
+    # Just the margin when the CPI is negative
+    assert coi.payoffs.tolist() == [10000 + 630 + 3 * 150]
+
+
+def test_simulate_reproducible():
+    model = CpiModel(current=4.9)
+    first = simulate([COI, EDO], model, paths=25_000, seed=42)
+    second = simulate([COI, EDO], model, paths=25_000, seed=42, workers=2)
+    for a, b in zip(first, second):
+        assert a.payoffs.shape == (25_000,)
+        assert np.array_equal(a.payoffs, b.payoffs)
+    low, median, high = first[1].percentiles()
+    assert low < median < high
+
+    other = simulate([COI, EDO], model, paths=25_000, seed=43)
+    assert not np.array_equal(first[1].payoffs, other[1].payoffs)
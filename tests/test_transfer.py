@@ -0,0 +1,166 @@
+import hashlib
+
+import pytest
+import requests
+
+from obligacjeskarbowe.transfer import (
+    PART_SUFFIX,
+    VALIDATOR_SUFFIX,
+    discard_part,
+    stream_to_file,
+)
+
+
+def interrupted(source, filename, body, validator='"v1"'):
+    """Leaves the `.part` file of an interrupted transfer from source, with its validator."""
+    with open(filename + PART_SUFFIX, "wb") as part:
+        part.write(body)
+    if validator is not None:
+        with open(filename + PART_SUFFIX + VALIDATOR_SUFFIX, "w") as f:
+            f.write(f"{source}\n{validator}")
+
+
+def test_stream_to_file(server, tmp_path):
+    server.etag = '"v1"'
+    filename = str(tmp_path / "EDO0134.pdf")
+    transfer = stream_to_file(requests.Session(), server.url + "/pdf", filename)
+    with open(filename, "rb") as f:
+        assert f.read() == server.body
+    assert transfer.size == len(server.body)
+    assert transfer.sha256 == hashlib.sha256(server.body).hexdigest()
+    assert transfer.resumed == 0
+    assert [path.name for path in tmp_path.iterdir()] == ["EDO0134.pdf"]
+    assert server.requests[0]["Accept-Encoding"] == "identity"
+    assert "Range" not in server.requests[0]
+
+
+@pytest.mark.parametrize("ranges", [True, False])
+def test_stream_to_file_resumes(server, tmp_path, ranges):
+    server.ranges = ranges
+    server.etag = '"v1"'
+    filename = str(tmp_path / "EDO0134.pdf")
+    interrupted(server.url + "/pdf", filename, server.body[:1000])
+    transfer = stream_to_file(
+        requests.Session(), server.url + "/pdf", filename, chunk_size=4096
+    )
+    with open(filename, "rb") as f:
+        assert f.read() == server.body
+    assert transfer.sha256 == hashlib.sha256(server.body).hexdigest()
+    assert server.requests[0]["Range"] == "bytes=1000-"
+    assert server.requests[0]["If-Range"] == '"v1"'
+    # The whole file sent instead of the range is kept, not requested again
+    assert len(server.requests) == 1
+    assert transfer.resumed == (1000 if ranges else 0)
+    assert [path.name for path in tmp_path.iterdir()] == ["EDO0134.pdf"]
+
+
+def test_stream_to_file_changed(server, tmp_path):
+    server.etag = '"v2"'
+    filename = str(tmp_path / "EDO0134.pdf")
+    interrupted(server.url + "/pdf", filename, b"%PDF old version")
+    transfer = stream_to_file(requests.Session(), server.url + "/pdf", filename)
+    assert transfer.resumed == 0
+    assert len(server.requests) == 1
+    with open(filename, "rb") as f:
+        assert f.read() == server.body
+
+
+def test_stream_to_file_without_validator(server, tmp_path):
+    filename = str(tmp_path / "EDO0134.pdf")
+    interrupted(server.url + "/pdf", filename, server.body[:1000], validator=None)
+    transfer = stream_to_file(requests.Session(), server.url + "/pdf", filename)
+    assert transfer.resumed == 0
+    assert "Range" not in server.requests[0]
+    with open(filename, "rb") as f:
+        assert f.read() == server.body
+
+
+@pytest.mark.parametrize(
+    "path,params", [("/other.pdf", None), ("/pdf", {"id": "EDO0134"})]
+)
+def test_stream_to_file_other_source(server, tmp_path, path, params):
+    server.etag = '"v1"'
+    filename = str(tmp_path / "EDO0134.pdf")
+    # Interrupted while downloading from another URL with the same validator
+    interrupted(server.url + path, filename, server.body[:1000])
+    transfer = stream_to_file(
+        requests.Session(), server.url + "/pdf", filename, params=params
+    )
+    assert transfer.resumed == 0
+    assert "Range" not in server.requests[0]
+    with open(filename, "rb") as f:
+        assert f.read() == server.body
+    assert [path.name for path in tmp_path.iterdir()] == ["EDO0134.pdf"]
+
+
+def test_stream_to_file_resumes_with_params(server, tmp_path):
+    server.etag = '"v1"'
+    filename = str(tmp_path / "EDO0134.pdf")
+    params = {"id": "EDO0134", "lang": "pl"}
+    interrupted(server.url + "/pdf?id=EDO0134&lang=pl", filename, server.body[:1000])
+    transfer = stream_to_file(
+        requests.Session(), server.url + "/pdf", filename, params=params
+    )
+    assert transfer.resumed == 1000
+    with open(filename, "rb") as f:
+        assert f.read() == server.body
+
+
+def test_stream_to_file_complete_part(server, tmp_path):
+    server.etag = '"v1"'
+    filename = str(tmp_path / "EDO0134.pdf")
+    interrupted(server.url + "/pdf", filename, server.body)
+    transfer = stream_to_file(requests.Session(), server.url + "/pdf", filename)
+    assert transfer.size == transfer.resumed == len(server.body)
+    assert transfer.sha256 == hashlib.sha256(server.body).hexdigest()
+    with open(filename, "rb") as f:
+        assert f.read() == server.body
+    assert [path.name for path in tmp_path.iterdir()] == ["EDO0134.pdf"]
+
+
+@pytest.mark.parametrize(
+    "body,validator",
+    [
+        # Longer than the file
+        (bytes(range(256)) * 1001, '"v1"'),
+        # As long as the file, but of another version, the server doesn't support If-Range
+        (bytes(256) * 1000, '"v0"'),
+    ],
+)
+def test_stream_to_file_complete_part_mismatch(server, tmp_path, body, validator):
+    server.etag = '"v1"'
+    server.if_range = False
+    filename = str(tmp_path / "EDO0134.pdf")
+    interrupted(server.url + "/pdf", filename, body, validator)
+    transfer = stream_to_file(requests.Session(), server.url + "/pdf", filename)
+    assert transfer.resumed == 0
+    assert len(server.requests) == 2
+    with open(filename, "rb") as f:
+        assert f.read() == server.body
+
+
+def test_stream_to_file_without_resume(server, tmp_path):
+    filename = str(tmp_path / "EDO0134.pdf")
+    interrupted(server.url + "/pdf", filename, b"stale")
+    transfer = stream_to_file(
+        requests.Session(), server.url + "/pdf", filename, resume=False
+    )
+    assert transfer.resumed == 0
+    assert "Range" not in server.requests[0]
+    with open(filename, "rb") as f:
+        assert f.read() == server.body
+
+
+def test_stream_to_file_error(server, tmp_path):
+    filename = str(tmp_path / "EDO0134.pdf")
+    with pytest.raises(requests.exceptions.HTTPError):
+        stream_to_file(requests.Session(), server.url + "/missing", filename)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_discard_part(tmp_path):
+    filename = str(tmp_path / "EDO0134.pdf")
+    interrupted("https://www.obligacjeskarbowe.pl/EDO0134.pdf", filename, b"%PDF")
+    discard_part(filename)
+    discard_part(filename)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,75 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from obligacjeskarbowe.money import Money
+from obligacjeskarbowe.series import series_of
+from obligacjeskarbowe.valuation import Valuation
+from tests.helpers import bond
+
+EDO = bond("EDO0133", ["7", "10"], datetime.date(2033, 1, 15), count=10)
+ROR = bond("ROR0326", ["5.75"], datetime.date(2026, 3, 10))
+
+
+def test_series_of():
+    assert series_of("EDO0133").months == 120
+    assert series_of("ROR0326").period_boundaries(datetime.date(2026, 3, 10))[:2] == [
+        datetime.date(2025, 3, 10),
+        datetime.date(2025, 4, 10),
+    ]
+    with pytest.raises(ValueError):
+        series_of("XYZ0101")
+
+
+def test_unit_values():
+    valuation = Valuation([EDO, ROR])
+    values = valuation.unit_values(
+        [
+            datetime.date(2023, 7, 16),
+            datetime.date(2024, 7, 15),
+            datetime.date(2026, 1, 15),
+            datetime.date(2040, 1, 1),
+        ]
+    )
+    assert values[:, 0].tolist() == [
+        # 182 of 365 days at 7%
+        10000 + 349,
+        # 182 of 366 days at 10% of 107 PLN
+        10700 + 532,
+        # Published rates end after the second year, the last one is assumed
+        12947,
+        # Past the maturity, 107 PLN capitalized at 10% for the remaining 9 years
+        25231,
+    ]
+    # Before the purchase, 5 of 31 days of a monthly coupon, and the last coupon at the maturity
+    assert values[:, 1].tolist() == [10000, 10000, 10000 + 8, 10000 + 48]
+    assert valuation.unit_values(datetime.date(2025, 3, 25)).tolist() == [
+        # 69 of 365 days at 10% of 117.70 PLN, and 15 of 31 days at 5.75% / 12
+        [11770 + 223, 10000 + 23]
+    ]
+
+
+def test_skips_unknown_series():
+    unknown = bond("XYZ0133", ["7"], datetime.date(2033, 1, 15))
+    valuation = Valuation([EDO, unknown, ROR])
+    assert valuation.bonds == [EDO, ROR]
+    assert valuation.skipped == [unknown]
+    assert valuation.unit_values(datetime.date(2024, 1, 15)).shape == (1, 2)
+
+
+def test_lot_values_and_totals():
+    valuation = Valuation([EDO, ROR])
+    on = datetime.date(2024, 1, 15)
+    assert valuation.lot_values(on).tolist() == [[107000, 10000]]
+    assert valuation.totals([on]) == [Money(Decimal("1170.00"))]
+
+
+def test_reconcile():
+    on = datetime.date(2023, 7, 16)
+    matching = bond("EDO0133", ["7"], datetime.date(2033, 1, 15), 10, "1034.90")
+    off = bond("EDO0133", ["7"], datetime.date(2033, 1, 15), 10, "1034.70")
+    discrepancies = Valuation([matching, off]).reconcile(on)
+    assert len(discrepancies) == 1
+    assert discrepancies[0].bond is off
+    assert discrepancies[0].difference == Money(Decimal("0.20"))